@@ -9,7 +9,9 @@ https://github.com/alandtse/pr_custom_component
 import asyncio
 from datetime import timedelta
 import logging
-from typing import List, Text
+import os
+import time
+from typing import Dict, List, Optional, Text
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -17,20 +19,73 @@ from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.aiohttp_client import (
     async_get_clientsession,
 )
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.requirements import pip_kwargs
 import yarl
 
 from .api import PRCustomComponentApiClient
-from .const import CONF_PR_URL, DOMAIN, HACS_DOMAIN, PLATFORMS, STARTUP_MESSAGE
-
-SCAN_INTERVAL = timedelta(days=1)
+from .blobstore import BlobStore
+from .const import (
+    BLOBS_PATH,
+    CACHE_SAVE_DELAY,
+    CACHE_STORAGE_KEY,
+    CACHE_STORAGE_VERSION,
+    CONF_CONCURRENCY,
+    CONF_DOWNLOAD_MODE,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MIN_POLL_INTERVAL,
+    CONF_PR_URL,
+    DATA_BLOB_STORE,
+    DATA_CACHE_STORE,
+    DATA_GITHUB_CLIENT,
+    DATA_INSTALL_INDEX,
+    DATA_INSTALL_INDEX_STORE,
+    DATA_PULL_POLLER,
+    DATA_WHEEL_CACHE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_DOWNLOAD_MODE,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DOMAIN,
+    EXCEPTION_TEMPLATE,
+    HACS_DOMAIN,
+    INSTALL_INDEX_SAVE_DELAY,
+    INSTALL_INDEX_STORAGE_KEY,
+    INSTALL_INDEX_STORAGE_VERSION,
+    PLATFORMS,
+    POLL_BUDGET_PER_HOUR,
+    RATE_LIMIT_RESERVE,
+    REQUIREMENTS_DOWNLOADING,
+    REQUIREMENTS_FAILED,
+    REQUIREMENTS_INSTALLED,
+    REQUIREMENTS_READY,
+    STARTUP_MESSAGE,
+    STORAGE_PATH,
+    WHEELS_PATH,
+)
+from .exceptions import RateLimitException
+from .github import GitHubClient
+from .installindex import InstallIndex
+from .poller import PullRequestPoller
+from .services import async_setup_services
+from .stats import SyncStats
+from .webhook import async_setup_webhook, async_unregister_webhook
+from .wheels import WheelCache
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up this integration using YAML is not supported."""
+    async_setup_services(hass)
+    # Components synced by an entry are set up after this integration, so their
+    # requirements are installed from the wheel cache
+    if await hass.async_add_executor_job(get_wheel_cache(hass).enable):
+        _LOGGER.debug("Using wheel cache %s", get_wheel_cache(hass).path)
     return True
 
 
@@ -41,20 +96,50 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         _LOGGER.info(STARTUP_MESSAGE)
 
     pr_url = entry.data.get(CONF_PR_URL)
+    await async_load_response_cache(hass)
+    await async_load_install_index(hass)
 
     session = async_get_clientsession(hass)
-    client = PRCustomComponentApiClient(session, yarl.URL(pr_url), hass.config.path())
+    client = PRCustomComponentApiClient(
+        session,
+        yarl.URL(pr_url),
+        hass.config.path(),
+        blob_store=get_blob_store(hass),
+        github=get_github_client(hass),
+    )
     client.set_token(get_hacs_token(hass))
     client.updated_at = entry.data["update_time"]
-    coordinator = PRCustomComponentDataUpdateCoordinator(hass, client=client)
+    client.download_mode = entry.options.get(CONF_DOWNLOAD_MODE, DEFAULT_DOWNLOAD_MODE)
+    client.concurrency = entry.options.get(CONF_CONCURRENCY, DEFAULT_CONCURRENCY)
+    client.max_bytes_in_flight = (
+        entry.options.get(CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT) * 1024 * 1024
+    )
+    get_pull_poller(hass).register(client.pull_url)
+    coordinator = PRCustomComponentDataUpdateCoordinator(
+        hass,
+        client=client,
+        min_interval=timedelta(
+            minutes=entry.options.get(CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL)
+        ),
+        max_interval=timedelta(
+            minutes=entry.options.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL)
+        ),
+        entry_id=entry.entry_id,
+    )
     await coordinator.async_refresh()
 
     if not coordinator.last_update_success:
         raise ConfigEntryNotReady
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    await async_setup_webhook(hass, entry)
+    if not coordinator.restored:
+        # Hashing the local files is cheap; only damaged files cost requests
+        coordinator.schedule_verify()
 
-    platforms = [platform for platform in PLATFORMS if entry.options.get(platform, True)]
+    platforms = [
+        platform for platform in PLATFORMS if entry.options.get(platform, True)
+    ]
     coordinator.platforms.append(platforms)
     await hass.config_entries.async_forward_entry_setups(entry, platforms)
     entry.add_update_listener(async_reload_entry)
@@ -62,23 +147,299 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
 
 class PRCustomComponentDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching data from the API."""
+    """Class to manage fetching data from the API.
+
+    The polling interval adapts to the Pull Request: it drops to the minimum when
+    the Pull Request changes and doubles up to the maximum while it is idle. Closed
+    or merged Pull Requests are no longer polled and the interval is stretched so
+    all entries stay within POLL_BUDGET_PER_HOUR and the GitHub rate limit. Once a
+    webhook delivery is received, updates are pushed and polling only runs at the
+    maximum interval as a safety net.
+
+    On startup, an entry whose installed files still match its install record
+    is restored from it without any request; GitHub is first asked at the next
+    poll.
 
-    def __init__(self, hass: HomeAssistant, client: PRCustomComponentApiClient) -> None:
+    Updates that are not installed automatically are downloaded into staging in
+    the background as soon as they are detected so installing them later is
+    instant and needs no network. The requirements of a synced or staged
+    component that are not installed yet are downloaded into the wheel cache in
+    the background so the restart loading it does not wait on pip downloads.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: PRCustomComponentApiClient,
+        min_interval: timedelta = timedelta(minutes=DEFAULT_MIN_POLL_INTERVAL),
+        max_interval: timedelta = timedelta(minutes=DEFAULT_MAX_POLL_INTERVAL),
+        entry_id: Optional[str] = None,
+    ) -> None:
         """Initialize."""
         self.api = client
+        # Config entry whose install record is kept; None keeps no record
+        self._entry_id: Optional[str] = entry_id
+        # Whether the first refresh was restored from the install record
+        self.restored: bool = False
+        self._started: bool = False
+        self._saved_installs: int = -1
         self.platforms: List[Text] = []
         self.hass = hass
+        self.min_interval: timedelta = min_interval
+        self.max_interval: timedelta = max(max_interval, min_interval)
+        self._last_updated_at: Optional[str] = None
+        self.webhook_active: bool = False
+        # Statistics of the last update, exposed as diagnostic sensors
+        self.stats: Optional[SyncStats] = None
+        self._prestage: Optional[asyncio.Task] = None
+        # Manifest requirements and their prefetch state, exposed as a sensor
+        self.requirements: List[str] = []
+        self.requirements_missing: List[str] = []
+        self.requirements_state: Optional[str] = None
+        self.requirements_error: str = ""
+        self._prefetch: Optional[asyncio.Task] = None
+        # Result of the last verification of the installed files
+        self.damaged_files: Dict[str, str] = {}
+        self._verify: Optional[asyncio.Task] = None
 
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=self._apply_budget(min_interval),
+        )
 
     async def _async_update_data(self):
         """Update data via library."""
-        self.api.set_token(get_hacs_token(self.hass))
+        if not self._started:
+            self._started = True
+            data = await self._async_restore()
+            if data:
+                self.update_interval = self._next_interval(data)
+                return data
+        token: Text = get_hacs_token(self.hass)
+        self.api.set_token(token)
         try:
-            return await self.api.async_update_data(download=self.api.auto_update)
+            pull_json = await get_pull_poller(self.hass).async_get_pull(
+                self.api.pull_url, token
+            )
+            data = await self.api.async_update_data(
+                download=self.api.auto_update, pull_json=pull_json
+            )
+        except RateLimitException as exception:
+            # Defer the update until the rate limit resets
+            delay = timedelta(seconds=max(exception.reset - time.time(), 0) + 1)
+            self.update_interval = min(delay, self.max_interval)
+            raise UpdateFailed(str(exception)) from exception
         except Exception as exception:
             raise UpdateFailed() from exception
+        finally:
+            self.stats = self.api.last_stats
+        self.update_interval = self._next_interval(data)
+        if (
+            data
+            and self.api.update_available
+            and not self.api.auto_update
+            and not self.api.update_staged
+            and (self._prestage is None or self._prestage.done())
+        ):
+            self._prestage = self.hass.async_create_background_task(
+                self._async_prestage(), f"{DOMAIN} prestage {self.api.pull_url}"
+            )
+        if data:
+            self._schedule_prefetch(staged=self.api.update_staged)
+        await self.async_save_install_index()
+        return data
+
+    async def _async_restore(self) -> Optional[dict]:
+        """Return the pull data of the install record if the install matches it."""
+        if self._entry_id is None:
+            return None
+        record = get_install_index(self.hass).get(self._entry_id)
+        if record is None or not await self.api.async_restore(record):
+            return None
+        self.restored = True
+        self._saved_installs = self.api.installs
+        return record["pull"]
+
+    async def async_save_install_index(self) -> None:
+        """Record the installed component if it changed since last recorded."""
+        installs: int = self.api.installs
+        if self._entry_id is None or installs == self._saved_installs:
+            return
+        record = await self.api.async_get_install_record()
+        index = get_install_index(self.hass)
+        if record is None:
+            index.remove(self._entry_id)
+        else:
+            index.set(self._entry_id, record)
+        self._saved_installs = installs
+
+    async def _async_prestage(self) -> None:
+        """Stage the available update for a later install."""
+        try:
+            staged: bool = await self.api.async_prestage()
+        except RateLimitException as exception:
+            _LOGGER.debug("Deferring staging of %s: %s", self.api.name, exception)
+            return
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.debug(
+                "Unable to stage %s: %s",
+                self.api.name,
+                EXCEPTION_TEMPLATE.format(type(exception).__name__, exception.args),
+            )
+            return
+        if staged:
+            _LOGGER.info("Update of %s is staged for install", self.api.name)
+            self._schedule_prefetch(staged=True)
+        self.stats = self.api.last_stats
+        self.async_update_listeners()
+
+    def _schedule_prefetch(self, staged: bool = False) -> None:
+        """Prefetch the component requirements unless already prefetching."""
+        if self._prefetch is not None and not self._prefetch.done():
+            return
+        self._prefetch = self.hass.async_create_background_task(
+            self.async_prefetch_requirements(staged),
+            f"{DOMAIN} prefetch requirements {self.api.pull_url}",
+        )
+
+    async def async_prefetch_requirements(self, staged: bool = False) -> None:
+        """Download the requirements of the component that are not installed.
+
+        Args:
+            staged (bool): Whether to prefetch for the staged update instead of
+                the installed component
+
+        """
+        requirements: List[str] = await self.api.async_get_requirements(staged)
+        if requirements == self.requirements and self.requirements_state in (
+            REQUIREMENTS_INSTALLED,
+            REQUIREMENTS_READY,
+        ):
+            return
+        wheel_cache = get_wheel_cache(self.hass)
+        self.requirements = requirements
+        self.requirements_error = ""
+        self.requirements_missing = await self.hass.async_add_executor_job(
+            wheel_cache.missing, requirements
+        )
+        if not self.requirements_missing:
+            self.requirements_state = REQUIREMENTS_INSTALLED
+            self.async_update_listeners()
+            return
+        _LOGGER.debug(
+            "Prefetching %s requirements %s",
+            self.api.name,
+            self.requirements_missing,
+        )
+        self.requirements_state = REQUIREMENTS_DOWNLOADING
+        self.async_update_listeners()
+        kwargs = pip_kwargs(None)
+        try:
+            await self.hass.async_add_executor_job(
+                wheel_cache.download,
+                self.requirements_missing,
+                kwargs.get("constraints"),
+                kwargs.get("timeout"),
+            )
+        except Exception as exception:  # pylint: disable=broad-except
+            self.requirements_state = REQUIREMENTS_FAILED
+            self.requirements_error = str(exception) or type(exception).__name__
+            _LOGGER.warning(
+                "Unable to prefetch %s requirements: %s",
+                self.api.name,
+                self.requirements_error,
+            )
+        else:
+            self.requirements_state = REQUIREMENTS_READY
+            await self.hass.async_add_executor_job(wheel_cache.enable)
+            _LOGGER.info(
+                "Prefetched %s requirements into %s", self.api.name, wheel_cache.path
+            )
+        self.async_update_listeners()
+
+    def schedule_verify(self) -> None:
+        """Verify and repair the installed files in the background."""
+        if self._verify is not None and not self._verify.done():
+            return
+        self._verify = self.hass.async_create_background_task(
+            self._async_verify_background(), f"{DOMAIN} verify {self.api.pull_url}"
+        )
+
+    async def _async_verify_background(self) -> None:
+        """Verify the installed files, logging instead of raising errors."""
+        try:
+            await self.async_verify()
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.debug(
+                "Unable to verify %s: %s",
+                self.api.name,
+                EXCEPTION_TEMPLATE.format(type(exception).__name__, exception.args),
+            )
+
+    async def async_verify(self, repair: bool = True) -> Dict[str, str]:
+        """Verify the installed files and optionally repair damaged ones.
+
+        Args:
+            repair (bool): Whether to restore damaged files
+
+        Returns:
+            Dict[str, str]: Result keyed by relative path of each damaged file
+        """
+        self.damaged_files = await self.api.async_verify(repair)
+        await self.async_save_install_index()
+        self.async_update_listeners()
+        return self.damaged_files
+
+    async def async_cancel_prestage(self) -> None:
+        """Cancel a background staging in progress and wait for it to stop."""
+        if self._prestage is None or self._prestage.done():
+            return
+        self._prestage.cancel()
+        await asyncio.wait([self._prestage])
+
+    def cancel_background_tasks(self) -> None:
+        """Cancel a background staging, prefetch or verification in progress."""
+        for task in (self._prestage, self._prefetch, self._verify):
+            if task is not None:
+                task.cancel()
+
+    def _next_interval(self, data: dict) -> Optional[timedelta]:
+        """Return the interval until the next poll or None to stop polling."""
+        if data.get("state") == "closed":
+            _LOGGER.info(
+                "%s is %s; polling stopped until reload",
+                self.api.pull_url,
+                "merged" if data.get("merged") else "closed",
+            )
+            return None
+        updated_at: Optional[str] = data.get("updated_at")
+        changed: bool = updated_at != self._last_updated_at
+        self._last_updated_at = updated_at
+        if self.webhook_active:
+            interval = self.max_interval
+        elif changed or self.update_interval is None:
+            interval = self.min_interval
+        else:
+            interval = min(
+                max(self.update_interval * 2, self.min_interval), self.max_interval
+            )
+        return self._apply_budget(interval)
+
+    async def async_handle_webhook(self) -> None:
+        """Refresh immediately after a matching webhook delivery."""
+        get_pull_poller(self.hass).invalidate(self.api.pull_url)
+        await self.async_refresh()
+
+    def _apply_budget(self, interval: timedelta) -> timedelta:
+        """Stretch interval so polling stays within the global request budget."""
+        entries: int = max(len(self.hass.config_entries.async_entries(DOMAIN)), 1)
+        floor = timedelta(seconds=entries * 3600 / POLL_BUDGET_PER_HOUR)
+        github = get_github_client(self.hass)
+        if github.remaining is not None and github.remaining <= RATE_LIMIT_RESERVE:
+            floor = max(floor, timedelta(seconds=github.reset - time.time()))
+        return max(interval, floor)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -93,6 +454,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             ]
         )
     )
+    coordinator.cancel_background_tasks()
+    get_pull_poller(hass).unregister(coordinator.api.pull_url)
+    async_unregister_webhook(hass, entry)
     await coordinator.api.async_delete()
     if unloaded:
         hass.data[DOMAIN].pop(entry.entry_id)
@@ -100,6 +464,12 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Forget the install record of a removed entry."""
+    await async_load_install_index(hass)
+    get_install_index(hass).remove(entry.entry_id)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
@@ -121,3 +491,81 @@ def get_hacs_token(hass: HomeAssistant) -> Text:
     if hacs_token and hacs_token != old_hacs_token:
         _LOGGER.debug("Found new hacs token")
     return hacs_token
+
+
+def get_blob_store(hass: HomeAssistant) -> BlobStore:
+    """Return the blob store shared by all entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_BLOB_STORE not in data:
+        data[DATA_BLOB_STORE] = BlobStore(
+            os.path.join(hass.config.path(), STORAGE_PATH, BLOBS_PATH)
+        )
+    return data[DATA_BLOB_STORE]
+
+
+def get_wheel_cache(hass: HomeAssistant) -> WheelCache:
+    """Return the wheel cache shared by all entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_WHEEL_CACHE not in data:
+        data[DATA_WHEEL_CACHE] = WheelCache(
+            os.path.join(hass.config.path(), STORAGE_PATH, WHEELS_PATH)
+        )
+    return data[DATA_WHEEL_CACHE]
+
+
+def get_github_client(hass: HomeAssistant) -> GitHubClient:
+    """Return the GitHub client shared by all entries and config flows."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_GITHUB_CLIENT not in data:
+        data[DATA_GITHUB_CLIENT] = GitHubClient(async_get_clientsession(hass))
+    return data[DATA_GITHUB_CLIENT]
+
+
+async def async_load_response_cache(hass: HomeAssistant) -> None:
+    """Restore the shared response cache from storage and save it on changes.
+
+    Only the first call loads; the cache is then saved CACHE_SAVE_DELAY seconds
+    after it changes and when Home Assistant stops.
+    """
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_CACHE_STORE in data:
+        return
+    store: Store = Store(hass, CACHE_STORAGE_VERSION, CACHE_STORAGE_KEY)
+    data[DATA_CACHE_STORE] = store
+    cache = get_github_client(hass).cache
+    cache.load(await store.async_load())
+    cache.on_change = lambda: store.async_delay_save(cache.as_dict, CACHE_SAVE_DELAY)
+
+
+def get_install_index(hass: HomeAssistant) -> InstallIndex:
+    """Return the install index shared by all entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_INSTALL_INDEX not in data:
+        data[DATA_INSTALL_INDEX] = InstallIndex()
+    return data[DATA_INSTALL_INDEX]
+
+
+async def async_load_install_index(hass: HomeAssistant) -> None:
+    """Restore the install index from storage and save it on changes.
+
+    Only the first call loads; the index is then saved INSTALL_INDEX_SAVE_DELAY
+    seconds after it changes and when Home Assistant stops.
+    """
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_INSTALL_INDEX_STORE in data:
+        return
+    store: Store = Store(hass, INSTALL_INDEX_STORAGE_VERSION, INSTALL_INDEX_STORAGE_KEY)
+    data[DATA_INSTALL_INDEX_STORE] = store
+    index = get_install_index(hass)
+    index.load(await store.async_load())
+    index.on_change = lambda: store.async_delay_save(
+        index.as_dict, INSTALL_INDEX_SAVE_DELAY
+    )
+
+
+def get_pull_poller(hass: HomeAssistant) -> PullRequestPoller:
+    """Return the pull request poller shared by all entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PULL_POLLER not in data:
+        data[DATA_PULL_POLLER] = PullRequestPoller(get_github_client(hass))
+    return data[DATA_PULL_POLLER]
@@ -10,39 +10,89 @@ https://github.com/alandtse/pr_custom_component
 """
 import asyncio
 import base64
+from collections import deque
+import hashlib
+from http import HTTPStatus
 import json
 from json.decoder import JSONDecodeError
 import logging
 import os
 import shutil
 import socket
-from typing import Dict, List, Union
+import tarfile
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import aiofiles
 import aiohttp
 import async_timeout
 import yarl
 
+from .blobstore import BlobStore, git_blob_sha, git_blob_sha_file
+from .download import DownloadJob, DownloadPipeline
 from .const import (
-    API_DOMAIN,
     API_PATH_PREFIX,
     COMPONENT_PATH,
     CUSTOM_COMPONENT_PATH,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_DOWNLOAD_MODE,
+    DEFAULT_MAX_BYTES_IN_FLIGHT,
+    DOMAIN,
+    DOWNLOAD_MODE_PATCH,
+    DOWNLOAD_MODE_TARBALL,
+    DOWNLOAD_MODE_TREES,
     ENGLISH_JSON,
     EXCEPTION_TEMPLATE,
+    FILE_RETRIES,
+    GIT_PATH,
+    INTEGRITY_FILE,
+    MANIFEST_FILE,
     PATCH_DOMAIN,
     PATCH_PATH_PREFIX,
     PATCH_PATH_SUFFIX,
+    PRESTAGE_CONCURRENCY,
+    PREVIOUS_SUFFIX,
+    RAW_MEDIA_TYPE,
+    SHA_INDEX_FILE,
+    STAGING_SUFFIX,
     STRING_FILE,
+    TARBALL_PATH,
+    TRACE_HISTORY,
     TRANSLATIONS_PATH,
+    TREES_PATH,
+    VERIFY_REPAIRED,
 )
-from .exceptions import RateLimitException
+from .exceptions import PatchError, RateLimitException
+from .fs import AsyncFileSystem, move_to_trash, read_file, write_file
+from .github import TIMEOUT, GitHubClient, RequestBudget
+from .installindex import scan_tree, tree_matches, trim_pull
+from .integrity import find_damaged, hash_tree
+from .patch import BUILTIN_COMPONENTS_PATH, patch_component
+from .precompile import precompile
+from .stats import SyncStats
+from .wheels import read_requirements
 
-TIMEOUT = 10
+CHUNK_SIZE = 64 * 1024
+# Number of CHUNK_SIZE chunks buffered between the download and tar extraction
+TARBALL_QUEUE_SIZE = 16
 
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+T = TypeVar("T")
+
 HEADERS = {"Content-type": "application/json; charset=UTF-8"}
 
 
@@ -54,6 +104,9 @@ class PRCustomComponentApiClient:
         session: aiohttp.ClientSession,
         pull_url: yarl.URL,
         config_path: str = "/config",
+        blob_store: Optional[BlobStore] = None,
+        github: Optional[GitHubClient] = None,
+        file_system: Optional[AsyncFileSystem] = None,
     ) -> None:
         """Initialize API client.
 
@@ -62,6 +115,11 @@ class PRCustomComponentApiClient:
             pull_url (yarl.URL): URL of pull request, e.g.,
                 https://github.com/home-assistant/core/pull/46558
             config_path (str): base path for config, e.g., /config
+            blob_store (Optional[BlobStore]): Shared store of downloaded blobs
+            github (Optional[GitHubClient]): Shared GitHub client, a private one is
+                created if not provided
+            file_system (Optional[AsyncFileSystem]): Filesystem used for disk
+                operations, a private one is created if not provided
 
         """
         self._pull_url: yarl.URL = pull_url
@@ -76,12 +134,38 @@ class PRCustomComponentApiClient:
         self._headers: Dict[str, str] = {}
         self._auto_update: bool = False
         self._pull_number: int = 0
+        self._download_mode: str = DEFAULT_DOWNLOAD_MODE
+        self._concurrency: int = DEFAULT_CONCURRENCY
+        self._max_bytes_in_flight: int = DEFAULT_MAX_BYTES_IN_FLIGHT
+        self._github: GitHubClient = (
+            github if github is not None else GitHubClient(session)
+        )
+        self._blob_store: Optional[BlobStore] = blob_store
+        self._fs: AsyncFileSystem = (
+            file_system if file_system is not None else AsyncFileSystem()
+        )
+        self._budget: Optional[RequestBudget] = None
+        self._stats: SyncStats = SyncStats()
+        self._history: Deque[SyncStats] = deque(maxlen=TRACE_HISTORY)
+        # Syncs of an entry run one at a time since they share staging and state
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._pull_json: dict = {}
+        # Head sha of the update downloaded into staging but not installed
+        self._staged_sha: str = ""
+        self._low_priority: bool = False
+        # Incremented whenever the installed files change
+        self._installs: int = 0
 
     @property
     def name(self) -> str:
         """Return the component name."""
         return self._component_name
 
+    @property
+    def pull_url(self) -> yarl.URL:
+        """Return the pull request url."""
+        return self._pull_url
+
     @property
     def pull_number(self) -> int:
         """Return the pull number."""
@@ -102,11 +186,68 @@ class PRCustomComponentApiClient:
         """Return the whether an update is available."""
         return self._update_available
 
+    @property
+    def installs(self) -> int:
+        """Return a counter incremented whenever the installed files change."""
+        return self._installs
+
+    @property
+    def update_staged(self) -> bool:
+        """Return whether the latest Pull Request version is staged for install."""
+        return bool(self._staged_sha) and self._staged_sha == self._pull_json.get(
+            "head", {}
+        ).get("sha")
+
     @property
     def auto_update(self) -> bool:
         """Return the whether an to autoupdate when available."""
         return self._auto_update
 
+    @auto_update.setter
+    def auto_update(self, value: bool) -> None:
+        """Set whether to autoupdate when available."""
+        self._auto_update = value
+
+    @property
+    def last_stats(self) -> Optional[SyncStats]:
+        """Return statistics of the last update."""
+        return self._history[-1] if self._history else None
+
+    @property
+    def history(self) -> List[SyncStats]:
+        """Return statistics and timelines of the last TRACE_HISTORY updates."""
+        return list(self._history)
+
+    @property
+    def download_mode(self) -> str:
+        """Return the download mode."""
+        return self._download_mode
+
+    @download_mode.setter
+    def download_mode(self, value: str) -> None:
+        """Set the download mode."""
+        self._download_mode = value
+
+    @property
+    def concurrency(self) -> int:
+        """Return the maximum concurrent requests of a download."""
+        return self._concurrency
+
+    @concurrency.setter
+    def concurrency(self, value: int) -> None:
+        """Set the maximum concurrent requests of a download."""
+        self._concurrency = value
+
+    @property
+    def max_bytes_in_flight(self) -> int:
+        """Return the maximum bytes fetched but not yet written."""
+        return self._max_bytes_in_flight
+
+    @max_bytes_in_flight.setter
+    def max_bytes_in_flight(self, value: int) -> None:
+        """Set the maximum bytes fetched but not yet written."""
+        self._max_bytes_in_flight = value
+
     def set_token(self, token: str = "") -> None:
         """Set auth token for GitHub to avoid rate limits.
 
@@ -117,12 +258,181 @@ class PRCustomComponentApiClient:
             self._token = token
             self._headers["Authorization"] = f"token {self._token}"
 
-    async def async_update_data(self, download: bool = False) -> dict:
-        """Update custom component."""
-        pull_json = await self.async_get_pull_data()
+    async def async_update_data(
+        self, download: bool = False, pull_json: Optional[dict] = None
+    ) -> dict:
+        """Update custom component.
+
+        Requests, bytes and files used and a timeline of the steps taken are
+        recorded in last_stats. A download installs the staged update instead if
+        it is for the same version.
+
+        Args:
+            download (bool): Whether to download the component even if installed
+            pull_json (Optional[dict]): Pull data already polled, e.g., by the
+                batched poller; fetched from the REST API if not provided
+
+        Returns:
+            dict: Pull data
+        """
+        return await self._async_sync(self._async_update_data, download, pull_json)
+
+    async def async_prestage(self) -> bool:
+        """Download the latest polled version into staging without installing it.
+
+        The download runs one request at a time so it stays in the background of
+        other work. The staged update is installed by async_install_staged or the
+        next download of the same version without using the network.
+
+        Returns:
+            bool: Whether the latest version is staged
+        """
+        return await self._async_sync(self._async_prestage)
+
+    async def async_install_staged(self) -> bool:
+        """Install the staged update without using the network.
+
+        Returns:
+            bool: Whether the staged update was installed
+        """
+        async with self._lock:
+            if not self.update_staged:
+                return False
+            return await self._async_install_staged()
+
+    async def async_restore(self, record: Dict[str, Any]) -> bool:
+        """Restore the state of a previous run from its install record.
+
+        The installed files are only compared by size and mtime with one scandir
+        pass, so restoring costs no requests and opens no files.
+
+        Args:
+            record (Dict[str, Any]): Record returned by async_get_install_record
+
+        Returns:
+            bool: Whether the installed component matches the record and the
+                state was restored
+        """
+        pull_json = record.get("pull")
+        files = record.get("files")
+        if not isinstance(pull_json, dict) or not isinstance(files, dict) or not files:
+            return False
+        async with self._lock:
+            try:
+                if self._load_pull(pull_json) is None:
+                    return False
+            except (KeyError, TypeError, AttributeError) as ex:
+                _LOGGER.debug(
+                    "Invalid install record: %s",
+                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+                )
+                return False
+            if not await self._async_run(tree_matches, self._component_path(), files):
+                _LOGGER.debug("%s changed since it was recorded", self._component_name)
+                return False
+        _LOGGER.debug(
+            "Restored %s at %s without a request",
+            self._component_name,
+            record.get("commit"),
+        )
+        return True
+
+    async def async_get_install_record(self) -> Optional[Dict[str, Any]]:
+        """Return a record of the installed component for async_restore.
+
+        The record holds the pull data the installed version was synced from,
+        which may be older than the latest polled, the installed commit and the
+        blob sha, size and mtime of each installed file.
+
+        Returns:
+            Optional[Dict[str, Any]]: Record or None if the installed files do not
+                match their integrity record
+        """
+        if not self._component_name:
+            return None
+        component_path: str = self._component_path()
+        integrity: dict = await self._async_load_integrity(component_path)
+        shas: Dict[str, str] = integrity.get("files", {})
+        pull_json: Optional[dict] = integrity.get("pull")
+        if not isinstance(pull_json, dict):
+            return None
+        try:
+            scanned: Dict[str, List[int]] = await self._async_run(
+                scan_tree, component_path
+            )
+        except OSError:
+            return None
+        if not shas or scanned.keys() != shas.keys():
+            return None
+        return {
+            "commit": integrity.get("commit", ""),
+            "pull": pull_json,
+            "files": {name: [shas[name], *scanned[name]] for name in sorted(shas)},
+        }
+
+    async def async_verify(self, repair: bool = True) -> Dict[str, str]:
+        """Verify the installed files against the blob shas recorded at install.
+
+        Only local files are read, so verifying costs no requests. Damaged files
+        are restored from the blob store or downloaded at the installed commit.
+
+        Args:
+            repair (bool): Whether to restore damaged files
+
+        Returns:
+            Dict[str, str]: VERIFY_MISSING, VERIFY_MODIFIED or VERIFY_REPAIRED
+                keyed by relative path of each damaged file
+        """
+        return await self._async_sync(self._async_verify, repair)
+
+    async def _async_sync(self, func: Callable[..., Awaitable[T]], *args: Any) -> T:
+        """Run a sync under the lock, recording its statistics in history."""
+        async with self._lock:
+            self._stats = SyncStats()
+            self._budget = RequestBudget(stats=self._stats)
+            try:
+                return await func(*args)
+            finally:
+                self._budget = None
+                self._stats.finish(self._github.remaining)
+                self._history.append(self._stats)
+
+    async def _async_update_data(
+        self, download: bool, pull_json: Optional[dict]
+    ) -> dict:
+        """Update custom component and return the pull data."""
+        if pull_json is None:
+            pull_json = await self.async_get_pull_data()
         if not pull_json or pull_json.get("message") == "Not Found":
             _LOGGER.debug("No pull data found")
             return {}
+        url: Optional[yarl.URL] = self._load_pull(pull_json)
+        if url is None:
+            return {}
+        component_path: str = self._component_path()
+        installed: bool = await self._fs.async_isdir(component_path)
+        if not installed:
+            _LOGGER.debug("%s not detected in config directory", self._component_name)
+        if download or not installed:
+            staging, _previous = self._staged_paths(component_path)
+            if self.update_staged and await self._fs.async_isdir(staging):
+                _LOGGER.debug("Installing staged %s", self._component_name)
+                await self._async_install_staged()
+                return pull_json
+            self._staged_sha = ""
+            if await self._async_stage(url):
+                await self._async_install_staged()
+            if self._blob_store is not None:
+                await self._async_run(self._blob_store.evict)
+        return pull_json
+
+    def _load_pull(self, pull_json: dict) -> Optional[yarl.URL]:
+        """Load the component details of pull data.
+
+        Returns:
+            Optional[yarl.URL]: Contents API url of the component at the head
+                branch or None if the Pull Request has no integration label
+        """
         component_name: str = ""
         for label in pull_json["labels"]:
             if label["name"].startswith("integration: "):
@@ -130,7 +440,7 @@ class PRCustomComponentApiClient:
                 break
         if not component_name:
             _LOGGER.error("Unable to find integration in pull request")
-            return {}
+            return None
         else:
             _LOGGER.debug("Found %s integration", component_name)
         branch: str = pull_json["head"]["ref"]
@@ -155,35 +465,365 @@ class PRCustomComponentApiClient:
             .replace(":", ""),
         }
         self._component_name = component_name
-        component_path: str = os.path.join(
+        self._pull_json = pull_json
+        return url
+
+    async def _async_prestage(self) -> bool:
+        """Stage the latest polled version at low priority."""
+        if not self._pull_json or not self._component_name:
+            return False
+        if self.update_staged:
+            return True
+        self._staged_sha = ""
+        branch: str = self._pull_json["head"]["ref"]
+        url: yarl.URL = yarl.URL(
+            self._pull_json["head"]["repo"]["contents_url"].replace(
+                "{+path}", self._base_path
+            )
+        ).with_query({"ref": branch})
+        _LOGGER.debug("Staging %s update in the background", self._component_name)
+        self._low_priority = True
+        try:
+            staged: bool = await self._async_stage(url)
+        finally:
+            self._low_priority = False
+        if self._blob_store is not None:
+            await self._async_run(self._blob_store.evict)
+        return staged
+
+    async def _async_stage(self, url: yarl.URL) -> bool:
+        """Download the latest polled version into staging.
+
+        Args:
+            url (yarl.URL): Contents API url of the component at the head branch
+
+        Returns:
+            bool: Whether the version was staged; staging is removed otherwise
+        """
+        component_path: str = self._component_path()
+        staging, _previous = self._staged_paths(component_path)
+        head_sha: str = self._pull_json["head"]["sha"]
+        repo_url: yarl.URL = yarl.URL(self._pull_json["head"]["repo"]["url"])
+        try:
+            await self._fs.async_delete(staging)
+            await self._async_run(self._prepare_staging, component_path, staging)
+        except OSError as ex:
+            _LOGGER.error(
+                "Unable to stage %s: %s",
+                self._component_name,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        self._budget = self._github.create_budget(self._stats)
+        result: bool = False
+        try:
+            if self._download_mode == DOWNLOAD_MODE_TARBALL:
+                result = await self.async_download_tarball(
+                    repo_url / TARBALL_PATH / head_sha, staging
+                )
+            elif self._download_mode == DOWNLOAD_MODE_TREES:
+                result = await self.async_sync_tree(repo_url, head_sha, staging)
+            elif self._download_mode == DOWNLOAD_MODE_PATCH:
+                result = await self.async_install_patch(staging)
+                if not result:
+                    _LOGGER.info(
+                        "Unable to patch built-in %s, downloading instead",
+                        self._component_name,
+                    )
+                    result = await self.async_download(str(url), staging)
+            else:
+                result = await self.async_download(str(url), staging)
+            if result:
+                result = await self._async_precompile(staging, component_path)
+            if result:
+                await self._async_save_integrity(staging, url, head_sha)
+        finally:
+            _LOGGER.debug("Download used %s requests", self._budget.spent)
+            self._budget = RequestBudget(stats=self._stats)
+            if not result:
+                await self._fs.async_delete(staging)
+        if result:
+            self._staged_sha = head_sha
+        return result
+
+    async def _async_verify(self, repair: bool) -> Dict[str, str]:
+        """Verify and optionally repair the installed component."""
+        if not self._component_name:
+            _LOGGER.debug("Component name not initialized")
+            return {}
+        component_path: str = self._component_path()
+        integrity: dict = await self._async_load_integrity(component_path)
+        files: Dict[str, str] = integrity.get("files", {})
+        if not files:
+            _LOGGER.debug("No integrity record for %s", component_path)
+            return {}
+        with self._stats.span("verify", component_path):
+            damaged: Dict[str, str] = await self._async_run(
+                find_damaged, component_path, files
+            )
+        if not damaged:
+            return {}
+        _LOGGER.warning(
+            "%s has %s damaged files: %s",
+            component_path,
+            len(damaged),
+            ", ".join(sorted(damaged)),
+        )
+        if not repair:
+            return damaged
+        repaired: Set[str] = await self._async_repair(
+            component_path, integrity, list(damaged)
+        )
+        _LOGGER.info("Repaired %s of %s files", len(repaired), len(damaged))
+        self._installs += 1
+        return {
+            name: VERIFY_REPAIRED if name in repaired else status
+            for name, status in damaged.items()
+        }
+
+    async def _async_repair(
+        self, component_path: str, integrity: dict, names: List[str]
+    ) -> Set[str]:
+        """Restore damaged files of the installed component.
+
+        Intact blobs are installed from the blob store; the rest are downloaded
+        from the commit recorded at install.
+
+        Args:
+            component_path (str): Path of the installed component
+            integrity (dict): Integrity record of the installed component
+            names (List[str]): Relative paths of the damaged files
+
+        Returns:
+            Set[str]: Relative paths of the files now matching the record
+        """
+        files: Dict[str, str] = integrity["files"]
+        url: yarl.URL = yarl.URL(integrity["url"])
+        if self._blob_store is not None:
+            # An installed file may be a hardlink of a blob damaged along with it
+            for name in names:
+                await self._async_run(self._blob_store.verify, files[name])
+        english: str = TRANSLATIONS_PATH + ENGLISH_JSON
+        # en.json is usually generated from strings.json rather than downloaded
+        generated: bool = english in names and STRING_FILE in files
+        jobs: List[DownloadJob] = [
+            DownloadJob(
+                name,
+                str((url / name).with_query({"ref": integrity["commit"]})),
+                # The manifest is rewritten so its remote sha is not recorded
+                "" if name == MANIFEST_FILE else files[name],
+            )
+            for name in names
+            if not (generated and name == english)
+        ]
+        self._budget = self._github.create_budget(self._stats)
+        try:
+            pipeline = self._create_pipeline(component_path)
+            await pipeline.async_run(jobs=jobs)
+        finally:
+            _LOGGER.debug("Repair used %s requests", self._budget.spent)
+            self._budget = RequestBudget(stats=self._stats)
+        self._stats.files_written += len(pipeline.completed)
+        if generated:
+            await self.async_create_translations(force=True, path=component_path)
+        if MANIFEST_FILE in names and isinstance(integrity.get("manifest"), dict):
+            # The download was rewritten for the latest polled version instead
+            await self._async_rewrite_manifest(
+                os.path.join(component_path, MANIFEST_FILE), integrity["manifest"]
+            )
+        damaged: Dict[str, str] = await self._async_run(
+            find_damaged, component_path, {name: files[name] for name in names}
+        )
+        return set(names) - set(damaged)
+
+    async def _async_load_integrity(self, path: str) -> dict:
+        """Load the integrity record of the component at path."""
+        index_path: str = os.path.join(path, INTEGRITY_FILE)
+        try:
+            contents: Optional[bytes] = await self._fs.async_read(index_path)
+            if contents is not None:
+                integrity = json.loads(contents)
+                if isinstance(integrity, dict):
+                    return integrity
+        except (OSError, JSONDecodeError, TypeError) as ex:
+            _LOGGER.debug(
+                "Error reading file %s: %s",
+                index_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+        return {}
+
+    async def _async_save_integrity(
+        self, path: str, url: yarl.URL, commit: str
+    ) -> bool:
+        """Record the commit and local blob sha of each file under path.
+
+        Args:
+            path (str): Directory of the component, e.g., the staging directory
+            url (yarl.URL): Contents API url of the component
+            commit (str): Commit sha the component was downloaded at
+
+        Returns:
+            bool: Whether the record was saved
+        """
+        index_path: str = os.path.join(path, INTEGRITY_FILE)
+        with self._stats.span("hash", path):
+            files: Dict[str, str] = await self._async_run(hash_tree, path)
+        integrity: dict = {
+            "commit": commit,
+            "url": str(url.with_query(None)),
+            "files": files,
+            # Fields written into manifest.json so a repair writes the same file
+            "manifest": dict(self._manifest),
+            # Pull data of this version, restored with it after a rollback
+            "pull": trim_pull(self._pull_json),
+        }
+        try:
+            await self._fs.async_write(
+                index_path, json.dumps(integrity).encode("utf-8")
+            )
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error saving file %s: %s",
+                index_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        return True
+
+    async def _async_precompile(self, staging: str, component_path: str) -> bool:
+        """Compile the staged python files so startup loads ready bytecode.
+
+        Args:
+            staging (str): Staging directory holding the downloaded component
+            component_path (str): Path the staging directory is installed to
+
+        Returns:
+            bool: Whether every file compiled; a syntax error fails the sync
+        """
+        with self._stats.span("compile", staging):
+            errors: Dict[str, str] = await self._async_run(
+                precompile, staging, component_path
+            )
+        for name, error in errors.items():
+            _LOGGER.error(
+                "Not installing %s: %s does not compile: %s",
+                self._component_name,
+                name,
+                error,
+            )
+        return not errors
+
+    async def _async_install_staged(self) -> bool:
+        """Swap the staged component in, keeping the installed one as previous."""
+        component_path: str = self._component_path()
+        staging, previous = self._staged_paths(component_path)
+        self._staged_sha = ""
+        result: bool = await self._async_run(
+            self._swap_in, component_path, staging, previous
+        )
+        if not result:
+            await self._fs.async_delete(staging)
+            return False
+        self._fs.schedule_cleanup(previous)
+        self._update_available = ""
+        self._installs += 1
+        return True
+
+    def _component_path(self) -> str:
+        """Return the path of the installed component."""
+        return os.path.join(
             self._config_path, CUSTOM_COMPONENT_PATH, self._component_name
         )
-        if not os.path.isdir(component_path):
-            _LOGGER.debug("%s not detected in config directory", self._component_name)
-        if download or not os.path.isdir(component_path):
-            if await self.async_download(
-                str(url),
-                component_path,
-            ):
-                self._update_available = ""
-        return pull_json
 
     async def async_get_pull_data(self) -> dict:
         """Get pull data from the API.
 
         e.g., https://api.github.com/repos/home-assistant/core/pulls/46558
         """
-        url = self._pull_url.with_path(
+        url = self._github.api_url.with_path(
             API_PATH_PREFIX + self._pull_url.path.replace("pull", "pulls")
-        ).with_host(API_DOMAIN)
+        )
         return await self.api_wrapper("get", url)
 
-    async def async_get_patch_data(self) -> dict:
-        """Get data from the API."""
+    async def async_get_patch_data(self) -> str:
+        """Get the patch of the pull request.
+
+        e.g., https://patch-diff.githubusercontent.com/raw/home-assistant/core/pull/46558.patch
+
+        Returns:
+            str: Patch text or an empty string on failure
+        """
         url = self._pull_url.with_path(
             PATCH_PATH_PREFIX + self._pull_url.path + PATCH_PATH_SUFFIX
         ).with_host(PATCH_DOMAIN)
-        return await self.api_wrapper("get", url)
+        try:
+            with self._stats.span("fetch", str(url)) as span:
+                async with async_timeout.timeout(TIMEOUT):
+                    response = await self._session.get(url)
+                    span.status = response.status
+                    if response.status != HTTPStatus.OK:
+                        _LOGGER.debug(
+                            "Unable to get patch %s: status %s", url, response.status
+                        )
+                        return ""
+                    text: str = await response.text()
+                    span.bytes = len(text)
+                    self._stats.record_request(span.bytes)
+                    return text
+        except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+            _LOGGER.debug(
+                "Error fetching patch %s: %s",
+                url,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+        return ""
+
+    async def async_install_patch(self, path: str) -> bool:
+        """Install the component by applying the pull request patch to the built-in one.
+
+        Only the patch is downloaded. The component shipped with the running Home
+        Assistant is copied to path with the patch applied, so this fails if the
+        installed version differs from the pull request base where it changed.
+
+        Args:
+            path (str): Local path to save to
+
+        Returns:
+            bool: Whether installed successful
+        """
+        patch: str = await self.async_get_patch_data()
+        if not patch:
+            return False
+        try:
+            files, deleted = await self._async_run(
+                patch_component,
+                patch,
+                f"{self._base_path}/",
+                os.path.join(BUILTIN_COMPONENTS_PATH, self._component_name),
+            )
+        except (OSError, PatchError) as ex:
+            _LOGGER.debug(
+                "Unable to apply patch: %s",
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        if not files:
+            _LOGGER.debug("Patch has no files for %s", self._component_name)
+            return False
+        try:
+            await self._async_run(self._write_files, files, deleted, path)
+        except (OSError, JSONDecodeError) as ex:
+            _LOGGER.debug(
+                "Error saving patched files to %s: %s",
+                path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        _LOGGER.debug("Patched %s files into %s", len(files), path)
+        self._stats.files_written += len(files)
+        await self.async_create_translations(force=True, path=path)
+        return True
 
     async def async_download(self, url: str, path: str) -> bool:
         """Download and save files to path.
@@ -199,59 +839,794 @@ class PRCustomComponentApiClient:
             _LOGGER.debug("Path not specified")
             return False
         _LOGGER.debug("Downloading url %s to %s", url, path)
-        result = await self.api_wrapper("get", url)
-        if not result or (
-            isinstance(result, dict) and result.get("message") == "Not Found"
-        ):
+        if await self._fs.async_isfile(path):
+            _LOGGER.error("Trying to save directory into an existing file %s", path)
             return False
-        if not result:
-            _LOGGER.debug("%s is empty", url)
-            return True
-        if isinstance(result, list):
-            if os.path.isfile(path):
-                _LOGGER.error("Trying to save directory into an existing file %s", path)
-                return False
-            if not os.path.isdir(path):
-                _LOGGER.debug("Creating new directory %s", path)
-                os.mkdir(path)
-            _LOGGER.debug("Processing directory")
-            tasks = []
+        pipeline = self._create_pipeline(path, {str(url): path})
+        result: bool = await pipeline.async_run(listings=[str(url)])
+        self._stats.files_written += len(pipeline.completed)
+        _LOGGER.debug(
+            "Downloaded %s files to %s; %s failed",
+            len(pipeline.completed),
+            path,
+            len(pipeline.failed) + len(pipeline.failed_listings),
+        )
+        if result:
+            await self.async_create_translations(path=path)
+        return result
+
+    def _create_pipeline(
+        self, path: str, listings: Optional[Dict[str, str]] = None
+    ) -> DownloadPipeline:
+        """Return a download pipeline saving files under path.
+
+        Args:
+            path (str): Local path to save to
+            listings (Optional[Dict[str, str]]): Local directory of each Contents
+                API directory url that will be listed
+
+        """
+        local_directories: Dict[str, str] = dict(listings or {})
+
+        async def list_contents(
+            url: str,
+        ) -> Optional[Tuple[List[DownloadJob], List[str]]]:
+            """List a directory with the Contents API."""
+            with self._stats.span("listing", url):
+                result = await self.api_wrapper("get", url)
+            if not isinstance(result, list):
+                return None
+            await self._fs.async_makedirs(local_directories.get(url, path))
+            jobs: List[DownloadJob] = []
+            directories: List[str] = []
             for file_json in result:
-                file_path: str = os.path.join(path, file_json["name"])
-                if file_json["type"] == "dir" and not os.path.isdir(file_path):
-                    _LOGGER.debug("Creating new sub directory %s", file_path)
-                    os.mkdir(file_path)
-                tasks.append(self.async_download(file_json["url"], path))
-            await asyncio.gather(*tasks)
-            await self.async_create_translations()
-            return True
-        if isinstance(result, dict):
-            path.split(os.sep)
-            file_name: str = result["name"]
-            file_path = result["path"].replace(self._base_path, "")
-            full_path: str = os.path.join(path, file_path.lstrip(os.sep))
-            contents = base64.b64decode(result["content"].encode("utf-8"))
-            _LOGGER.debug("Saving %s size: %s KB", full_path, result["size"] / 1000)
-            if file_name == "manifest.json":
-                manifest = json.loads(contents)
-                manifest.update(self._manifest)
-                contents = json.dumps(manifest).encode("utf-8")
+                file_path: str = (
+                    file_json["path"].replace(self._base_path, "").lstrip(os.sep)
+                )
+                if file_json["type"] == "dir":
+                    local_directories[file_json["url"]] = os.path.join(path, file_path)
+                    directories.append(file_json["url"])
+                elif file_json["type"] == "file":
+                    jobs.append(
+                        DownloadJob(
+                            file_path,
+                            file_json["url"],
+                            file_json.get("sha", ""),
+                            file_json.get("size", 0),
+                        )
+                    )
+            return jobs, directories
+
+        async def install(job: DownloadJob) -> bool:
+            """Install a file from the blob store."""
+            return await self._async_install_blob(job.sha, os.path.join(path, job.path))
+
+        async def stream(job: DownloadJob) -> Optional[bool]:
+            """Stream a file straight to disk."""
+            if job.path == MANIFEST_FILE:
+                # Small and rewritten before saving so fetched in memory
+                return None
+            return await self._async_stream_file(job, os.path.join(path, job.path))
+
+        async def fetch(job: DownloadJob) -> Optional[dict]:
+            """Fetch a Contents or Blobs API response."""
+            with self._stats.span("fetch", job.path):
+                result = await self.api_wrapper("get", job.url)
+            if not isinstance(result, dict) or "content" not in result:
+                _LOGGER.debug("Unable to download %s", job.path)
+                return None
+            return result
+
+        def decode(job: DownloadJob, result: dict) -> bytes:
+            """Decode the base64 content of a response."""
+            with self._stats.span("decode", job.path) as span:
+                contents: bytes = base64.b64decode(result["content"].encode("utf-8"))
+                span.bytes = len(contents)
+            return contents
+
+        async def write(job: DownloadJob, contents: bytes) -> bool:
+            """Save a file and add it to the blob store."""
+            full_path: str = os.path.join(path, job.path)
+            _LOGGER.debug("Saving %s size: %s KB", full_path, len(contents) / 1000)
+            await self._async_store_blob(job.sha, contents)
+            with self._stats.span("write", job.path) as span:
+                span.bytes = len(contents)
+                return await self._async_save_file(full_path, contents)
+
+        return DownloadPipeline(
+            list_contents,
+            fetch,
+            decode,
+            write,
+            installer=install,
+            concurrency=PRESTAGE_CONCURRENCY
+            if self._low_priority
+            else self._concurrency,
+            max_bytes=self._max_bytes_in_flight,
+            retries=FILE_RETRIES,
+            streamer=stream,
+        )
+
+    async def _async_stream_file(self, job: DownloadJob, full_path: str) -> bool:
+        """Stream a file to full_path and add it to the blob store.
+
+        The file is requested with the raw media type so it is neither base64
+        encoded nor limited to 1 MB like Contents API JSON, and its git blob sha is
+        computed while it is written.
+
+        Args:
+            job (DownloadJob): File to download; its url may be a Contents or Blobs
+                API url
+            full_path (str): Local path to save to
+
+        Returns:
+            bool: Whether the file was saved and matches the expected sha
+        """
+
+        async def sink(response: aiohttp.ClientResponse) -> Tuple[str, int]:
+            span.status = response.status
+            size: int = job.size
+            if not size and not response.headers.get(aiohttp.hdrs.CONTENT_ENCODING):
+                size = int(response.headers.get(aiohttp.hdrs.CONTENT_LENGTH) or 0)
+            sha = hashlib.sha1(f"blob {size}\0".encode())  # nosec
+
+            async def chunks() -> AsyncIterator[bytes]:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    sha.update(chunk)
+                    yield chunk
+
+            written: int = await self._fs.async_write_stream(full_path, chunks())
+            span.bytes = written
+            if written != size:
+                # The size was not known up front so hash the written file
+                return await self._async_run(git_blob_sha_file, full_path), written
+            return sha.hexdigest(), written
+
+        try:
+            with self._stats.span("fetch", job.path) as span:
+                sha, size = await self._github.async_stream(
+                    job.url,
+                    sink,
+                    {**self._headers, "Accept": RAW_MEDIA_TYPE},
+                    self._budget,
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError, ValueError) as ex:
+            _LOGGER.debug(
+                "Error downloading %s: %s",
+                job.path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        if job.sha and sha != job.sha:
+            _LOGGER.debug("%s does not match sha %s; discarding", full_path, job.sha)
+            return False
+        _LOGGER.debug("Saved %s size: %s KB", full_path, size / 1000)
+        if self._blob_store is not None:
+            await self._async_run(self._blob_store.add_file, sha, full_path)
+        return True
+
+    async def async_get_component_tree(
+        self, repo_url: yarl.URL, sha: str
+    ) -> Optional[List[dict]]:
+        """Return the blob entries of the component subtree from the Git Trees API.
+
+        The component tree is found by walking the path from the commit's root tree
+        so the recursive listing only covers the component. Trees are addressed by
+        sha so unchanged levels are answered from the conditional request cache.
+
+        Args:
+            repo_url (yarl.URL): API url of the head repository, e.g.,
+                https://api.github.com/repos/alandtse/home-assistant
+            sha (str): Commit sha of the Pull Request head
+
+        Returns:
+            Optional[List[dict]]: Blob entries with paths relative to the component,
+                None if the tree could not be retrieved
+        """
+        tree_sha: str = sha
+        for segment in self._base_path.split("/"):
+            tree = await self.api_wrapper(
+                "get", repo_url / GIT_PATH / TREES_PATH / tree_sha
+            )
+            if not isinstance(tree, dict) or not tree.get("tree"):
+                _LOGGER.debug("Unable to retrieve tree %s", tree_sha)
+                return None
+            entry = next(
+                (
+                    entry
+                    for entry in tree["tree"]
+                    if entry["path"] == segment and entry["type"] == "tree"
+                ),
+                None,
+            )
+            if entry is None:
+                _LOGGER.error("%s not found in tree %s", segment, tree_sha)
+                return None
+            tree_sha = entry["sha"]
+        tree = await self.api_wrapper(
+            "get",
+            (repo_url / GIT_PATH / TREES_PATH / tree_sha).with_query(
+                {"recursive": "1"}
+            ),
+        )
+        if not isinstance(tree, dict) or "tree" not in tree:
+            _LOGGER.debug("Unable to retrieve tree %s", tree_sha)
+            return None
+        if tree.get("truncated"):
+            _LOGGER.error("Tree for %s is truncated", self._base_path)
+            return None
+        return [entry for entry in tree["tree"] if entry["type"] == "blob"]
+
+    async def async_sync_tree(self, repo_url: yarl.URL, sha: str, path: str) -> bool:
+        """Synchronize path with the component tree of a commit.
+
+        Only blobs whose sha differs from the recorded sha are downloaded and files
+        that were removed from the tree are deleted.
+
+        Args:
+            repo_url (yarl.URL): API url of the head repository
+            sha (str): Commit sha of the Pull Request head
+            path (str): Local path to save to
+
+        Returns:
+            bool: Whether sync was successful
+        """
+        if not path:
+            _LOGGER.debug("Path not specified")
+            return False
+        with self._stats.span("listing", self._base_path):
+            entries = await self.async_get_component_tree(repo_url, sha)
+        if entries is None:
+            return False
+        if await self._fs.async_isfile(path):
+            _LOGGER.error("Trying to save directory into an existing file %s", path)
+            return False
+        index: Dict[str, str] = await self._async_load_sha_index(path)
+        remote: Dict[str, dict] = {entry["path"]: entry for entry in entries}
+
+        def scan() -> List[str]:
+            os.makedirs(path, exist_ok=True)
+            return [
+                file_path
+                for file_path in remote
+                if os.path.isfile(os.path.join(path, file_path))
+            ]
+
+        existing: Set[str] = set(await self._async_run(scan))
+        changed: List[dict] = [
+            entry
+            for file_path, entry in remote.items()
+            if index.get(file_path) != entry["sha"] or file_path not in existing
+        ]
+        removed: List[str] = [
+            file_path for file_path in index if file_path not in remote
+        ]
+        _LOGGER.debug(
+            "Syncing %s: %s changed, %s removed, %s unchanged",
+            path,
+            len(changed),
+            len(removed),
+            len(remote) - len(changed),
+        )
+        pipeline = self._create_pipeline(path)
+        result: bool = await pipeline.async_run(
+            jobs=[
+                DownloadJob(
+                    entry["path"], entry["url"], entry["sha"], entry.get("size", 0)
+                )
+                for entry in changed
+            ]
+        )
+        self._stats.files_written += len(pipeline.completed)
+        for job in pipeline.completed:
+            index[job.path] = job.sha
+        for job in pipeline.failed:
+            index.pop(job.path, None)
+        if MANIFEST_FILE in remote and all(
+            entry["path"] != MANIFEST_FILE for entry in changed
+        ):
+            # The kept manifest.json still has the version of its last download
+            await self._async_rewrite_manifest(os.path.join(path, MANIFEST_FILE))
+        await self._async_run(self._remove_files, path, removed)
+        for file_path in removed:
+            index.pop(file_path, None)
+        await self._async_save_sha_index(path, index)
+        await self.async_create_translations(
+            force=any(entry["path"] == STRING_FILE for entry in changed), path=path
+        )
+        return result
+
+    @staticmethod
+    def _remove_files(path: str, removed: List[str]) -> None:
+        """Remove files under path and directories left empty.
+
+        This is blocking and must be run in an executor.
+        """
+        for file_path in removed:
+            full_path: str = os.path.join(path, file_path)
+            _LOGGER.debug("Removing %s", full_path)
             try:
-                async with aiofiles.open(full_path, mode="wb") as localfile:
-                    await localfile.write(contents)
-            except (OSError, EOFError, TypeError, AttributeError) as ex:
+                if os.path.isfile(full_path):
+                    os.remove(full_path)
+                directory = os.path.dirname(full_path)
+                while directory != path and not os.listdir(directory):
+                    os.rmdir(directory)
+                    directory = os.path.dirname(directory)
+            except OSError as ex:
                 _LOGGER.debug(
-                    "Error saving file %s: %s",
+                    "Error removing file %s: %s",
                     full_path,
                     EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
                 )
+
+    async def _async_install_blob(self, sha: str, full_path: str) -> bool:
+        """Install blob sha from the blob store to full_path if it is stored."""
+        if self._blob_store is None or not sha:
+            return False
+        if os.path.basename(full_path) == MANIFEST_FILE:
+            contents: Optional[bytes] = await self._async_run(
+                self._blob_store.read, sha
+            )
+            if contents is None:
                 return False
+            installed: bool = await self._async_save_file(full_path, contents)
+        else:
+            installed = await self._async_run(self._blob_store.install, sha, full_path)
+        if installed:
+            _LOGGER.debug("Installed %s from blob store", full_path)
+        return installed
+
+    async def _async_store_blob(self, sha: str, contents: bytes) -> None:
+        """Add downloaded contents to the blob store."""
+        if self._blob_store is not None and sha:
+            await self._async_run(self._blob_store.add, sha, contents)
+
+    async def _async_run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run blocking func in the default executor."""
+        return await self._fs.async_run(func, *args)
+
+    async def _async_save_file(self, full_path: str, contents: bytes) -> bool:
+        """Save contents to full_path, rewriting manifest.json when needed.
+
+        An existing file is unlinked first since it may be a hardlink into the blob
+        store.
+        """
+        try:
+            if os.path.basename(full_path) == MANIFEST_FILE:
+                with self._stats.span("manifest", full_path):
+                    contents = self._update_manifest(contents)
+            await self._fs.async_write(full_path, contents)
+        except (OSError, EOFError, TypeError, AttributeError, JSONDecodeError) as ex:
+            _LOGGER.debug(
+                "Error saving file %s: %s",
+                full_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        return True
+
+    async def _async_rewrite_manifest(
+        self, full_path: str, manifest: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Rewrite an existing manifest.json.
+
+        Args:
+            full_path (str): Path of manifest.json
+            manifest (Optional[Dict[str, Any]]): Fields to write; those of the
+                current pull data if not provided
+
+        Returns:
+            bool: Whether the manifest was rewritten
+        """
+        try:
+            contents: Optional[bytes] = await self._fs.async_read(full_path)
+            if contents is None:
+                return False
+            await self._fs.async_write(
+                full_path, self._update_manifest(contents, manifest)
+            )
+        except (OSError, TypeError, AttributeError, JSONDecodeError) as ex:
+            _LOGGER.debug(
+                "Error rewriting file %s: %s",
+                full_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        return True
+
+    async def _async_load_sha_index(self, path: str) -> Dict[str, str]:
+        """Load the recorded blob sha of each installed file under path."""
+        index_path: str = os.path.join(path, SHA_INDEX_FILE)
+        try:
+            contents: Optional[bytes] = await self._fs.async_read(index_path)
+            if contents is not None:
+                return json.loads(contents)
+        except (OSError, JSONDecodeError, TypeError) as ex:
+            _LOGGER.debug(
+                "Error reading file %s: %s",
+                index_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+        return {}
+
+    async def _async_save_sha_index(self, path: str, index: Dict[str, str]) -> bool:
+        """Record the blob sha of each installed file under path."""
+        index_path: str = os.path.join(path, SHA_INDEX_FILE)
+        try:
+            await self._fs.async_write(index_path, json.dumps(index).encode("utf-8"))
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error saving file %s: %s",
+                index_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        return True
+
+    async def async_download_tarball(
+        self, url: Union[str, yarl.URL], path: str
+    ) -> bool:
+        """Download the repository tarball and extract the component to path.
+
+        The archive is streamed through tarfile in stream mode so only
+        TARBALL_QUEUE_SIZE chunks are held in memory and only one request is made
+        regardless of the number of files in the component.
+
+        Args:
+            url (Union[str, yarl.URL]): Tarball url, e.g.,
+                https://api.github.com/repos/alandtse/home-assistant/tarball/<sha>
+            path (str): Local path to save to
+
+        Returns:
+            bool: Whether saved successful
+        """
+        if not path:
+            _LOGGER.debug("Path not specified")
+            return False
+        _LOGGER.debug("Downloading tarball %s to %s", url, path)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=TARBALL_QUEUE_SIZE)
+        await self._github.async_acquire(self._budget, self._headers)
+        with self._stats.span("fetch", str(url)) as span:
+            try:
+                async with self._session.get(
+                    url,
+                    headers=self._headers,
+                    timeout=aiohttp.ClientTimeout(total=None, sock_read=TIMEOUT),
+                ) as response:
+                    self._github.update_rate_limit(response.headers)
+                    self._stats.record_request()
+                    span.status = response.status
+                    if response.status != HTTPStatus.OK:
+                        _LOGGER.error(
+                            "Error downloading tarball %s: %s", url, response.status
+                        )
+                        return False
+
+                    async def feed() -> None:
+                        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                            self._stats.bytes_received += len(chunk)
+                            span.bytes += len(chunk)
+                            await queue.put(chunk)
+                        await queue.put(b"")
+
+                    reader = _QueueReader(loop, queue)
+                    feeder = asyncio.ensure_future(feed())
+                    extractor = loop.run_in_executor(
+                        None,
+                        self._extract_tarball,
+                        reader,
+                        f"{self._base_path}/",
+                        path,
+                    )
+                    try:
+                        await asyncio.wait(
+                            [feeder, extractor], return_when=asyncio.FIRST_COMPLETED
+                        )
+                    except asyncio.CancelledError:
+                        feeder.cancel()
+                        reader.abort()
+                        raise
+                    if not feeder.done():
+                        # extraction stops once the component has been read
+                        feeder.cancel()
+                    elif feeder.exception() is not None:
+                        reader.abort()
+                        await asyncio.gather(extractor, return_exceptions=True)
+                        raise feeder.exception()
+                    count: int = await extractor
+            except (
+                aiohttp.ClientError,
+                asyncio.TimeoutError,
+                socket.gaierror,
+                JSONDecodeError,
+                OSError,
+                tarfile.TarError,
+            ) as ex:
+                _LOGGER.error(
+                    "Error extracting tarball %s: %s",
+                    url,
+                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+                )
+                return False
+        if not count:
+            _LOGGER.error("%s not found in tarball %s", self._base_path, url)
+            return False
+        _LOGGER.debug("Extracted %s entries to %s", count, path)
+        await self.async_create_translations(path=path)
+        return True
+
+    def _extract_tarball(self, fileobj: "_QueueReader", prefix: str, path: str) -> int:
+        """Extract members under prefix from a streamed tarball.
+
+        This is blocking and must be run in an executor.
+
+        Args:
+            fileobj (_QueueReader): Stream of the gzipped tarball
+            prefix (str): Repository path to extract, e.g.,
+                homeassistant/components/tesla/
+            path (str): Local path to save to
+
+        Returns:
+            int: Number of extracted entries
+        """
+        count: int = 0
+        root: str = os.path.abspath(path)
+        with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+            for member in tar:
+                # GitHub prefixes every member with <owner>-<repo>-<sha>/
+                name: str = member.name.partition("/")[2]
+                if not name.startswith(prefix):
+                    if count:
+                        # git archive groups a tree together so we are done
+                        break
+                    continue
+                full_path: str = os.path.abspath(
+                    os.path.join(root, name[len(prefix) :])
+                )
+                if full_path != root and not full_path.startswith(root + os.sep):
+                    _LOGGER.warning("Skipping unsafe tar member %s", member.name)
+                    continue
+                count += 1
+                if member.isdir():
+                    os.makedirs(full_path, exist_ok=True)
+                    continue
+                if not member.isfile():
+                    continue
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                source = tar.extractfile(member)
+                if source is None:
+                    continue
+                _LOGGER.debug("Saving %s size: %s KB", full_path, member.size / 1000)
+                if os.path.lexists(full_path):
+                    os.remove(full_path)
+                with source, open(full_path, "wb") as localfile:
+                    if os.path.basename(full_path) == MANIFEST_FILE:
+                        contents: bytes = source.read()
+                        with self._stats.span("manifest", full_path):
+                            updated: bytes = self._update_manifest(contents)
+                        localfile.write(updated)
+                        if self._blob_store is not None:
+                            self._blob_store.add(git_blob_sha(contents), contents)
+                        self._stats.files_written += 1
+                        continue
+                    sha = hashlib.sha1(f"blob {member.size}\0".encode())  # nosec
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                        sha.update(chunk)
+                        localfile.write(chunk)
+                if self._blob_store is not None:
+                    self._blob_store.add_file(sha.hexdigest(), full_path)
+                self._stats.files_written += 1
+        return count
+
+    def _write_files(
+        self, files: Dict[str, bytes], deleted: Iterable[str], path: str
+    ) -> None:
+        """Write files and remove deleted ones under path.
+
+        This is blocking and must be run in an executor.
+
+        Args:
+            files (Dict[str, bytes]): Contents keyed by path relative to path
+            deleted (Iterable[str]): Paths relative to path to remove
+            path (str): Local path to save to
+        """
+        for name in deleted:
+            full_path: str = os.path.join(path, name)
+            if os.path.lexists(full_path):
+                os.remove(full_path)
+        for name, contents in files.items():
+            full_path = os.path.join(path, name)
+            if self._blob_store is not None:
+                self._blob_store.add(git_blob_sha(contents), contents)
+            if os.path.basename(full_path) == MANIFEST_FILE:
+                contents = self._update_manifest(contents)
+            write_file(full_path, contents)
+
+    @staticmethod
+    def _staged_paths(component_path: str) -> Tuple[str, str]:
+        """Return the staging and previous paths of an installed component.
+
+        They are hidden siblings so Home Assistant never loads them and renames
+        between them stay on one filesystem.
+        """
+        parent, name = os.path.split(component_path)
+        return (
+            os.path.join(parent, f".{name}{STAGING_SUFFIX}"),
+            os.path.join(parent, f".{name}{PREVIOUS_SUFFIX}"),
+        )
+
+    @staticmethod
+    def _prepare_staging(component_path: str, staging: str) -> None:
+        """Start staging from a hardlinked copy of the installed component.
+
+        Writers unlink before writing, so changes to the copy never reach the
+        installed files. This is blocking and must be run in an executor.
+        """
+
+        def link(source: str, destination: str) -> None:
+            try:
+                os.link(source, destination)
+            except OSError:
+                shutil.copy2(source, destination)
+
+        move_to_trash(staging)
+        if os.path.isdir(component_path):
+            shutil.copytree(
+                component_path,
+                staging,
+                copy_function=link,
+                ignore=shutil.ignore_patterns("__pycache__"),
+            )
+        else:
+            os.makedirs(staging)
+
+    def _swap_in(self, component_path: str, staging: str, previous: str) -> bool:
+        """Replace the installed component with a verified staging directory.
+
+        The installed component is kept as previous for async_rollback. This is
+        blocking and must be run in an executor.
+
+        Returns:
+            bool: Whether the staging directory was installed
+        """
+        manifest_path: str = os.path.join(staging, MANIFEST_FILE)
+        try:
+            if not os.listdir(staging):
+                raise ValueError("no files were downloaded")
+            if os.path.isfile(manifest_path):
+                with open(manifest_path, "rb") as localfile:
+                    if not isinstance(json.loads(localfile.read()), dict):
+                        raise ValueError(f"invalid {MANIFEST_FILE}")
+        except (OSError, ValueError) as ex:
+            _LOGGER.error(
+                "Not installing incomplete %s: %s",
+                self._component_name,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        try:
+            move_to_trash(previous)
+            if os.path.isdir(component_path):
+                os.rename(component_path, previous)
+            os.rename(staging, component_path)
+        except OSError as ex:
+            _LOGGER.error(
+                "Error installing %s: %s",
+                component_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            if not os.path.isdir(component_path) and os.path.isdir(previous):
+                os.rename(previous, component_path)
+            return False
+        _LOGGER.debug("Installed %s; previous kept at %s", component_path, previous)
+        return True
+
+    async def async_get_requirements(self, staged: bool = False) -> List[str]:
+        """Return the requirements in the manifest of the component.
+
+        Args:
+            staged (bool): Whether to read the staged update instead of the
+                installed component
+
+        Returns:
+            List[str]: Pip requirement strings
+        """
+        if not self._component_name:
+            return []
+        component_path: str = self._component_path()
+        if staged:
+            component_path, _previous = self._staged_paths(component_path)
+        return await self._async_run(read_requirements, component_path)
+
+    async def async_rollback(self) -> bool:
+        """Swap the installed component with the one it replaced.
+
+        Rolling back twice restores the latest install. A staged update is
+        discarded and updated_at becomes that of the restored version.
+
+        Returns:
+            bool: Whether a previous component was restored
+        """
+        if not self._component_name:
+            _LOGGER.debug("Component name not initialized")
+            return False
+        component_path: str = os.path.join(
+            self._config_path, CUSTOM_COMPONENT_PATH, self._component_name
+        )
+        staging, previous = self._staged_paths(component_path)
+
+        def rollback() -> bool:
+            if not os.path.isdir(previous):
+                return False
+            move_to_trash(staging)
+            if os.path.isdir(component_path):
+                os.rename(component_path, staging)
+            os.rename(previous, component_path)
+            if os.path.isdir(staging):
+                os.rename(staging, previous)
             return True
-        return False
 
-    async def async_create_translations(self) -> bool:
+        # Staging is reused for the swap, so wait for any sync writing into it
+        async with self._lock:
+            try:
+                rolled_back: bool = await self._async_run(rollback)
+            except OSError as ex:
+                _LOGGER.error(
+                    "Error rolling back %s: %s",
+                    component_path,
+                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+                )
+                return False
+            finally:
+                # Any staged update was trashed or moved to previous
+                self._staged_sha = ""
+            if not rolled_back:
+                _LOGGER.warning("No previous %s to roll back to", self._component_name)
+                return False
+            self._installs += 1
+            integrity: dict = await self._async_load_integrity(component_path)
+            pull_json: Optional[dict] = integrity.get("pull")
+            if isinstance(pull_json, dict) and pull_json.get("updated_at"):
+                # Report the rolled back version so the next poll flags the update
+                self._updated_at = pull_json["updated_at"]
+                self._update_available = self._updated_at != self._pull_json.get(
+                    "updated_at"
+                )
+        _LOGGER.info("Rolled back %s", component_path)
+        return True
+
+    def _update_manifest(
+        self, contents: bytes, fields: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """Return manifest.json contents updated for the custom component.
+
+        Args:
+            contents (bytes): Contents of manifest.json
+            fields (Optional[Dict[str, Any]]): Fields to write; those of the
+                current pull data if not provided
+
+        Returns:
+            bytes: Updated contents
+        """
+        manifest = json.loads(contents)
+        manifest.update(self._manifest if fields is None else fields)
+        # Set up after this integration so its wheel cache is used for requirements
+        after_dependencies: List[str] = manifest.get("after_dependencies", [])
+        if DOMAIN not in after_dependencies:
+            manifest["after_dependencies"] = after_dependencies + [DOMAIN]
+        return json.dumps(manifest).encode("utf-8")
+
+    async def async_create_translations(
+        self, force: bool = False, path: Optional[str] = None
+    ) -> bool:
         """Create translations directory if needed.
 
+        Args:
+            force (bool): Regenerate en.json even if it already exists
+            path (Optional[str]): Local path of the component, e.g., a staging
+                directory; defaults to the installed component
+
         Returns:
             bool: Whether translations directory exists
         """
@@ -261,58 +1636,53 @@ class PRCustomComponentApiClient:
         if not self._component_name:
             _LOGGER.debug("Component name not initialized")
             return False
-        component_path: str = os.path.join(
+        component_path: str = path or os.path.join(
             self._config_path, CUSTOM_COMPONENT_PATH, self._component_name
         )
+        _LOGGER.debug("Checking for translations in %s", component_path)
+        with self._stats.span("translations", component_path):
+            return await self._async_run(
+                self._create_translations, component_path, force
+            )
+
+    def _create_translations(self, component_path: str, force: bool) -> bool:
+        """Create en.json from strings.json under component_path.
+
+        This is blocking and must be run in an executor.
+        """
         translations_path = os.path.join(component_path, TRANSLATIONS_PATH)
         strings_path = os.path.join(component_path, STRING_FILE)
         english_path = os.path.join(translations_path, ENGLISH_JSON)
-        _LOGGER.debug("Checking for translations in %s", component_path)
-        if os.path.isdir(translations_path) and os.path.isfile(english_path):
+        if not force and os.path.isfile(english_path):
             _LOGGER.debug("Translations directory and en.json already exists")
             return True
-        if not os.path.isfile(strings_path):
-            _LOGGER.debug(
-                "%s does not exist, not able to create translations directory",
-                strings_path,
-            )
-            return False
-        else:
-            if not os.path.isdir(translations_path):
-                _LOGGER.debug("Creating translations directory %s", translations_path)
-                try:
-                    os.mkdir(translations_path)
-                except (OSError) as ex:
-                    _LOGGER.debug(
-                        "Error creating directory %s",
-                        translations_path,
-                        EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
-                    )
-                    return False
-            try:
-                async with aiofiles.open(strings_path) as localfile:
-                    contents = await localfile.read()
-                    strings_json: str = json.loads(contents)
-            except (OSError, EOFError, JSONDecodeError, TypeError) as ex:
+        try:
+            contents: Optional[bytes] = read_file(strings_path)
+            if contents is None:
                 _LOGGER.debug(
-                    "Error reading file %s: %s",
+                    "%s does not exist, not able to create translations directory",
                     strings_path,
-                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
-                )
-                return False
-            if strings_json.get("title") and self._manifest.get("name"):
-                strings_json["title"] = self._manifest["name"]
-            contents = json.dumps(strings_json).encode("utf-8")
-            try:
-                async with aiofiles.open(english_path, mode="wb") as localfile:
-                    await localfile.write(contents)
-            except (OSError) as ex:
-                _LOGGER.debug(
-                    "Error saving file %s: %s",
-                    english_path,
-                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
                 )
                 return False
+            strings_json: dict = json.loads(contents)
+        except (OSError, JSONDecodeError, UnicodeDecodeError) as ex:
+            _LOGGER.debug(
+                "Error reading file %s: %s",
+                strings_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        if strings_json.get("title") and self._manifest.get("name"):
+            strings_json["title"] = self._manifest["name"]
+        try:
+            write_file(english_path, json.dumps(strings_json).encode("utf-8"))
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error saving file %s: %s",
+                english_path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
         return True
 
     async def api_wrapper(
@@ -327,21 +1697,11 @@ class PRCustomComponentApiClient:
         headers = self._headers if not headers else headers
         data = data or {}
         try:
+            if method == "get":
+                # GitHubClient applies the timeout per request so waiting for a
+                # rate limit reset is not cut short
+                return await self._github.async_get(url, headers, self._budget)
             async with async_timeout.timeout(TIMEOUT):
-                if method == "get":
-                    response = await self._session.get(url, headers=headers)
-                    response_json = await response.json()
-                    if (
-                        response_json
-                        and isinstance(response_json, dict)
-                        and response_json.get("message")
-                        and response_json["message"].startswith(
-                            "API rate limit exceeded"
-                        )
-                    ):
-                        _LOGGER.error("Rate limited: %s", response_json["message"])
-                        raise RateLimitException("Rate limited")
-                    return response_json
                 if method == "put":
                     return await (
                         await self._session.put(url, headers=headers, json=data)
@@ -398,15 +1758,52 @@ class PRCustomComponentApiClient:
         ):
             _LOGGER.warning("Component name was empty while delete was called.")
             return False
-        if os.path.isdir(component_path):
-            _LOGGER.debug("Deleting %s", component_path)
+        for delete_path in (component_path, *self._staged_paths(component_path)):
             try:
-                shutil.rmtree(component_path)
-            except (OSError, EOFError, TypeError, AttributeError) as ex:
+                if await self._fs.async_delete(delete_path):
+                    _LOGGER.debug("Deleted %s", delete_path)
+            except OSError as ex:
                 _LOGGER.debug(
                     "Error deleting component: %s %s; please manually remove",
-                    component_path,
+                    delete_path,
                     EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
                 )
                 return False
         return True
+
+
+class _QueueReader:
+    """Blocking file-like reader over chunks fed into an asyncio queue.
+
+    Used to let tarfile read a response body from an executor thread while the
+    event loop keeps downloading. An empty chunk marks the end of the stream.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue) -> None:
+        """Initialize reader."""
+        self._loop = loop
+        self._queue = queue
+        self._buffer = bytearray()
+        self._eof: bool = False
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes, blocking until they are available."""
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk: bytes = asyncio.run_coroutine_threadsafe(
+                self._queue.get(), self._loop
+            ).result()
+            if not chunk:
+                self._eof = True
+                break
+            self._buffer.extend(chunk)
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def abort(self) -> None:
+        """End the stream early; must be called from the event loop."""
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(b"")
@@ -39,3 +39,8 @@ class PRCustomComponentApiClientBinarySensor(
     def is_on(self):
         """Return true if the binary_sensor is on."""
         return self.coordinator.api.update_available
+
+    @property
+    def extra_state_attributes(self):
+        """Return whether the update is staged for an instant install."""
+        return {"staged": self.coordinator.api.update_staged}
@@ -0,0 +1,297 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Content addressed blob store
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import hashlib
+import json
+from json.decoder import JSONDecodeError
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .const import DEFAULT_BLOB_STORE_SIZE, EXCEPTION_TEMPLATE, MMAP_MIN_SIZE
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+ACCESS_FILE = "access.json"
+
+
+def git_blob_sha(contents: bytes) -> str:
+    """Return the git blob sha of contents."""
+    sha = hashlib.sha1(f"blob {len(contents)}\0".encode())  # nosec
+    sha.update(contents)
+    return sha.hexdigest()
+
+
+def git_blob_sha_file(path: str) -> str:
+    """Return the git blob sha of the file at path. This is blocking.
+
+    Large files are hashed through mmap so they are not copied in chunks.
+    """
+    with open(path, "rb") as localfile:
+        size: int = os.fstat(localfile.fileno()).st_size
+        sha = hashlib.sha1(f"blob {size}\0".encode())  # nosec
+        if size >= MMAP_MIN_SIZE:
+            with mmap.mmap(localfile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sha.update(mapped)
+        else:
+            for chunk in iter(lambda: localfile.read(1024 * 1024), b""):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+
+class BlobStore:
+    """Local store of file contents keyed by git blob sha.
+
+    Blobs are installed by hardlink when possible so a file shared by several
+    Pull Requests or versions is only stored once. Installed files must therefore
+    be replaced, never rewritten in place. The store is bounded by size and the
+    least recently used blobs are evicted first. Use times are kept in a separate
+    access file since touching a blob would also change the mtime of every
+    installed hardlink.
+
+    All methods are blocking and must be run in an executor. The store is shared
+    by every entry, so use times are guarded for calls from several threads.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_BLOB_STORE_SIZE) -> None:
+        """Initialize blob store.
+
+        Args:
+            path (str): Directory for the store, e.g., /config/.pr_custom_component/blobs
+            max_size (int): Size cap in bytes before least recently used blobs are
+                evicted
+
+        """
+        self._path: str = path
+        self._max_size: int = max_size
+        self._access: Optional[Dict[str, float]] = None
+        self._access_lock: threading.Lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        """Return the store path."""
+        return self._path
+
+    def _blob_path(self, sha: str) -> str:
+        """Return the path of blob sha."""
+        return os.path.join(self._path, sha[:2], sha[2:])
+
+    def contains(self, sha: str) -> bool:
+        """Return whether blob sha is stored."""
+        return bool(sha) and os.path.isfile(self._blob_path(sha))
+
+    def read(self, sha: str) -> Optional[bytes]:
+        """Return contents of blob sha if stored."""
+        try:
+            with open(self._blob_path(sha), "rb") as blob:
+                contents = blob.read()
+        except OSError:
+            return None
+        self._touch(sha)
+        return contents
+
+    def verify(self, sha: str) -> bool:
+        """Return whether blob sha is stored intact, removing it if corrupted."""
+        if not self.contains(sha):
+            return False
+        blob_path: str = self._blob_path(sha)
+        try:
+            if git_blob_sha_file(blob_path) == sha:
+                return True
+            _LOGGER.warning("Removing corrupted blob %s", sha)
+            os.remove(blob_path)
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error verifying blob %s: %s",
+                sha,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+        return False
+
+    def add(self, sha: str, contents: bytes) -> bool:
+        """Store contents as blob sha.
+
+        Args:
+            sha (str): Expected git blob sha of contents
+            contents (bytes): File contents
+
+        Returns:
+            bool: Whether the blob is stored
+        """
+        if self.contains(sha):
+            self._touch(sha)
+            return True
+        if git_blob_sha(contents) != sha:
+            _LOGGER.debug("Not storing blob %s with mismatched contents", sha)
+            return False
+        blob_path: str = self._blob_path(sha)
+        try:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=os.path.dirname(blob_path), delete=False
+            ) as blob:
+                blob.write(contents)
+            os.replace(blob.name, blob_path)
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error storing blob %s: %s",
+                sha,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        self._touch(sha)
+        return True
+
+    def add_file(self, sha: str, source: str) -> bool:
+        """Store an existing file as blob sha by hardlink or copy.
+
+        Args:
+            sha (str): Git blob sha of the file, the caller must have verified it
+            source (str): Path of the file
+
+        Returns:
+            bool: Whether the blob is stored
+        """
+        if self.contains(sha):
+            self._touch(sha)
+            return True
+        blob_path: str = self._blob_path(sha)
+        try:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            self._link_or_copy(source, blob_path)
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error storing blob %s: %s",
+                sha,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        self._touch(sha)
+        return True
+
+    def install(self, sha: str, destination: str) -> bool:
+        """Install blob sha at destination by hardlink or copy.
+
+        Args:
+            sha (str): Git blob sha
+            destination (str): Path of the installed file
+
+        Returns:
+            bool: Whether the blob was installed
+        """
+        if not self.contains(sha):
+            return False
+        try:
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            self._link_or_copy(self._blob_path(sha), destination)
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error installing blob %s to %s: %s",
+                sha,
+                destination,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        self._touch(sha)
+        return True
+
+    def evict(self) -> int:
+        """Evict least recently used blobs until the store fits the size cap.
+
+        This also persists the recorded use times.
+
+        Returns:
+            int: Number of evicted blobs
+        """
+        with self._access_lock:
+            access: Dict[str, float] = dict(self._load_access())
+        blobs: List[Tuple[float, int, str]] = []
+        total: int = 0
+        for root, _dirs, files in os.walk(self._path):
+            for file_name in files:
+                sha = os.path.basename(root) + file_name
+                if len(sha) != 40:
+                    continue
+                blob_path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(blob_path)
+                except OSError:
+                    continue
+                blobs.append((access.get(sha, stat.st_mtime), stat.st_size, sha))
+                total += stat.st_size
+        evicted: int = 0
+        for _used, size, sha in sorted(blobs):
+            if total <= self._max_size:
+                break
+            try:
+                os.remove(self._blob_path(sha))
+            except OSError:
+                continue
+            with self._access_lock:
+                self._load_access().pop(sha, None)
+            total -= size
+            evicted += 1
+        if evicted:
+            _LOGGER.debug("Evicted %s blobs from %s", evicted, self._path)
+        self._save_access()
+        return evicted
+
+    def _touch(self, sha: str) -> None:
+        """Mark blob sha as recently used."""
+        with self._access_lock:
+            self._load_access()[sha] = time.time()
+
+    def _load_access(self) -> Dict[str, float]:
+        """Return use times, loading them from disk on first use.
+
+        The access lock must be held.
+        """
+        if self._access is None:
+            self._access = {}
+            try:
+                with open(os.path.join(self._path, ACCESS_FILE)) as access_file:
+                    self._access = json.load(access_file)
+            except (OSError, JSONDecodeError, TypeError):
+                pass
+        return self._access
+
+    def _save_access(self) -> None:
+        """Persist use times."""
+        with self._access_lock:
+            if self._access is None:
+                return
+            access: Dict[str, float] = dict(self._access)
+        try:
+            os.makedirs(self._path, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", dir=self._path, delete=False
+            ) as access_file:
+                json.dump(access, access_file)
+            os.replace(access_file.name, os.path.join(self._path, ACCESS_FILE))
+        except OSError as ex:
+            _LOGGER.debug(
+                "Error saving blob access times: %s",
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+
+    @staticmethod
+    def _link_or_copy(source: str, destination: str) -> None:
+        """Atomically replace destination with a hardlink or copy of source."""
+        temp_path: str = f"{destination}.{threading.get_ident()}.tmp"
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            shutil.copyfile(source, temp_path)
+        os.replace(temp_path, destination)
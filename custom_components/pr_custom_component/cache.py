@@ -0,0 +1,265 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Response Cache
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+from collections import OrderedDict
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from .const import (
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_RESTORED_MAX_AGE,
+    CACHE_TTL,
+)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+ETAG = "ETag"
+LAST_MODIFIED = "Last-Modified"
+IF_NONE_MATCH = "If-None-Match"
+IF_MODIFIED_SINCE = "If-Modified-Since"
+
+
+class CacheEntry:
+    """Cached response body with its validators."""
+
+    def __init__(
+        self,
+        body: Any,
+        etag: str = "",
+        last_modified: str = "",
+        timestamp: Optional[float] = None,
+        size: int = 0,
+    ) -> None:
+        """Initialize cache entry.
+
+        Args:
+            body (Any): Decoded response body
+            etag (str): ETag returned by the server
+            last_modified (str): Last-Modified returned by the server
+            timestamp (Optional[float]): Time the entry was stored or revalidated
+            size (int): Approximate size of the body in bytes
+
+        """
+        self.body: Any = body
+        self.etag: str = etag
+        self.last_modified: str = last_modified
+        self.timestamp: float = timestamp if timestamp is not None else time.time()
+        self.size: int = size
+        # Restored from disk and not requested since
+        self.restored: bool = False
+
+    @property
+    def age(self) -> float:
+        """Return seconds since the entry was stored or revalidated."""
+        return time.time() - self.timestamp
+
+
+class ResponseCache:
+    """Per-URL cache of GET responses keyed on HTTP validators.
+
+    GitHub does not count ``304 Not Modified`` responses against the rate limit so
+    revalidating a cached body is effectively free.
+
+    Entries are kept in least recently used order and evicted once older than the
+    TTL or when the cache exceeds its entry or byte limit. The cache can be saved
+    with as_dict and restored with load so validators survive restarts; the first
+    request for a recently saved entry after a restore is answered without a
+    request at all.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        ttl: float = CACHE_TTL,
+    ) -> None:
+        """Initialize cache.
+
+        Args:
+            max_entries (int): Maximum number of entries
+            max_bytes (int): Maximum total approximate size of bodies
+            ttl (float): Seconds an entry is kept without being revalidated
+
+        """
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._max_entries: int = max_entries
+        self._max_bytes: int = max_bytes
+        self._ttl: float = ttl
+        self._bytes: int = 0
+        self.on_change: Optional[Callable[[], None]] = None
+
+    def __len__(self) -> int:
+        """Return number of cached entries."""
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Return total approximate size of cached bodies."""
+        return self._bytes
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return cached entry for key if it exists and has not expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.age > self._ttl:
+            self._remove(key)
+            self._changed()
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get_restored(self, key: str) -> Optional[CacheEntry]:
+        """Return a recently saved entry the first time it is requested after load.
+
+        Used to skip the request entirely, e.g., when every entry refreshes right
+        after a restart.
+
+        Args:
+            key (str): Cache key, normally the request url
+
+        Returns:
+            Optional[CacheEntry]: Entry younger than CACHE_RESTORED_MAX_AGE or None
+        """
+        entry = self.get(key)
+        if entry is None or not entry.restored:
+            return None
+        entry.restored = False
+        return entry if entry.age <= CACHE_RESTORED_MAX_AGE else None
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Return conditional request headers for key.
+
+        Args:
+            key (str): Cache key, normally the request url
+
+        Returns:
+            Dict[str, str]: If-None-Match/If-Modified-Since headers, may be empty
+
+        """
+        entry = self.get(key)
+        if entry is None:
+            return {}
+        headers: Dict[str, str] = {}
+        if entry.etag:
+            headers[IF_NONE_MATCH] = entry.etag
+        if entry.last_modified:
+            headers[IF_MODIFIED_SINCE] = entry.last_modified
+        return headers
+
+    def revalidated(self, key: str) -> None:
+        """Mark the entry for key as confirmed current by the server."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.timestamp = time.time()
+            entry.restored = False
+            self._changed()
+
+    def store(self, key: str, headers: Mapping[str, str], body: Any) -> bool:
+        """Store body if the response carries validators.
+
+        Args:
+            key (str): Cache key, normally the request url
+            headers (Mapping[str, str]): Response headers
+            body (Any): Decoded response body
+
+        Returns:
+            bool: Whether the body was cached
+
+        """
+        etag: str = headers.get(ETAG, "")
+        last_modified: str = headers.get(LAST_MODIFIED, "")
+        if not etag and not last_modified:
+            return False
+        try:
+            size: int = len(json.dumps(body))
+        except (TypeError, ValueError):
+            return False
+        if size > self._max_bytes:
+            return False
+        self._remove(key)
+        self._entries[key] = CacheEntry(body, etag, last_modified, size=size)
+        self._bytes += size
+        self._evict()
+        self._changed()
+        return True
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+        self._bytes = 0
+        self._changed()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the entries for saving, least recently used first."""
+        return {
+            "entries": [
+                {
+                    "key": key,
+                    "body": entry.body,
+                    "etag": entry.etag,
+                    "last_modified": entry.last_modified,
+                    "timestamp": entry.timestamp,
+                    "size": entry.size,
+                }
+                for key, entry in self._entries.items()
+            ]
+        }
+
+    def load(self, data: Optional[Dict[str, Any]]) -> None:
+        """Restore entries saved with as_dict, skipping expired ones.
+
+        Args:
+            data (Optional[Dict[str, Any]]): Saved cache
+
+        """
+        saved: List[Dict[str, Any]] = (data or {}).get("entries", [])
+        for item in saved:
+            try:
+                entry = CacheEntry(
+                    item["body"],
+                    item["etag"],
+                    item["last_modified"],
+                    float(item["timestamp"]),
+                    int(item["size"]),
+                )
+                key: str = item["key"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            if entry.age > self._ttl or key in self._entries:
+                continue
+            entry.restored = True
+            self._entries[key] = entry
+            self._bytes += entry.size
+        self._evict()
+        _LOGGER.debug("Restored %s cached responses", len(self._entries))
+
+    def _remove(self, key: str) -> None:
+        """Remove the entry for key if it exists."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until within the limits."""
+        while self._entries and (
+            len(self._entries) > self._max_entries or self._bytes > self._max_bytes
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            _LOGGER.debug("Evicted cached response for %s", key)
+
+    def _changed(self) -> None:
+        """Notify the owner that entries changed, e.g., to schedule a save."""
+        if self.on_change is not None:
+            self.on_change()
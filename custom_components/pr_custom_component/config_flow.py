@@ -8,8 +8,10 @@ Config Flow Platform
 For more details about this integration, please refer to
 https://github.com/alandtse/pr_custom_component
 """
+import asyncio
 import logging
-from typing import Dict
+import time
+from typing import Dict, Optional
 
 from homeassistant import config_entries
 from homeassistant.core import callback
@@ -17,9 +19,26 @@ from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import voluptuous as vol
 import yarl
 
-from . import get_hacs_token
+from . import get_blob_store, get_github_client, get_hacs_token
 from .api import PRCustomComponentApiClient
-from .const import CONF_PR_URL, DOMAIN, PLATFORMS
+from .const import (
+    CONF_CONCURRENCY,
+    CONF_DOWNLOAD_MODE,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MIN_POLL_INTERVAL,
+    CONF_PR_URL,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_DOWNLOAD_MODE,
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DEFAULT_RETRY_AFTER,
+    DOMAIN,
+    DOWNLOAD_MODES,
+    EXCEPTION_TEMPLATE,
+    PLATFORMS,
+)
 from .exceptions import RateLimitException
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
@@ -34,6 +53,9 @@ class PRCustomComponentFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):  #
     def __init__(self):
         """Initialize."""
         self._errors = {}
+        self._user_input: Dict = {}
+        self._reset: float = 0.0
+        self._install_task: Optional[asyncio.Task] = None
 
     async def async_step_user(self, user_input=None):
         """Handle a flow initialized by the user."""
@@ -47,17 +69,60 @@ class PRCustomComponentFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):  #
             result = {}
             try:
                 result = await self.install_integration(user_input[CONF_PR_URL])
-            except RateLimitException:
-                self._errors["base"] = "rate_limited"
-                return await self._show_config_form(user_input)
-            if result.get("name") and result.get("update_time"):
-                user_input.update(result)
-                return self.async_create_entry(
-                    title=result.get("name"), data=user_input
+            except RateLimitException as exception:
+                self._user_input = user_input
+                self._reset = exception.reset
+                return await self.async_step_wait_rate_limit()
+            return await self._async_finish_install(user_input, result)
+
+        return await self._show_config_form(user_input)
+
+    async def async_step_wait_rate_limit(self, user_input=None):
+        """Wait for the rate limit to reset and then finish the install."""
+        if self._install_task is None:
+            self._install_task = self.hass.async_create_task(
+                self._async_install_after_reset(self._user_input[CONF_PR_URL])
+            )
+        if not self._install_task.done():
+            return self.async_show_progress(
+                step_id="wait_rate_limit",
+                progress_action="wait_rate_limit",
+                description_placeholders={"reset": time.ctime(self._reset)},
+                progress_task=self._install_task,
+            )
+        return self.async_show_progress_done(next_step_id="finish_install")
+
+    async def async_step_finish_install(self, user_input=None):
+        """Finish an install deferred by the rate limit."""
+        result: Dict = {}
+        if self._install_task is not None and not self._install_task.cancelled():
+            try:
+                result = self._install_task.result()
+            except Exception as exception:  # pylint: disable=broad-except
+                _LOGGER.debug(
+                    "Unable to install %s: %s",
+                    self._user_input[CONF_PR_URL],
+                    EXCEPTION_TEMPLATE.format(type(exception).__name__, exception.args),
                 )
-            self._errors["base"] = "bad_pr"
+        self._install_task = None
+        return await self._async_finish_install(self._user_input, result)
+
+    async def _async_install_after_reset(self, pr_url: str) -> Dict:
+        """Install the integration once the rate limit resets."""
+        while True:
+            delay: float = self._reset - time.time()
+            await asyncio.sleep(delay + 1 if delay > 0 else DEFAULT_RETRY_AFTER)
+            try:
+                return await self.install_integration(pr_url)
+            except RateLimitException as exception:
+                self._reset = exception.reset
 
-            return await self._show_config_form(user_input)
+    async def _async_finish_install(self, user_input: Dict, result: Dict):
+        """Create the entry or show the form if the install failed."""
+        if result.get("name") and result.get("update_time"):
+            user_input.update(result)
+            return self.async_create_entry(title=result.get("name"), data=user_input)
+        self._errors["base"] = "bad_pr"
 
         return await self._show_config_form(user_input)
 
@@ -79,7 +144,11 @@ class PRCustomComponentFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):  #
         """Return true if integration is successfully installed."""
         session = async_get_clientsession(self.hass)
         client = PRCustomComponentApiClient(
-            session, yarl.URL(pr_url), self.hass.config.path()
+            session,
+            yarl.URL(pr_url),
+            self.hass.config.path(),
+            blob_store=get_blob_store(self.hass),
+            github=get_github_client(self.hass),
         )
         client.set_token(get_hacs_token(self.hass))
         if await client.async_update_data(download=True):
@@ -113,8 +182,38 @@ class PRCustomComponentOptionsFlowHandler(config_entries.OptionsFlow):
             step_id="user",
             data_schema=vol.Schema(
                 {
-                    vol.Required(x, default=self.options.get(x, True)): bool
-                    for x in sorted(PLATFORMS)
+                    **{
+                        vol.Required(x, default=self.options.get(x, True)): bool
+                        for x in sorted(PLATFORMS)
+                    },
+                    vol.Required(
+                        CONF_DOWNLOAD_MODE,
+                        default=self.options.get(
+                            CONF_DOWNLOAD_MODE, DEFAULT_DOWNLOAD_MODE
+                        ),
+                    ): vol.In(DOWNLOAD_MODES),
+                    vol.Required(
+                        CONF_CONCURRENCY,
+                        default=self.options.get(CONF_CONCURRENCY, DEFAULT_CONCURRENCY),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+                    vol.Required(
+                        CONF_MAX_IN_FLIGHT,
+                        default=self.options.get(
+                            CONF_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=64)),
+                    vol.Required(
+                        CONF_MIN_POLL_INTERVAL,
+                        default=self.options.get(
+                            CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=24 * 60)),
+                    vol.Required(
+                        CONF_MAX_POLL_INTERVAL,
+                        default=self.options.get(
+                            CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=7 * 24 * 60)),
                 }
             ),
         )
@@ -8,6 +8,7 @@ Constants Platform
 For more details about this integration, please refer to
 https://github.com/alandtse/pr_custom_component
 """
+from homeassistant.const import CONF_WEBHOOK_ID
 
 # Base component constants
 NAME = "pr_custom_component"
@@ -22,7 +23,15 @@ PATCH_DOMAIN = "patch-diff.githubusercontent.com"
 PATCH_PATH_PREFIX = "raw"
 PATCH_PATH_SUFFIX = ".patch"
 API_DOMAIN = "api.github.com"
+API_URL = f"https://{API_DOMAIN}"
 API_PATH_PREFIX = "repos"
+RATE_LIMIT_PATH = "rate_limit"
+GRAPHQL_PATH = "graphql"
+TARBALL_PATH = "tarball"
+GIT_PATH = "git"
+TREES_PATH = "trees"
+# Returns file contents as is instead of base64 encoded JSON
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
 
 # HA Constants
 COMPONENT_PATH = "homeassistant/components/"
@@ -30,6 +39,23 @@ CUSTOM_COMPONENT_PATH = "custom_components/"
 TRANSLATIONS_PATH = "translations/"
 STRING_FILE = "strings.json"
 ENGLISH_JSON = "en.json"
+MANIFEST_FILE = "manifest.json"
+INIT_FILE = "__init__.py"
+# Fetched first so a broken Pull Request fails fast
+PRIORITY_FILES = [MANIFEST_FILE, INIT_FILE]
+# Local state shared by all entries, relative to the config path
+STORAGE_PATH = ".pr_custom_component"
+BLOBS_PATH = "blobs"
+WHEELS_PATH = "wheels"
+# Records the blob sha of each installed file for incremental syncs
+SHA_INDEX_FILE = ".pr_custom_component.json"
+# Records the commit and local blob sha of each installed file for verification
+INTEGRITY_FILE = ".pr_custom_component.integrity.json"
+# Hidden siblings of an installed component, e.g., custom_components/.tesla.staging
+STAGING_SUFFIX = ".staging"
+PREVIOUS_SUFFIX = ".previous"
+# Hidden sibling that deleted directories are moved to before removal
+TRASH_PATH = ".pr_custom_component.trash"
 
 # Icons
 ICON = "mdi:update"
@@ -45,12 +71,158 @@ SWITCH = "switch"
 PLATFORMS = [BINARY_SENSOR, SENSOR, SWITCH]
 
 
+# Services
+SERVICE_ROLLBACK = "rollback"
+SERVICE_PROFILE_SYNC = "profile_sync"
+SERVICE_APPLY_UPDATE = "apply_update"
+SERVICE_VERIFY = "verify"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_DOWNLOAD = "download"
+ATTR_TRACEMALLOC = "tracemalloc"
+ATTR_TOP = "top"
+ATTR_REPAIR = "repair"
+# Allocations listed in a profile_sync report
+DEFAULT_PROFILE_TOP = 25
+
 # Configuration and options
 CONF_ENABLED = "enabled"
 CONF_PR_URL = "pr_url"
+CONF_DOWNLOAD_MODE = "download_mode"
+CONF_CONCURRENCY = "concurrency"
+CONF_MAX_IN_FLIGHT = "max_in_flight_mb"
+CONF_MIN_POLL_INTERVAL = "min_poll_interval"
+CONF_MAX_POLL_INTERVAL = "max_poll_interval"
+CONF_WEBHOOK_SECRET = "webhook_secret"
+
+# Download modes
+DOWNLOAD_MODE_CONTENTS = "contents"
+DOWNLOAD_MODE_TARBALL = "tarball"
+DOWNLOAD_MODE_TREES = "trees"
+DOWNLOAD_MODE_PATCH = "patch"
+DOWNLOAD_MODES = [
+    DOWNLOAD_MODE_CONTENTS,
+    DOWNLOAD_MODE_TARBALL,
+    DOWNLOAD_MODE_TREES,
+    DOWNLOAD_MODE_PATCH,
+]
 
 # Defaults
 DEFAULT_NAME = DOMAIN
+DEFAULT_DOWNLOAD_MODE = DOWNLOAD_MODE_CONTENTS
+DEFAULT_BLOB_STORE_SIZE = 100 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_BYTES_IN_FLIGHT = DEFAULT_MAX_IN_FLIGHT * 1024 * 1024
+# Polling intervals in minutes
+DEFAULT_MIN_POLL_INTERVAL = 15
+DEFAULT_MAX_POLL_INTERVAL = 24 * 60
+
+# Rate limiting
+# Requests kept free for polling other entries when budgeting a sync
+RATE_LIMIT_RESERVE = 5
+# Longest wait for a rate limit reset before deferring work, in seconds
+MAX_RATE_LIMIT_WAIT = 60
+# Wait used when GitHub rate limits without saying until when, in seconds
+DEFAULT_RETRY_AFTER = 60
+
+# Staging
+# Concurrent requests of a background pre-stage
+PRESTAGE_CONCURRENCY = 1
+
+# Bytecode precompilation
+# Worker processes compiling a staged component
+PRECOMPILE_WORKERS = 4
+# Python files below which compiling in the executor beats starting workers
+PRECOMPILE_POOL_MIN_FILES = 32
+
+# Integrity
+# Threads hashing installed files
+VERIFY_WORKERS = 4
+# Files at least this many bytes are hashed through mmap
+MMAP_MIN_SIZE = 1024 * 1024
+# Results of verifying an installed file
+VERIFY_MISSING = "missing"
+VERIFY_MODIFIED = "modified"
+VERIFY_REPAIRED = "repaired"
+
+# Requirements
+# Environment variable pip reads extra --find-links locations from
+PIP_FIND_LINKS = "PIP_FIND_LINKS"
+# Prefetch states of an entry's manifest requirements
+REQUIREMENTS_INSTALLED = "installed"
+REQUIREMENTS_DOWNLOADING = "downloading"
+REQUIREMENTS_READY = "ready"
+REQUIREMENTS_FAILED = "failed"
+REQUIREMENTS_STATES = [
+    REQUIREMENTS_INSTALLED,
+    REQUIREMENTS_DOWNLOADING,
+    REQUIREMENTS_READY,
+    REQUIREMENTS_FAILED,
+]
+
+# Retries
+# Attempts after the first for a failed GET
+MAX_RETRIES = 3
+# Retries shared by every request of a single sync
+SYNC_RETRY_LIMIT = 20
+# Attempts after the first for a failed file of a download
+FILE_RETRIES = 2
+# Exponential backoff base and cap, in seconds
+RETRY_BACKOFF = 1.0
+RETRY_MAX_BACKOFF = 30.0
+
+# Polling requests per hour shared by all entries
+POLL_BUDGET_PER_HOUR = 30
+
+# Batched polling
+# Seconds to wait for other entries to join a batch
+BATCH_DELAY = 1.0
+# Seconds batch results are reused
+BATCH_MAX_AGE = 60
+# Pull requests per GraphQL query
+GRAPHQL_BATCH_SIZE = 50
+
+# Response cache
+CACHE_MAX_ENTRIES = 500
+CACHE_MAX_BYTES = 8 * 1024 * 1024
+# Seconds an entry is kept without being revalidated
+CACHE_TTL = 7 * 24 * 60 * 60
+# Seconds a restored entry is used without any request, e.g., across a restart
+CACHE_RESTORED_MAX_AGE = 10 * 60
+# Seconds changes are batched before saving the cache
+CACHE_SAVE_DELAY = 30
+CACHE_STORAGE_KEY = f"{DOMAIN}.response_cache"
+CACHE_STORAGE_VERSION = 1
+
+# Install index
+INSTALL_INDEX_STORAGE_KEY = f"{DOMAIN}.install_index"
+INSTALL_INDEX_STORAGE_VERSION = 1
+# Seconds changes are batched before saving the install index
+INSTALL_INDEX_SAVE_DELAY = 10
+
+# Diagnostics
+# Syncs kept in the trace timeline of each entry
+TRACE_HISTORY = 5
+# Spans recorded per sync
+TRACE_MAX_SPANS = 1000
+# Keys redacted from diagnostics
+TO_REDACT = {
+    "token",
+    "access_token",
+    "Authorization",
+    "secret",
+    CONF_WEBHOOK_ID,
+    CONF_WEBHOOK_SECRET,
+}
+
+# hass.data keys
+DATA_BLOB_STORE = "blob_store"
+DATA_GITHUB_CLIENT = "github_client"
+DATA_PULL_POLLER = "pull_poller"
+DATA_CACHE_STORE = "cache_store"
+DATA_WHEEL_CACHE = "wheel_cache"
+DATA_INSTALL_INDEX = "install_index"
+DATA_INSTALL_INDEX_STORE = "install_index_store"
 
 
 STARTUP_MESSAGE = f"""
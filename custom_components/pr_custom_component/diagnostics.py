@@ -0,0 +1,72 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Diagnostics Platform
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+from typing import Any, Dict
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import get_github_client, get_hacs_token
+from .const import DOMAIN, TO_REDACT
+
+
+def _redact_token(data: Any, token: str) -> Any:
+    """Return data with every occurrence of token in its strings redacted."""
+    if not token:
+        return data
+    if isinstance(data, dict):
+        return {key: _redact_token(value, token) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_redact_token(value, token) for value in data]
+    if isinstance(data, str):
+        return data.replace(token, REDACTED)
+    return data
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry.
+
+    Includes the span timeline of the last TRACE_HISTORY syncs so a slow sync can
+    be diagnosed without debug logging.
+    """
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    api = coordinator.api
+    github = get_github_client(hass)
+    data: Dict[str, Any] = {
+        "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+        "component": {
+            "name": api.name,
+            "pull_url": str(api.pull_url),
+            "updated_at": api.updated_at,
+            "auto_update": api.auto_update,
+            "download_mode": api.download_mode,
+            "concurrency": api.concurrency,
+            "max_bytes_in_flight": api.max_bytes_in_flight,
+        },
+        "github": {
+            "rate_limit_remaining": github.remaining,
+            "rate_limit_reset": github.reset,
+            "cached_responses": len(github.cache),
+            "cache_bytes": github.cache.size,
+        },
+        "requirements": {
+            "requirements": coordinator.requirements,
+            "missing": coordinator.requirements_missing,
+            "state": coordinator.requirements_state,
+            "error": coordinator.requirements_error,
+        },
+        "restored_at_startup": coordinator.restored,
+        "damaged_files": coordinator.damaged_files,
+        "syncs": [stats.as_dict() for stats in api.history],
+    }
+    return _redact_token(async_redact_data(data, TO_REDACT), get_hacs_token(hass))
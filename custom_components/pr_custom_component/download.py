@@ -0,0 +1,361 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Download pipeline
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import asyncio
+import binascii
+import itertools
+import logging
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from .const import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_MAX_BYTES_IN_FLIGHT,
+    EXCEPTION_TEMPLATE,
+    PRIORITY_FILES,
+)
+from .github import backoff_delay
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# Payloads larger than this are decoded in an executor
+DECODE_EXECUTOR_SIZE = 256 * 1024
+
+
+class DownloadJob:
+    """File to download."""
+
+    def __init__(self, path: str, url: str, sha: str = "", size: int = 0) -> None:
+        """Initialize job.
+
+        Args:
+            path (str): Path relative to the component, e.g., translations/en.json
+            url (str): API url returning the file
+            sha (str): Git blob sha of the file if known
+            size (int): Size of the file in bytes if known
+
+        """
+        self.path: str = path
+        self.url: str = url
+        self.sha: str = sha
+        self.size: int = size
+        self.attempts: int = 0
+
+    @property
+    def priority(self) -> int:
+        """Return the job priority; lower values are fetched first."""
+        return 0 if self.path in PRIORITY_FILES else 1
+
+    def __repr__(self) -> str:
+        """Return representation."""
+        return f"DownloadJob({self.path})"
+
+
+Lister = Callable[[str], Awaitable[Optional[Tuple[List[DownloadJob], List[str]]]]]
+Installer = Callable[[DownloadJob], Awaitable[bool]]
+Fetcher = Callable[[DownloadJob], Awaitable[Any]]
+Decoder = Callable[[DownloadJob, Any], bytes]
+Writer = Callable[[DownloadJob, bytes], Awaitable[bool]]
+Streamer = Callable[[DownloadJob], Awaitable[Optional[bool]]]
+
+
+class _ByteBudget:
+    """Limit the bytes held between the fetch and write stages."""
+
+    def __init__(self, limit: int) -> None:
+        """Initialize budget."""
+        self._limit: int = max(limit, 1)
+        self._used: int = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> int:
+        """Wait until size bytes are available and reserve them.
+
+        Files larger than the limit reserve the whole budget so they are processed
+        alone instead of blocking forever.
+        """
+        size = min(max(size, 0), self._limit)
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._used + size <= self._limit)
+            self._used += size
+        return size
+
+    async def release(self, size: int) -> None:
+        """Return reserved bytes."""
+        async with self._condition:
+            self._used -= size
+            self._condition.notify_all()
+
+
+class DownloadPipeline:
+    """Bounded work queue downloading files through separate stages.
+
+    Directory listings and file fetches share a concurrency limit; fetched payloads
+    are decoded and written by dedicated stages while a byte budget bounds how much
+    data is held in memory. Jobs for manifest.json and __init__.py are fetched first
+    and the pipeline aborts as soon as one of them fails. Failed jobs and listings
+    are retried with backoff on their own so a transient error does not restart the
+    whole download. With a streamer, files are streamed straight to disk by the
+    fetch stage and only the files it declines go through decoding and writing.
+    """
+
+    def __init__(
+        self,
+        lister: Optional[Lister],
+        fetcher: Fetcher,
+        decoder: Decoder,
+        writer: Writer,
+        installer: Optional[Installer] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_bytes: int = DEFAULT_MAX_BYTES_IN_FLIGHT,
+        retries: int = 0,
+        streamer: Optional[Streamer] = None,
+    ) -> None:
+        """Initialize pipeline.
+
+        Args:
+            lister (Optional[Lister]): Returns the files and sub directory urls of a
+                directory url
+            fetcher (Fetcher): Returns the payload of a job or None on failure
+            decoder (Decoder): Blocking function returning file contents of a payload
+            writer (Writer): Saves file contents of a job
+            installer (Optional[Installer]): Installs a job without the network,
+                e.g., from the blob store
+            concurrency (int): Maximum concurrent requests
+            max_bytes (int): Maximum bytes fetched but not yet written
+            retries (int): Attempts after the first for each failed job or listing
+            streamer (Optional[Streamer]): Downloads a job to disk without holding
+                it in memory; returns None to fetch the job with fetcher instead
+
+        """
+        self._lister = lister
+        self._fetcher = fetcher
+        self._decoder = decoder
+        self._writer = writer
+        self._installer = installer
+        self._streamer = streamer
+        self._concurrency: int = max(concurrency, 1)
+        self._retries: int = retries
+        self._listing_attempts: Dict[str, int] = {}
+        self.completed: List[DownloadJob] = []
+        self.failed: List[DownloadJob] = []
+        self.failed_listings: List[str] = []
+        self._aborted: bool = False
+        self._error: Optional[BaseException] = None
+        self._pending: int = 0
+        self._counter = itertools.count()
+        self._tasks: Set[asyncio.Task] = set()
+        self._done = asyncio.Event()
+        self._fetch_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._decode_queue: asyncio.Queue = asyncio.Queue()
+        self._write_queue: asyncio.Queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._bytes = _ByteBudget(max_bytes)
+
+    async def async_run(
+        self, jobs: Iterable[DownloadJob] = (), listings: Iterable[str] = ()
+    ) -> bool:
+        """Run the pipeline until all jobs and listings are processed.
+
+        Args:
+            jobs (Iterable[DownloadJob]): Files to download
+            listings (Iterable[str]): Directory urls to list with the lister
+
+        Returns:
+            bool: Whether every listing and job succeeded
+        """
+        for url in listings:
+            self._add_listing(url)
+        for job in jobs:
+            self._add_job(job)
+        if not self._pending:
+            return True
+        workers: List[asyncio.Task] = [
+            asyncio.ensure_future(self._fetch_worker())
+            for _ in range(self._concurrency)
+        ]
+        workers.append(asyncio.ensure_future(self._decode_worker()))
+        workers.append(asyncio.ensure_future(self._write_worker()))
+        for worker in workers:
+            worker.add_done_callback(self._check_task)
+        try:
+            await self._done.wait()
+        finally:
+            tasks = workers + list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._error is not None:
+            raise self._error
+        return not (self._aborted or self.failed or self.failed_listings)
+
+    def _add_listing(self, url: str) -> None:
+        """Schedule a directory listing."""
+        self._pending += 1
+        self._add_task(self._list(url))
+
+    def _add_task(self, coro: Awaitable[None]) -> None:
+        """Run a coroutine that is cancelled with the pipeline."""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(self._check_task)
+
+    def _add_job(self, job: DownloadJob) -> None:
+        """Queue a file for fetching."""
+        self._pending += 1
+        self._fetch_queue.put_nowait((job.priority, next(self._counter), job))
+
+    async def _list(self, url: str) -> None:
+        """List a directory and queue its contents."""
+        try:
+            if self._lister is None:
+                result = None
+            else:
+                async with self._semaphore:
+                    result = await self._lister(url)
+            if result is None:
+                attempts: int = self._listing_attempts.get(url, 0)
+                if attempts < self._retries and not self._aborted:
+                    self._listing_attempts[url] = attempts + 1
+                    self._pending += 1
+                    self._add_task(self._retry_listing(url, attempts + 1))
+                    return
+                _LOGGER.debug("Unable to list %s", url)
+                self.failed_listings.append(url)
+                self._abort()
+                return
+            jobs, directories = result
+            for job in jobs:
+                self._add_job(job)
+            for directory in directories:
+                self._add_listing(directory)
+        finally:
+            self._finish()
+
+    async def _fetch_worker(self) -> None:
+        """Fetch queued jobs in priority order."""
+        while True:
+            _priority, _count, job = await self._fetch_queue.get()
+            if self._aborted:
+                return
+            if self._installer is not None and await self._installer(job):
+                self._complete(job, True)
+                continue
+            if self._streamer is not None:
+                async with self._semaphore:
+                    streamed: Optional[bool] = await self._streamer(job)
+                if streamed is not None:
+                    self._complete(job, streamed)
+                    continue
+            reserved: int = await self._bytes.acquire(job.size)
+            async with self._semaphore:
+                payload = await self._fetcher(job)
+            if payload is None:
+                await self._bytes.release(reserved)
+                self._complete(job, False)
+                continue
+            self._decode_queue.put_nowait((job, payload, reserved))
+
+    async def _decode_worker(self) -> None:
+        """Decode fetched payloads."""
+        while True:
+            job, payload, reserved = await self._decode_queue.get()
+            try:
+                if job.size > DECODE_EXECUTOR_SIZE:
+                    contents: bytes = await asyncio.get_running_loop().run_in_executor(
+                        None, self._decoder, job, payload
+                    )
+                else:
+                    contents = self._decoder(job, payload)
+            except (binascii.Error, KeyError, TypeError, ValueError) as ex:
+                _LOGGER.debug(
+                    "Error decoding %s: %s",
+                    job.path,
+                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+                )
+                await self._bytes.release(reserved)
+                self._complete(job, False)
+                continue
+            self._write_queue.put_nowait((job, contents, reserved))
+
+    async def _write_worker(self) -> None:
+        """Write decoded files."""
+        while True:
+            job, contents, reserved = await self._write_queue.get()
+            try:
+                result: bool = await self._writer(job, contents)
+            except (OSError, ValueError) as ex:
+                _LOGGER.debug(
+                    "Error writing %s: %s",
+                    job.path,
+                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+                )
+                result = False
+            finally:
+                await self._bytes.release(reserved)
+            self._complete(job, result)
+
+    async def _retry_listing(self, url: str, attempt: int) -> None:
+        """List a directory again after a backoff delay."""
+        delay: float = backoff_delay(attempt)
+        _LOGGER.debug("Retrying listing %s in %.1f seconds", url, delay)
+        await asyncio.sleep(delay)
+        await self._list(url)
+
+    async def _retry_job(self, job: DownloadJob) -> None:
+        """Queue a failed job again after a backoff delay."""
+        delay: float = backoff_delay(job.attempts)
+        _LOGGER.debug("Retrying %s in %.1f seconds", job.path, delay)
+        await asyncio.sleep(delay)
+        self._fetch_queue.put_nowait((job.priority, next(self._counter), job))
+
+    def _complete(self, job: DownloadJob, result: bool) -> None:
+        """Record the result of a job."""
+        if result:
+            self.completed.append(job)
+        elif job.attempts < self._retries and not self._aborted:
+            job.attempts += 1
+            self._add_task(self._retry_job(job))
+            return
+        else:
+            self.failed.append(job)
+            if job.priority == 0:
+                _LOGGER.error("Unable to download %s; aborting download", job.path)
+                self._abort()
+        self._finish()
+
+    def _finish(self) -> None:
+        """Mark a listing or job as processed."""
+        self._pending -= 1
+        if self._pending <= 0:
+            self._done.set()
+
+    def _check_task(self, task: asyncio.Task) -> None:
+        """Stop the pipeline if a stage raised, e.g., when rate limited."""
+        if task.cancelled() or task.exception() is None:
+            return
+        if self._error is None:
+            self._error = task.exception()
+        self._abort()
+
+    def _abort(self) -> None:
+        """Stop processing remaining work."""
+        self._aborted = True
+        self._done.set()
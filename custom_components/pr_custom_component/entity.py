@@ -37,7 +37,7 @@ class PRCustomComponentApiClientEntity(CoordinatorEntity):
             else "UNKNOWN"
         )
         return {
-            "identifiers": {(DOMAIN, self.unique_id)},
+            "identifiers": {(DOMAIN, self.config_entry.entry_id)},
             "name": f"{self.config_entry.data.get('name', DEFAULT_NAME).capitalize()} PR#{self.config_entry.data.get('pull_number', 'UNKNOWN')}",
             "model": version,
             "manufacturer": f"{NAME} {VERSION}",
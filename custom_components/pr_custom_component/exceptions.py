@@ -16,3 +16,18 @@ class PRCustomComponentException(Exception):
 
 class RateLimitException(PRCustomComponentException):
     """Class of exceptions for hitting retry limits."""
+
+    def __init__(self, message: str = "Rate limited", reset: float = 0.0) -> None:
+        """Initialize exception.
+
+        Args:
+            message (str): Error message
+            reset (float): Epoch time the rate limit resets, 0 if unknown
+
+        """
+        super().__init__(message)
+        self.reset: float = reset
+
+
+class PatchError(PRCustomComponentException):
+    """Class of exceptions for patches that do not apply."""
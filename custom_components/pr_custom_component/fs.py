@@ -0,0 +1,189 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Async Filesystem
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import asyncio
+import logging
+import os
+import shutil
+from typing import IO, Any, AsyncIterable, Callable, List, Optional, Set, TypeVar
+import uuid
+
+from .const import EXCEPTION_TEMPLATE, TRASH_PATH
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+T = TypeVar("T")
+
+# Bytes of a stream buffered between executor writes
+STREAM_FLUSH_SIZE = 1024 * 1024
+
+
+def open_for_write(path: str) -> IO[bytes]:
+    """Open path for writing, creating parent directories.
+
+    An existing file is unlinked first since it may be a hardlink into the blob
+    store or the installed component. This is blocking.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.lexists(path):
+        os.remove(path)
+    return open(path, "wb")  # pylint: disable=consider-using-with
+
+
+def write_file(path: str, contents: bytes) -> None:
+    """Write contents to path, replacing any existing file. This is blocking."""
+    with open_for_write(path) as localfile:
+        localfile.write(contents)
+
+
+def read_file(path: str) -> Optional[bytes]:
+    """Return the contents of path or None if it is not a file. This is blocking."""
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as localfile:
+        return localfile.read()
+
+
+def trash_path(path: str) -> str:
+    """Return the trash directory used for path.
+
+    The trash is a hidden sibling so moving path there stays on one filesystem.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(path)), TRASH_PATH)
+
+
+def move_to_trash(path: str) -> bool:
+    """Rename path into its trash directory, which is instant regardless of size.
+
+    This is blocking.
+
+    Returns:
+        bool: Whether path existed
+    """
+    if not os.path.lexists(path):
+        return False
+    trash: str = trash_path(path)
+    os.makedirs(trash, exist_ok=True)
+    os.rename(path, os.path.join(trash, f"{os.path.basename(path)}.{uuid.uuid4().hex}"))
+    return True
+
+
+def empty_trash(trash: str) -> None:
+    """Remove the trash directory and everything in it. This is blocking."""
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+class AsyncFileSystem:
+    """Run filesystem operations in the executor.
+
+    Each method costs one executor job, so callers should prefer the coarse
+    operations, or async_run with a function doing several steps, over chaining
+    many small calls. Deletes rename into a trash directory, which is instant
+    even for large trees, and the trash is emptied in the background.
+    """
+
+    def __init__(self) -> None:
+        """Initialize filesystem."""
+        self._cleanups: Set[asyncio.Future] = set()
+
+    @staticmethod
+    async def async_run(func: Callable[..., T], *args: Any) -> T:
+        """Run blocking func in the default executor."""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def async_isdir(self, path: str) -> bool:
+        """Return whether path is a directory."""
+        return await self.async_run(os.path.isdir, path)
+
+    async def async_isfile(self, path: str) -> bool:
+        """Return whether path is a file."""
+        return await self.async_run(os.path.isfile, path)
+
+    async def async_makedirs(self, path: str) -> None:
+        """Create path and its parents if they do not exist."""
+        await self.async_run(lambda: os.makedirs(path, exist_ok=True))
+
+    async def async_read(self, path: str) -> Optional[bytes]:
+        """Return the contents of path or None if it is not a file."""
+        return await self.async_run(read_file, path)
+
+    async def async_write(self, path: str, contents: bytes) -> None:
+        """Write contents to path, replacing any existing file."""
+        await self.async_run(write_file, path, contents)
+
+    async def async_write_stream(self, path: str, chunks: AsyncIterable[bytes]) -> int:
+        """Write chunks to path as they arrive, replacing any existing file.
+
+        Chunks are buffered up to STREAM_FLUSH_SIZE between executor jobs so only
+        the buffer is held in memory and small files cost a single write.
+
+        Args:
+            path (str): File to write
+            chunks (AsyncIterable[bytes]): File contents, e.g., a response body
+
+        Returns:
+            int: Bytes written
+        """
+        localfile: IO[bytes] = await self.async_run(open_for_write, path)
+        written: int = 0
+        buffer: List[bytes] = []
+        buffered: int = 0
+        try:
+            async for chunk in chunks:
+                buffer.append(chunk)
+                buffered += len(chunk)
+                if buffered >= STREAM_FLUSH_SIZE:
+                    await self.async_run(localfile.writelines, buffer)
+                    written += buffered
+                    buffer, buffered = [], 0
+            if buffer:
+                await self.async_run(localfile.writelines, buffer)
+                written += buffered
+        finally:
+            await self.async_run(localfile.close)
+        return written
+
+    async def async_delete(self, path: str) -> bool:
+        """Delete path by moving it to the trash and emptying it in the background.
+
+        Args:
+            path (str): File or directory to delete
+
+        Returns:
+            bool: Whether path existed
+        """
+        try:
+            existed: bool = await self.async_run(move_to_trash, path)
+        except OSError as ex:
+            _LOGGER.debug(
+                "Unable to move %s to trash, deleting in place: %s",
+                path,
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            await self.async_run(shutil.rmtree, path, True)
+            return True
+        if existed:
+            self.schedule_cleanup(path)
+        return existed
+
+    def schedule_cleanup(self, path: str) -> None:
+        """Empty the trash directory of path in the background.
+
+        Args:
+            path (str): Path moved to the trash with move_to_trash
+        """
+        cleanup = asyncio.ensure_future(self.async_run(empty_trash, trash_path(path)))
+        self._cleanups.add(cleanup)
+        cleanup.add_done_callback(self._cleanups.discard)
+
+    async def async_wait_cleanups(self) -> None:
+        """Wait for background trash cleanups to finish."""
+        if self._cleanups:
+            await asyncio.gather(*self._cleanups, return_exceptions=True)
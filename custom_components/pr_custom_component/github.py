@@ -0,0 +1,567 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+GitHub Client
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import asyncio
+from http import HTTPStatus
+import logging
+import random
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import aiohttp
+import async_timeout
+import yarl
+
+from .cache import ResponseCache
+from .const import (
+    API_URL,
+    DEFAULT_RETRY_AFTER,
+    EXCEPTION_TEMPLATE,
+    GRAPHQL_PATH,
+    MAX_RATE_LIMIT_WAIT,
+    MAX_RETRIES,
+    RATE_LIMIT_PATH,
+    RATE_LIMIT_RESERVE,
+    RETRY_BACKOFF,
+    RETRY_MAX_BACKOFF,
+    SYNC_RETRY_LIMIT,
+)
+from .exceptions import RateLimitException
+from .stats import Span, SyncStats
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+TIMEOUT = 10
+
+RATE_LIMIT_REMAINING = "X-RateLimit-Remaining"
+RATE_LIMIT_RESET = "X-RateLimit-Reset"
+RETRY_AFTER = "Retry-After"
+
+RequestKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+T = TypeVar("T")
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return a jittered exponential backoff delay.
+
+    Args:
+        attempt (int): Retry attempt starting at 1
+
+    Returns:
+        float: Seconds to wait before the attempt
+    """
+    return random.uniform(  # nosec
+        0, min(RETRY_MAX_BACKOFF, RETRY_BACKOFF * 2 ** (attempt - 1))
+    )
+
+
+class RequestBudget:
+    """Requests and retries a single sync may use."""
+
+    def __init__(
+        self,
+        requests: Optional[int] = None,
+        retries: int = SYNC_RETRY_LIMIT,
+        stats: Optional[SyncStats] = None,
+    ) -> None:
+        """Initialize budget.
+
+        Args:
+            requests (Optional[int]): Number of requests allowed per rate limit
+                window, None if unlimited
+            retries (int): Number of retries allowed for the whole sync
+            stats (Optional[SyncStats]): Statistics of the sync to record into
+
+        """
+        self.remaining: Optional[int] = None if requests is None else max(requests, 0)
+        self.retries: int = retries
+        self.spent: int = 0
+        self.stats: SyncStats = stats if stats is not None else SyncStats()
+
+    @property
+    def exhausted(self) -> bool:
+        """Return whether no requests are left."""
+        return self.remaining is not None and self.remaining <= 0
+
+    def spend(self) -> bool:
+        """Spend a request and return whether the budget allowed it."""
+        if self.exhausted:
+            return False
+        if self.remaining is not None:
+            self.remaining -= 1
+        self.spent += 1
+        return True
+
+    def refund(self) -> None:
+        """Return a request that did not count against the rate limit."""
+        if self.remaining is not None:
+            self.remaining += 1
+        self.spent -= 1
+
+    def retry(self) -> bool:
+        """Spend a retry and return whether the budget allowed it."""
+        if self.retries <= 0:
+            return False
+        self.retries -= 1
+        self.stats.retries += 1
+        return True
+
+
+class GitHubClient:
+    """GitHub request client shared by every entry and config flow.
+
+    Concurrent identical GET requests are coalesced into a single in-flight request
+    (single-flight) whose result is returned to every caller, and responses are
+    revalidated against a shared conditional request cache.
+
+    The rate limit headers of every response are tracked so requests wait for a
+    short reset instead of failing. When the wait would be too long a
+    RateLimitException carrying the reset time is raised so the caller can defer
+    its work.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        cache: Optional[ResponseCache] = None,
+        api_url: Union[str, yarl.URL] = API_URL,
+    ) -> None:
+        """Initialize GitHub client.
+
+        Args:
+            session (aiohttp.ClientSession): Websession to use
+            cache (Optional[ResponseCache]): Conditional request cache to use
+            api_url (Union[str, yarl.URL]): Base url of the REST and GraphQL APIs,
+                e.g., a local server for benchmarks
+
+        """
+        self._session: aiohttp.ClientSession = session
+        self._api_url: yarl.URL = yarl.URL(api_url)
+        self._cache: ResponseCache = cache if cache is not None else ResponseCache()
+        self._inflight: Dict[RequestKey, asyncio.Future] = {}
+        self._remaining: Optional[int] = None
+        self._reset: float = 0.0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the websession."""
+        return self._session
+
+    @property
+    def api_url(self) -> yarl.URL:
+        """Return the base url of the APIs."""
+        return self._api_url
+
+    @property
+    def cache(self) -> ResponseCache:
+        """Return the response cache."""
+        return self._cache
+
+    @property
+    def remaining(self) -> Optional[int]:
+        """Return requests left in the current rate limit window if known."""
+        if self._reset and self._reset <= time.time():
+            return None
+        return self._remaining
+
+    @property
+    def reset(self) -> float:
+        """Return epoch time the rate limit window resets, 0 if unknown."""
+        return self._reset
+
+    def update_rate_limit(self, headers: Mapping[str, str]) -> None:
+        """Update the rate limit from response headers.
+
+        Args:
+            headers (Mapping[str, str]): Response headers
+
+        """
+        try:
+            if RATE_LIMIT_REMAINING in headers:
+                self._remaining = int(headers[RATE_LIMIT_REMAINING])
+            if RATE_LIMIT_RESET in headers:
+                self._reset = float(headers[RATE_LIMIT_RESET])
+            if RETRY_AFTER in headers:
+                self._remaining = 0
+                self._reset = max(
+                    self._reset, time.time() + float(headers[RETRY_AFTER])
+                )
+        except ValueError as ex:
+            _LOGGER.debug(
+                "Unable to parse rate limit headers: %s",
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+
+    async def async_probe_rate_limit(
+        self, headers: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """Update the rate limit from the rate_limit endpoint.
+
+        Requests to the endpoint do not count against the rate limit.
+
+        Args:
+            headers (Optional[Dict[str, str]]): Request headers, e.g., authorization
+
+        Returns:
+            bool: Whether the rate limit was updated
+        """
+        url = self._api_url / RATE_LIMIT_PATH
+        try:
+            async with async_timeout.timeout(TIMEOUT):
+                response = await self._session.get(url, headers=headers or {})
+                response_json = await response.json()
+            core = response_json["resources"]["core"]
+            self._remaining = int(core["remaining"])
+            self._reset = float(core["reset"])
+        except (
+            asyncio.TimeoutError,
+            aiohttp.ClientError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as ex:
+            _LOGGER.debug(
+                "Unable to probe rate limit: %s",
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return False
+        _LOGGER.debug(
+            "Rate limit has %s requests left until %s",
+            self._remaining,
+            time.ctime(self._reset),
+        )
+        return True
+
+    async def async_graphql(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Return the data of a GraphQL query.
+
+        GraphQL has its own rate limit so the response is not tracked.
+
+        Args:
+            query (str): GraphQL query
+            variables (Optional[Dict[str, Any]]): Query variables
+            headers (Optional[Dict[str, str]]): Request headers, must authorize
+
+        Raises:
+            aiohttp.ClientResponseError: The request failed
+
+        Returns:
+            Dict[str, Any]: Query data, fields that failed are None
+        """
+        url = self._api_url / GRAPHQL_PATH
+        async with async_timeout.timeout(TIMEOUT):
+            response = await self._session.post(
+                url,
+                headers=headers or {},
+                json={"query": query, "variables": variables or {}},
+            )
+            response.raise_for_status()
+            response_json = await response.json()
+        for error in response_json.get("errors") or []:
+            _LOGGER.debug("GraphQL error: %s", error.get("message"))
+        return response_json.get("data") or {}
+
+    def create_budget(self, stats: Optional[SyncStats] = None) -> RequestBudget:
+        """Return a request budget for a sync.
+
+        The budget is the known remaining requests less a reserve kept for polling
+        other entries and is unlimited if the rate limit is unknown.
+
+        Args:
+            stats (Optional[SyncStats]): Statistics of the sync to record into
+
+        Returns:
+            RequestBudget: Budget for the sync
+        """
+        remaining = self.remaining
+        if remaining is None:
+            return RequestBudget(stats=stats)
+        return RequestBudget(remaining - RATE_LIMIT_RESERVE, stats=stats)
+
+    async def async_acquire(
+        self,
+        budget: Optional[RequestBudget] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Wait until a request may be sent.
+
+        Args:
+            budget (Optional[RequestBudget]): Budget of the sync sending the request
+            headers (Optional[Dict[str, str]]): Request headers used for probing
+
+        Raises:
+            RateLimitException: The rate limit resets later than MAX_RATE_LIMIT_WAIT
+
+        """
+        while True:
+            if self.remaining != 0 and (budget is None or budget.spend()):
+                if self._remaining:
+                    self._remaining -= 1
+                return
+            if self._reset <= time.time() and await self.async_probe_rate_limit(
+                headers
+            ):
+                if self.remaining:
+                    if budget is not None and budget.exhausted:
+                        budget.remaining = max(
+                            self.remaining - RATE_LIMIT_RESERVE, budget.spent
+                        )
+                    continue
+            wait: float = self._reset - time.time()
+            if wait <= 0:
+                wait = DEFAULT_RETRY_AFTER
+                self._reset = time.time() + wait
+            if wait > MAX_RATE_LIMIT_WAIT:
+                raise RateLimitException(
+                    f"Rate limited until {time.ctime(self._reset)}", self._reset
+                )
+            _LOGGER.debug("Waiting %.0f seconds for rate limit reset", wait)
+            await asyncio.sleep(wait)
+            self._remaining = None
+            if budget is not None and budget.exhausted:
+                # New window; allow the sync the same share again
+                budget.remaining = max(budget.spent, 1)
+
+    async def async_get(
+        self,
+        url: Union[str, yarl.URL],
+        headers: Optional[Dict[str, str]] = None,
+        budget: Optional[RequestBudget] = None,
+    ) -> Any:
+        """Return the decoded JSON body of a GET request.
+
+        Callers requesting the same url with the same headers while a request is
+        in flight share its result, including any exception it raises. Cancelling
+        one caller does not cancel the shared request.
+
+        Args:
+            url (Union[str, yarl.URL]): Url to get
+            headers (Optional[Dict[str, str]]): Request headers
+            budget (Optional[RequestBudget]): Budget of the sync sending the request
+
+        Raises:
+            RateLimitException: GitHub rate limit was exceeded
+
+        Returns:
+            Any: Decoded JSON body
+        """
+        headers = headers or {}
+        key: RequestKey = (str(url), tuple(sorted(headers.items())))
+        request = self._inflight.get(key)
+        if request is None:
+            request = asyncio.ensure_future(self._async_get(url, headers, budget))
+            self._inflight[key] = request
+            request.add_done_callback(lambda task: self._request_done(key, task))
+        else:
+            _LOGGER.debug("Joining in-flight request for %s", url)
+        return await asyncio.shield(request)
+
+    def _request_done(self, key: RequestKey, task: asyncio.Future) -> None:
+        """Remove a finished request from the in-flight requests."""
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key)
+        if not task.cancelled():
+            # Retrieve the exception so it is not reported if every caller left
+            task.exception()
+
+    async def _async_get(
+        self,
+        url: Union[str, yarl.URL],
+        headers: Dict[str, str],
+        budget: Optional[RequestBudget],
+    ) -> Any:
+        """Perform a GET request revalidating any cached response."""
+        cache_key = str(url)
+        restored = self._cache.get_restored(cache_key)
+        if restored is not None:
+            _LOGGER.debug("Using %s saved before restart", url)
+            with self._span(budget, url) as span:
+                span.cache_hit = True
+            if budget is not None:
+                budget.stats.record_cache_hit(sent=False)
+            return restored.body
+        attempt: int = 0
+        while True:
+            await self.async_acquire(budget, headers)
+            try:
+                with self._span(budget, url) as span:
+                    async with async_timeout.timeout(TIMEOUT):
+                        response = await self._session.get(
+                            url,
+                            headers={
+                                **headers,
+                                **self._cache.conditional_headers(cache_key),
+                            },
+                        )
+                        self.update_rate_limit(response.headers)
+                        span.status = response.status
+                        span.cache_hit = False
+                        if budget is not None:
+                            budget.stats.record_request()
+                        if response.status == HTTPStatus.NOT_MODIFIED:
+                            cached = self._cache.get(cache_key)
+                            if cached is not None:
+                                _LOGGER.debug("%s not modified; using cache", url)
+                                self._cache.revalidated(cache_key)
+                                span.cache_hit = True
+                                if budget is not None:
+                                    budget.refund()
+                                    budget.stats.record_cache_hit()
+                                return cached.body
+                        if response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                            if not self._can_retry(attempt, budget):
+                                response.raise_for_status()
+                            reason: str = f"status {response.status}"
+                        else:
+                            response_json = await response.json()
+                            span.bytes = len(await response.read())
+                            if budget is not None:
+                                budget.stats.bytes_received += span.bytes
+                            if not self._is_rate_limited(
+                                response.status, response_json
+                            ):
+                                break
+                            _LOGGER.warning("Rate limited by GitHub fetching %s", url)
+                            self._remaining = 0
+                            continue
+            except aiohttp.ContentTypeError:
+                raise
+            except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+                if not self._can_retry(attempt, budget):
+                    raise
+                reason = EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args)
+            attempt += 1
+            await self._async_backoff(url, attempt, reason)
+        if response.status == HTTPStatus.OK:
+            self._cache.store(cache_key, response.headers, response_json)
+        return response_json
+
+    async def async_stream(
+        self,
+        url: Union[str, yarl.URL],
+        sink: Callable[[aiohttp.ClientResponse], Awaitable[T]],
+        headers: Optional[Dict[str, str]] = None,
+        budget: Optional[RequestBudget] = None,
+    ) -> T:
+        """Stream the body of a GET request to sink.
+
+        Streamed bodies are neither cached nor shared. The request is retried like
+        async_get, including when sink raises a network error, so sink must start
+        over each time it is called. The bytes received are recorded in the stats
+        of budget.
+
+        Args:
+            url (Union[str, yarl.URL]): Url to get
+            sink (Callable[[aiohttp.ClientResponse], Awaitable[T]]): Consumes a
+                successful response, e.g., by writing its content to disk
+            headers (Optional[Dict[str, str]]): Request headers
+            budget (Optional[RequestBudget]): Budget of the sync sending the request
+
+        Raises:
+            RateLimitException: GitHub rate limit was exceeded
+            aiohttp.ClientResponseError: The request failed
+
+        Returns:
+            T: Result of sink
+        """
+        attempt: int = 0
+        while True:
+            await self.async_acquire(budget, headers)
+            try:
+                async with self._session.get(
+                    url,
+                    headers=headers or {},
+                    timeout=aiohttp.ClientTimeout(total=None, sock_read=TIMEOUT),
+                ) as response:
+                    self.update_rate_limit(response.headers)
+                    if budget is not None:
+                        budget.stats.record_request()
+                    if self._is_rate_limited(response.status, None):
+                        _LOGGER.warning("Rate limited by GitHub fetching %s", url)
+                        self._remaining = 0
+                        continue
+                    if response.status >= HTTPStatus.INTERNAL_SERVER_ERROR:
+                        if not self._can_retry(attempt, budget):
+                            response.raise_for_status()
+                        reason: str = f"status {response.status}"
+                    else:
+                        response.raise_for_status()
+                        try:
+                            return await sink(response)
+                        finally:
+                            if budget is not None:
+                                # Includes a body cut short by a network error
+                                budget.stats.bytes_received += (
+                                    response.content.total_bytes
+                                )
+            except aiohttp.ClientResponseError:
+                raise
+            except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+                if not self._can_retry(attempt, budget):
+                    raise
+                reason = EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args)
+            attempt += 1
+            await self._async_backoff(url, attempt, reason)
+
+    @staticmethod
+    def _span(budget: Optional[RequestBudget], url: Union[str, yarl.URL]) -> Span:
+        """Return a request span recorded in the timeline of the budget's sync."""
+        if budget is None:
+            return Span("request", str(url))
+        return budget.stats.span("request", str(url))
+
+    @staticmethod
+    async def _async_backoff(
+        url: Union[str, yarl.URL], attempt: int, reason: str
+    ) -> None:
+        """Wait before retrying a failed request."""
+        delay: float = backoff_delay(attempt)
+        _LOGGER.debug(
+            "Retrying %s in %.1f seconds after %s (attempt %s of %s)",
+            url,
+            delay,
+            reason,
+            attempt,
+            MAX_RETRIES,
+        )
+        await asyncio.sleep(delay)
+
+    @staticmethod
+    def _can_retry(attempt: int, budget: Optional[RequestBudget]) -> bool:
+        """Return whether a failed request may be retried."""
+        return attempt < MAX_RETRIES and (budget is None or budget.retry())
+
+    def _is_rate_limited(self, status: int, response_json: Any) -> bool:
+        """Return whether a response was rejected by the rate limit."""
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            return True
+        if status == HTTPStatus.FORBIDDEN and self._remaining == 0:
+            return True
+        return bool(
+            response_json
+            and isinstance(response_json, dict)
+            and isinstance(response_json.get("message"), str)
+            and response_json["message"].startswith("API rate limit exceeded")
+        )
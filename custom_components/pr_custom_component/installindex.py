@@ -0,0 +1,144 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Install Index
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from .integrity import IGNORED_FILES
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# Keys of the pull data used to restore an entry, mirroring the poller's shape
+PULL_KEYS = ("number", "state", "merged", "updated_at")
+HEAD_KEYS = ("ref", "sha")
+
+
+def trim_pull(pull_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the parts of the pull data needed to restore an entry."""
+    head: Dict[str, Any] = pull_json.get("head", {})
+    repo: Dict[str, Any] = head.get("repo") or {}
+    return {
+        **{key: pull_json[key] for key in PULL_KEYS if key in pull_json},
+        "labels": [{"name": label["name"]} for label in pull_json.get("labels", [])],
+        "head": {
+            **{key: head[key] for key in HEAD_KEYS if key in head},
+            "user": {"login": head.get("user", {}).get("login", "")},
+            "repo": {
+                "url": repo.get("url", ""),
+                "contents_url": repo.get("contents_url", ""),
+            },
+        },
+    }
+
+
+def scan_tree(path: str) -> Dict[str, List[int]]:
+    """Return the size and mtime in ns of every component file under path.
+
+    Uses a single os.scandir walk so no file is opened. This is blocking.
+
+    Args:
+        path (str): Directory of the component
+
+    Returns:
+        Dict[str, List[int]]: Size and mtime keyed by relative path
+    """
+    files: Dict[str, List[int]] = {}
+    directories: List[str] = [""]
+    while directories:
+        relative: str = directories.pop()
+        with os.scandir(os.path.join(path, relative)) as entries:
+            for entry in entries:
+                name: str = os.path.join(relative, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != "__pycache__":
+                        directories.append(name)
+                elif entry.is_file() and name not in IGNORED_FILES:
+                    stat = entry.stat()
+                    files[name] = [stat.st_size, stat.st_mtime_ns]
+    return files
+
+
+def tree_matches(path: str, files: Dict[str, List[Any]]) -> bool:
+    """Return whether the files under path are exactly the recorded ones.
+
+    Files are compared by size and mtime only. This is blocking.
+
+    Args:
+        path (str): Directory of the component
+        files (Dict[str, List[Any]]): Blob sha, size and mtime keyed by relative
+            path
+
+    """
+    try:
+        scanned: Dict[str, List[int]] = scan_tree(path)
+    except OSError:
+        return False
+    return scanned.keys() == files.keys() and all(
+        scanned[name] == record[1:] for name, record in files.items()
+    )
+
+
+class InstallIndex:
+    """Record of what each entry installed, saved across restarts.
+
+    A record holds the pull data the component was synced from, the installed
+    commit and the blob sha, size and mtime of each installed file. At startup an
+    entry whose files still match its record is restored without any request.
+    The index is saved with as_dict and restored with load.
+    """
+
+    def __init__(self) -> None:
+        """Initialize install index."""
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self.on_change: Optional[Callable[[], None]] = None
+
+    def __len__(self) -> int:
+        """Return number of records."""
+        return len(self._records)
+
+    def get(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        """Return the record of an entry if there is one."""
+        return self._records.get(entry_id)
+
+    def set(self, entry_id: str, record: Dict[str, Any]) -> None:
+        """Replace the record of an entry."""
+        self._records[entry_id] = record
+        self._changed()
+
+    def remove(self, entry_id: str) -> None:
+        """Remove the record of an entry."""
+        if self._records.pop(entry_id, None) is not None:
+            self._changed()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the records for saving."""
+        return {"entries": self._records}
+
+    def load(self, data: Optional[Dict[str, Any]]) -> None:
+        """Restore records saved with as_dict.
+
+        Args:
+            data (Optional[Dict[str, Any]]): Saved index
+
+        """
+        entries = (data or {}).get("entries", {})
+        if isinstance(entries, dict):
+            self._records.update(
+                (entry_id, record)
+                for entry_id, record in entries.items()
+                if isinstance(record, dict)
+            )
+        _LOGGER.debug("Restored %s install records", len(self._records))
+
+    def _changed(self) -> None:
+        """Notify the change listener."""
+        if self.on_change is not None:
+            self.on_change()
@@ -0,0 +1,100 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Integrity of installed components
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import os
+from typing import Dict, List, Optional
+
+from .blobstore import git_blob_sha_file
+from .const import (
+    INTEGRITY_FILE,
+    SHA_INDEX_FILE,
+    VERIFY_MISSING,
+    VERIFY_MODIFIED,
+    VERIFY_WORKERS,
+)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+# Bookkeeping files that are not part of the component
+IGNORED_FILES = {INTEGRITY_FILE, SHA_INDEX_FILE}
+
+
+def _list_files(path: str) -> List[str]:
+    """Return the relative paths of the component files under path."""
+    files: List[str] = []
+    for root, dirs, names in os.walk(path):
+        dirs[:] = sorted(name for name in dirs if name != "__pycache__")
+        for name in sorted(names):
+            if root == path and name in IGNORED_FILES:
+                continue
+            files.append(os.path.relpath(os.path.join(root, name), path))
+    return files
+
+
+def _hash(path: str, files: List[str], workers: int) -> Dict[str, Optional[str]]:
+    """Return the git blob sha of each file under path, None if unreadable."""
+
+    def hash_file(name: str) -> Optional[str]:
+        try:
+            return git_blob_sha_file(os.path.join(path, name))
+        except OSError:
+            return None
+
+    if not files:
+        return {}
+    # hashlib releases the GIL so threads hash in parallel
+    with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        return dict(zip(files, executor.map(hash_file, files)))
+
+
+def hash_tree(path: str, workers: int = VERIFY_WORKERS) -> Dict[str, str]:
+    """Return the git blob sha of every component file under path.
+
+    This is blocking.
+
+    Args:
+        path (str): Directory of the component
+        workers (int): Threads hashing files
+
+    Returns:
+        Dict[str, str]: Blob sha keyed by relative path
+    """
+    return {
+        name: sha
+        for name, sha in _hash(path, _list_files(path), workers).items()
+        if sha is not None
+    }
+
+
+def find_damaged(
+    path: str, files: Dict[str, str], workers: int = VERIFY_WORKERS
+) -> Dict[str, str]:
+    """Return the recorded files under path that are missing or modified.
+
+    This is blocking.
+
+    Args:
+        path (str): Directory of the component
+        files (Dict[str, str]): Recorded blob sha keyed by relative path
+        workers (int): Threads hashing files
+
+    Returns:
+        Dict[str, str]: VERIFY_MISSING or VERIFY_MODIFIED keyed by relative path
+    """
+    damaged: Dict[str, str] = {}
+    for name, sha in _hash(path, list(files), workers).items():
+        if sha is None:
+            damaged[name] = VERIFY_MISSING
+        elif sha != files[name]:
+            damaged[name] = VERIFY_MODIFIED
+    _LOGGER.debug("Verified %s files in %s; %s damaged", len(files), path, len(damaged))
+    return damaged
@@ -0,0 +1,254 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Patch Overlay
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+import homeassistant.components
+
+from .exceptions import PatchError
+
+# Built-in components shipped with the running Home Assistant
+BUILTIN_COMPONENTS_PATH = os.path.dirname(homeassistant.components.__file__)
+
+HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+NULL_PATH = "/dev/null"
+
+
+class Hunk:
+    """Change to a contiguous block of lines."""
+
+    def __init__(self, old_start: int) -> None:
+        """Initialize hunk.
+
+        Args:
+            old_start (int): First line of the hunk in the original file, 1 based
+
+        """
+        self.old_start: int = old_start
+        self.old: List[str] = []
+        self.new: List[str] = []
+
+
+class FilePatch:
+    """Changes to a single file."""
+
+    def __init__(self, old_path: str = "", new_path: str = "") -> None:
+        """Initialize file patch.
+
+        Args:
+            old_path (str): Repository path before the change, empty if created
+            new_path (str): Repository path after the change, empty if deleted
+
+        """
+        self.old_path: str = old_path
+        self.new_path: str = new_path
+        self.hunks: List[Hunk] = []
+        self.binary: bool = False
+
+
+def _diff_path(path: str) -> str:
+    """Return a repository path from a ---/+++ line path."""
+    path = path.rstrip("\r\n").split("\t")[0]
+    if path == NULL_PATH:
+        return ""
+    if path[:2] in ("a/", "b/"):
+        return path[2:]
+    return path
+
+
+def parse_patch(text: str) -> List[FilePatch]:
+    """Parse a git unified diff or format-patch series.
+
+    Files changed by several commits of a series appear once per commit, in order.
+
+    Args:
+        text (str): Patch text
+
+    Returns:
+        List[FilePatch]: Parsed file patches
+    """
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    lines: List[str] = text.splitlines(keepends=True)
+    index: int = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        if line.startswith("diff --git "):
+            old_path, _sep, new_path = line.rstrip("\r\n")[11:].partition(" b/")
+            current = FilePatch(_diff_path(old_path), new_path)
+            patches.append(current)
+        elif current is None:
+            continue
+        elif line.startswith("--- "):
+            current.old_path = _diff_path(line[4:])
+        elif line.startswith("+++ "):
+            current.new_path = _diff_path(line[4:])
+        elif line.startswith("new file mode"):
+            current.old_path = ""
+        elif line.startswith("deleted file mode"):
+            current.new_path = ""
+        elif line.startswith("rename from "):
+            current.old_path = line[12:].rstrip("\r\n")
+        elif line.startswith("rename to "):
+            current.new_path = line[10:].rstrip("\r\n")
+        elif line.startswith(("GIT binary patch", "Binary files ")):
+            current.binary = True
+        else:
+            match = HUNK_RE.match(line)
+            if match is None:
+                continue
+            hunk = Hunk(int(match.group(1)))
+            old_left: int = int(match.group(2) or 1)
+            new_left: int = int(match.group(4) or 1)
+            last_tag: str = ""
+            while index < len(lines):
+                line = lines[index]
+                if line.startswith("\\"):
+                    # "\ No newline at end of file" applies to the previous line
+                    if last_tag in (" ", "-") and hunk.old:
+                        hunk.old[-1] = hunk.old[-1].rstrip("\r\n")
+                    if last_tag in (" ", "+") and hunk.new:
+                        hunk.new[-1] = hunk.new[-1].rstrip("\r\n")
+                    index += 1
+                    continue
+                if old_left <= 0 and new_left <= 0:
+                    break
+                tag = line[:1] if line not in ("\n", "\r\n") else " "
+                body = line[1:] if line not in ("\n", "\r\n") else line
+                if tag == " ":
+                    hunk.old.append(body)
+                    hunk.new.append(body)
+                    old_left -= 1
+                    new_left -= 1
+                elif tag == "-":
+                    hunk.old.append(body)
+                    old_left -= 1
+                elif tag == "+":
+                    hunk.new.append(body)
+                    new_left -= 1
+                else:
+                    break
+                last_tag = tag
+                index += 1
+            current.hunks.append(hunk)
+    return patches
+
+
+def _find_block(lines: List[str], block: List[str], expected: int) -> Optional[int]:
+    """Return the position of block in lines closest to expected."""
+    if not block:
+        return min(max(expected, 0), len(lines))
+    size = len(block)
+    for distance in range(len(lines) + 1):
+        for position in (expected - distance, expected + distance):
+            if (
+                0 <= position <= len(lines) - size
+                and lines[position : position + size] == block
+            ):
+                return position
+            if not distance:
+                break
+    return None
+
+
+def apply_hunks(lines: List[str], hunks: List[Hunk]) -> List[str]:
+    """Apply hunks to lines.
+
+    Hunks may apply at an offset from their recorded position, e.g., when the
+    installed file differs from the Pull Request base elsewhere, but their context
+    must match exactly.
+
+    Args:
+        lines (List[str]): Original lines with line endings
+        hunks (List[Hunk]): Hunks in file order
+
+    Raises:
+        PatchError: A hunk does not apply
+
+    Returns:
+        List[str]: Patched lines
+    """
+    result: List[str] = list(lines)
+    offset: int = 0
+    for hunk in hunks:
+        # A hunk without original lines inserts after old_start
+        expected: int = hunk.old_start - (1 if hunk.old else 0) + offset
+        position = _find_block(result, hunk.old, expected)
+        if position is None:
+            raise PatchError(f"Hunk at line {hunk.old_start} does not apply")
+        result[position : position + len(hunk.old)] = hunk.new
+        offset += position - expected + len(hunk.new) - len(hunk.old)
+    return result
+
+
+def _read_tree(path: str) -> Dict[str, bytes]:
+    """Return the contents of every file under path keyed by relative path."""
+    files: Dict[str, bytes] = {}
+    for root, dirs, file_names in os.walk(path):
+        dirs[:] = [name for name in dirs if name != "__pycache__"]
+        for file_name in file_names:
+            full_path = os.path.join(root, file_name)
+            with open(full_path, "rb") as source:
+                files[
+                    os.path.relpath(full_path, path).replace(os.sep, "/")
+                ] = source.read()
+    return files
+
+
+def patch_component(
+    text: str, prefix: str, source: str
+) -> Tuple[Dict[str, bytes], Set[str]]:
+    """Return the files of a component after applying a Pull Request patch.
+
+    This is blocking and must be run in an executor.
+
+    Args:
+        text (str): Patch text
+        prefix (str): Repository path of the component, e.g.,
+            homeassistant/components/tesla/
+        source (str): Local path of the original component, e.g., the built-in one
+
+    Raises:
+        PatchError: The patch does not apply to the original component
+
+    Returns:
+        Tuple[Dict[str, bytes], Set[str]]: Contents of every file keyed by path
+            relative to the component and paths deleted by the patch
+    """
+    files: Dict[str, bytes] = _read_tree(source) if os.path.isdir(source) else {}
+    deleted: Set[str] = set()
+    for file_patch in parse_patch(text):
+        old_path: str = file_patch.old_path
+        new_path: str = file_patch.new_path
+        if not old_path.startswith(prefix) and not new_path.startswith(prefix):
+            continue
+        if file_patch.binary:
+            raise PatchError(f"Binary change to {new_path or old_path}")
+        lines: List[str] = []
+        if old_path:
+            if not old_path.startswith(prefix):
+                raise PatchError(f"{new_path} is moved into the component")
+            old_name: str = old_path[len(prefix) :]
+            if old_name not in files:
+                raise PatchError(f"{old_name} does not exist")
+            try:
+                lines = files.pop(old_name).decode("utf-8").splitlines(keepends=True)
+            except UnicodeDecodeError as ex:
+                raise PatchError(f"{old_name} is not text") from ex
+            deleted.add(old_name)
+        new_lines: List[str] = apply_hunks(lines, file_patch.hunks)
+        if new_path.startswith(prefix):
+            new_name: str = new_path[len(prefix) :]
+            files[new_name] = "".join(new_lines).encode("utf-8")
+            deleted.discard(new_name)
+    return files, deleted
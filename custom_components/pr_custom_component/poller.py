@@ -0,0 +1,215 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Batched Pull Request Poller
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+import yarl
+
+from .const import (
+    API_DOMAIN,
+    API_PATH_PREFIX,
+    BATCH_DELAY,
+    BATCH_MAX_AGE,
+    EXCEPTION_TEMPLATE,
+    GRAPHQL_BATCH_SIZE,
+)
+from .github import GitHubClient
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+PULL_REQUEST_FIELDS = """
+number
+updatedAt
+state
+headRefName
+headRefOid
+headRepository { nameWithOwner }
+headRepositoryOwner { login }
+labels(first: 100) { nodes { name } }
+"""
+
+
+def parse_pull_url(pull_url: yarl.URL) -> Optional[Tuple[str, str, int]]:
+    """Return owner, repository and number of a pull request url.
+
+    Args:
+        pull_url (yarl.URL): URL of pull request, e.g.,
+            https://github.com/home-assistant/core/pull/46558
+
+    Returns:
+        Optional[Tuple[str, str, int]]: Owner, repository and number or None if the
+            url is not a pull request
+    """
+    parts = pull_url.parts
+    if len(parts) < 5 or parts[3] != "pull":
+        return None
+    try:
+        return parts[1], parts[2], int(parts[4])
+    except ValueError:
+        return None
+
+
+def to_pull_json(pull_request: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a GraphQL pull request into the subset of the REST pull data used.
+
+    Args:
+        pull_request (Dict[str, Any]): GraphQL pullRequest with PULL_REQUEST_FIELDS
+
+    Returns:
+        Dict[str, Any]: Pull data shaped like the REST pulls endpoint
+    """
+    repo_url = yarl.URL.build(
+        scheme="https",
+        host=API_DOMAIN,
+        path=f"/{API_PATH_PREFIX}/{pull_request['headRepository']['nameWithOwner']}",
+    )
+    return {
+        "number": pull_request["number"],
+        "updated_at": pull_request["updatedAt"],
+        "state": "open" if pull_request["state"] == "OPEN" else "closed",
+        "merged": pull_request["state"] == "MERGED",
+        "labels": [
+            {"name": label["name"]} for label in pull_request["labels"]["nodes"]
+        ],
+        "head": {
+            "ref": pull_request["headRefName"],
+            "sha": pull_request["headRefOid"],
+            "user": {"login": pull_request["headRepositoryOwner"]["login"]},
+            "repo": {
+                "url": str(repo_url),
+                "contents_url": f"{repo_url}/contents/{{+path}}",
+            },
+        },
+    }
+
+
+class PullRequestPoller:
+    """Poll every registered pull request with one GraphQL query.
+
+    The first coordinator to refresh starts a batch after BATCH_DELAY so others
+    refreshing at the same time join it. The batch queries every registered pull
+    request, so coordinators refreshing within BATCH_MAX_AGE reuse its results
+    without another request. GraphQL requires a token; without one callers fall
+    back to the REST API.
+    """
+
+    def __init__(self, github: GitHubClient) -> None:
+        """Initialize poller.
+
+        Args:
+            github (GitHubClient): Shared GitHub client
+
+        """
+        self._github: GitHubClient = github
+        self._pulls: Set[str] = set()
+        self._results: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._batch: Optional[asyncio.Future] = None
+
+    def register(self, pull_url: yarl.URL) -> None:
+        """Include a pull request in batches."""
+        if parse_pull_url(pull_url) is not None:
+            self._pulls.add(str(pull_url))
+
+    def unregister(self, pull_url: yarl.URL) -> None:
+        """Stop including a pull request in batches."""
+        self._pulls.discard(str(pull_url))
+        self._results.pop(str(pull_url), None)
+
+    def invalidate(self, pull_url: yarl.URL) -> None:
+        """Drop the polled result of a pull request so it is fetched again."""
+        self._results.pop(str(pull_url), None)
+
+    async def async_get_pull(
+        self, pull_url: yarl.URL, token: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """Return pull data for a registered pull request.
+
+        Args:
+            pull_url (yarl.URL): URL of pull request
+            token (str): GitHub token
+
+        Returns:
+            Optional[Dict[str, Any]]: Pull data shaped like the REST pulls endpoint
+                or None if it must be fetched with the REST API
+        """
+        key = str(pull_url)
+        if not token or key not in self._pulls:
+            return None
+        result = self._results.get(key)
+        if result is None or time.time() - result[0] > BATCH_MAX_AGE:
+            if self._batch is None or self._batch.done():
+                self._batch = asyncio.ensure_future(self._async_poll(token))
+            await asyncio.shield(self._batch)
+            result = self._results.get(key)
+        return result[1] if result is not None else None
+
+    async def _async_poll(self, token: str) -> None:
+        """Query every registered pull request."""
+        await asyncio.sleep(BATCH_DELAY)
+        pulls: List[str] = sorted(self._pulls)
+        for start in range(0, len(pulls), GRAPHQL_BATCH_SIZE):
+            await self._async_poll_batch(
+                pulls[start : start + GRAPHQL_BATCH_SIZE], token
+            )
+
+    async def _async_poll_batch(self, pulls: List[str], token: str) -> None:
+        """Query a batch of pull requests using one aliased GraphQL query."""
+        variables: Dict[str, Any] = {}
+        definitions: List[str] = []
+        fields: List[str] = []
+        aliases: Dict[str, str] = {}
+        for index, pull in enumerate(pulls):
+            parsed = parse_pull_url(yarl.URL(pull))
+            if parsed is None:
+                continue
+            owner, name, number = parsed
+            alias = f"pr{index}"
+            aliases[alias] = pull
+            variables.update(
+                {f"owner{index}": owner, f"name{index}": name, f"number{index}": number}
+            )
+            definitions.append(
+                f"$owner{index}: String!, $name{index}: String!, $number{index}: Int!"
+            )
+            fields.append(
+                f"{alias}: repository(owner: $owner{index}, name: $name{index}) "
+                f"{{ pullRequest(number: $number{index}) {{ {PULL_REQUEST_FIELDS} }} }}"
+            )
+        if not aliases:
+            return
+        query = f"query({', '.join(definitions)}) {{ {' '.join(fields)} }}"
+        try:
+            data = await self._github.async_graphql(
+                query, variables, {"Authorization": f"token {token}"}
+            )
+        except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+            _LOGGER.debug(
+                "Unable to poll pull requests: %s",
+                EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+            )
+            return
+        now = time.time()
+        for alias, pull in aliases.items():
+            try:
+                self._results[pull] = (
+                    now,
+                    to_pull_json(data[alias]["pullRequest"]),
+                )
+            except (KeyError, TypeError) as ex:
+                _LOGGER.debug(
+                    "No GraphQL data for %s: %s",
+                    pull,
+                    EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+                )
+        _LOGGER.debug("Polled %s pull requests in one query", len(aliases))
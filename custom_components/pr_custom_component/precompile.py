@@ -0,0 +1,103 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Bytecode precompilation
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import logging
+import multiprocessing
+import os
+import py_compile
+from typing import Dict, List, Optional
+
+from .const import PRECOMPILE_POOL_MIN_FILES, PRECOMPILE_WORKERS
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def find_sources(path: str) -> List[str]:
+    """Return the python files under path, skipping __pycache__. This is blocking."""
+    sources: List[str] = []
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(name for name in dirs if name != "__pycache__")
+        sources.extend(
+            os.path.join(root, name) for name in sorted(files) if name.endswith(".py")
+        )
+    return sources
+
+
+def _mp_context():
+    """Return a start method that does not fork the multithreaded event loop."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def precompile(
+    path: str, display_path: Optional[str] = None, workers: int = PRECOMPILE_WORKERS
+) -> Dict[str, str]:
+    """Write the __pycache__ bytecode of every python file under path.
+
+    Large trees are compiled in a process pool. The workers are started with
+    forkserver or spawn, so each one re-imports the main module of the parent,
+    i.e., Home Assistant, before running py_compile; the pool is only used when
+    the tree is large enough to repay that startup. This is blocking.
+
+    Args:
+        path (str): Directory to compile, e.g., the staging directory
+        display_path (Optional[str]): Directory path recorded in the bytecode for
+            tracebacks, e.g., where the staging directory will be installed
+        workers (int): Maximum number of worker processes
+
+    Returns:
+        Dict[str, str]: Error message keyed by relative path of each file that
+            does not compile
+    """
+    sources: List[str] = find_sources(path)
+    display_path = display_path or path
+    relative: List[str] = [os.path.relpath(source, path) for source in sources]
+    dfiles: List[str] = [os.path.join(display_path, name) for name in relative]
+    compile_file = functools.partial(py_compile.compile, doraise=False, quiet=2)
+    workers = min(workers, os.cpu_count() or 1, len(sources))
+    if workers > 1 and len(sources) >= PRECOMPILE_POOL_MIN_FILES:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=_mp_context()
+        ) as executor:
+            results = list(
+                executor.map(
+                    compile_file,
+                    sources,
+                    [None] * len(sources),
+                    dfiles,
+                    chunksize=max(len(sources) // (workers * 4), 1),
+                )
+            )
+    else:
+        results = [
+            compile_file(source, None, dfile) for source, dfile in zip(sources, dfiles)
+        ]
+    errors: Dict[str, str] = {}
+    for source, name, dfile, result in zip(sources, relative, dfiles, results):
+        if result is not None:
+            continue
+        # Compile again here to get the message the worker only printed
+        try:
+            py_compile.compile(source, dfile=dfile, doraise=True)
+        except py_compile.PyCompileError as ex:
+            errors[name] = ex.msg.strip()
+        except OSError as ex:
+            errors[name] = str(ex)
+    _LOGGER.debug(
+        "Compiled %s python files in %s with %s workers; %s failed",
+        len(sources),
+        path,
+        workers,
+        len(errors),
+    )
+    return errors
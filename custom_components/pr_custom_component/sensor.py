@@ -8,14 +8,60 @@ Sensor Platform
 For more details about this integration, please refer to
 https://github.com/alandtse/pr_custom_component
 """
-from .const import DOMAIN, ICON, SENSOR_DEVICE_CLASS
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import PERCENTAGE, UnitOfInformation, UnitOfTime
+from homeassistant.helpers.entity import EntityCategory
+
+from .const import DOMAIN, ICON, REQUIREMENTS_STATES, SENSOR_DEVICE_CLASS
 from .entity import PRCustomComponentApiClientEntity
 
+# Statistics of the last update: attribute, name, unit, device class, icon
+STAT_SENSORS = [
+    (
+        "duration",
+        "sync duration",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        "mdi:timer-outline",
+    ),
+    ("requests", "requests", None, None, "mdi:swap-vertical"),
+    (
+        "bytes_received",
+        "bytes transferred",
+        UnitOfInformation.BYTES,
+        SensorDeviceClass.DATA_SIZE,
+        "mdi:download",
+    ),
+    ("files_written", "files written", None, None, "mdi:file-multiple"),
+    ("cache_hit_ratio", "cache hit ratio", PERCENTAGE, None, "mdi:cached"),
+    ("retries", "retries", None, None, "mdi:reload-alert"),
+    (
+        "rate_limit_remaining",
+        "rate limit remaining",
+        None,
+        None,
+        "mdi:speedometer",
+    ),
+]
+
 
 async def async_setup_entry(hass, entry, async_add_devices):
     """Setup sensor platform."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_devices([PRCustomComponentApiClientSensor(coordinator, entry)])
+    async_add_devices(
+        [
+            PRCustomComponentApiClientSensor(coordinator, entry),
+            PRCustomComponentRequirementsSensor(coordinator, entry),
+        ]
+        + [
+            PRCustomComponentStatSensor(coordinator, entry, *stat)
+            for stat in STAT_SENSORS
+        ]
+    )
 
 
 class PRCustomComponentApiClientSensor(PRCustomComponentApiClientEntity):
@@ -40,3 +86,109 @@ class PRCustomComponentApiClientSensor(PRCustomComponentApiClientEntity):
     def icon(self):
         """Return the icon of the sensor."""
         return ICON
+
+
+class PRCustomComponentStatSensor(PRCustomComponentApiClientEntity, SensorEntity):
+    """PRCustomComponent diagnostic sensor reporting a statistic of the last update."""
+
+    def __init__(self, coordinator, config_entry, key, label, unit, device_class, icon):
+        """Initialize the sensor."""
+        super().__init__(coordinator, config_entry)
+        self._key = key
+        self._label = label
+        self._unit = unit
+        self._device_class = device_class
+        self._icon = icon
+
+    @property
+    def unique_id(self):
+        """Return a unique ID to use for this entity."""
+        return f"{self.config_entry.entry_id}_{self._key}"
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{super().name} {self._label}"
+
+    @property
+    def native_value(self):
+        """Return the value of the sensor."""
+        stats = self.coordinator.stats
+        if stats is None:
+            return None
+        return getattr(stats, self._key)
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit of the sensor."""
+        return self._unit
+
+    @property
+    def device_class(self):
+        """Return the class of this sensor."""
+        return self._device_class
+
+    @property
+    def state_class(self):
+        """Return the state class of this sensor."""
+        return SensorStateClass.MEASUREMENT
+
+    @property
+    def entity_category(self):
+        """Return the category of this sensor."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return self._icon
+
+
+class PRCustomComponentRequirementsSensor(
+    PRCustomComponentApiClientEntity, SensorEntity
+):
+    """PRCustomComponent diagnostic sensor reporting the requirements prefetch."""
+
+    @property
+    def unique_id(self):
+        """Return a unique ID to use for this entity."""
+        return f"{self.config_entry.entry_id}_requirements"
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return f"{super().name} requirements"
+
+    @property
+    def native_value(self):
+        """Return the prefetch state of the requirements."""
+        return self.coordinator.requirements_state
+
+    @property
+    def device_class(self):
+        """Return the class of this sensor."""
+        return SensorDeviceClass.ENUM
+
+    @property
+    def options(self):
+        """Return the possible states."""
+        return REQUIREMENTS_STATES
+
+    @property
+    def extra_state_attributes(self):
+        """Return the requirements, those not installed and the last error."""
+        return {
+            "requirements": self.coordinator.requirements,
+            "missing": self.coordinator.requirements_missing,
+            "error": self.coordinator.requirements_error,
+        }
+
+    @property
+    def entity_category(self):
+        """Return the category of this sensor."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:package-down"
@@ -0,0 +1,204 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Services
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import asyncio
+import cProfile
+import logging
+import time
+import tracemalloc
+from typing import List, Optional
+
+from homeassistant.components import persistent_notification
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+
+from .const import (
+    ATTR_DOWNLOAD,
+    ATTR_ENTRY_ID,
+    ATTR_REPAIR,
+    ATTR_TOP,
+    ATTR_TRACEMALLOC,
+    DEFAULT_PROFILE_TOP,
+    DOMAIN,
+    EXCEPTION_TEMPLATE,
+    SERVICE_APPLY_UPDATE,
+    SERVICE_PROFILE_SYNC,
+    SERVICE_ROLLBACK,
+    SERVICE_VERIFY,
+    VERIFY_REPAIRED,
+)
+from .fs import write_file
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+ENTRY_SCHEMA = vol.Schema({vol.Required(ATTR_ENTRY_ID): cv.string})
+VERIFY_SCHEMA = ENTRY_SCHEMA.extend(
+    {vol.Optional(ATTR_REPAIR, default=True): cv.boolean}
+)
+PROFILE_SCHEMA = ENTRY_SCHEMA.extend(
+    {
+        vol.Optional(ATTR_DOWNLOAD, default=True): cv.boolean,
+        vol.Optional(ATTR_TRACEMALLOC, default=False): cv.boolean,
+        vol.Optional(ATTR_TOP, default=DEFAULT_PROFILE_TOP): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=500)
+        ),
+    }
+)
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall):
+    """Return the coordinator of the entry targeted by call."""
+    coordinator = hass.data.get(DOMAIN, {}).get(call.data[ATTR_ENTRY_ID])
+    if coordinator is None or not hasattr(coordinator, "api"):
+        raise HomeAssistantError(f"Unknown entry {call.data[ATTR_ENTRY_ID]}")
+    return coordinator
+
+
+def _allocation_report(snapshot: tracemalloc.Snapshot, top: int) -> bytes:
+    """Return the top allocations of snapshot by line as text."""
+    stats = snapshot.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    ).statistics("lineno")
+    lines: List[str] = [
+        f"Top {min(top, len(stats))} of {len(stats)} allocation sites, "
+        f"{sum(stat.size for stat in stats) / 1024:.1f} KiB total"
+    ]
+    lines.extend(str(stat) for stat in stats[:top])
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _write_profile(
+    profiler: cProfile.Profile,
+    profile_path: str,
+    snapshot: Optional[tracemalloc.Snapshot],
+    report_path: str,
+    top: int,
+) -> None:
+    """Write the profile and allocation report. This is blocking."""
+    profiler.dump_stats(profile_path)
+    if snapshot is not None:
+        write_file(report_path, _allocation_report(snapshot, top))
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of this integration."""
+    profile_lock = asyncio.Lock()
+
+    async def async_rollback(call: ServiceCall) -> None:
+        """Restore the component installed before the last sync."""
+        coordinator = _get_coordinator(hass, call)
+        await coordinator.async_cancel_prestage()
+        if not await coordinator.api.async_rollback():
+            raise HomeAssistantError(f"No previous {coordinator.api.name} install")
+        # Keep the next poll from reinstalling the Pull Request
+        coordinator.api.auto_update = False
+        await coordinator.async_save_install_index()
+        coordinator.async_update_listeners()
+
+    async def async_apply_update(call: ServiceCall) -> None:
+        """Install the staged update without using the network."""
+        coordinator = _get_coordinator(hass, call)
+        if not await coordinator.api.async_install_staged():
+            raise HomeAssistantError(f"No staged update of {coordinator.api.name}")
+        await coordinator.async_save_install_index()
+        coordinator.async_update_listeners()
+
+    async def async_verify(call: ServiceCall) -> None:
+        """Verify the installed files of an entry and repair damaged ones."""
+        coordinator = _get_coordinator(hass, call)
+        damaged = await coordinator.async_verify(call.data[ATTR_REPAIR])
+        if not damaged:
+            message = "All installed files match the synced version."
+        else:
+            message = "\n".join(
+                f"- `{name}`: {status}" for name, status in sorted(damaged.items())
+            )
+            if any(status != VERIFY_REPAIRED for status in damaged.values()):
+                message += "\n\nResync the component to restore the remaining files."
+        persistent_notification.async_create(
+            hass,
+            message,
+            title=f"{coordinator.api.name} verification",
+            notification_id=f"{DOMAIN}_{call.data[ATTR_ENTRY_ID]}_verify",
+        )
+
+    async def async_profile_sync(call: ServiceCall) -> None:
+        """Run one sync of an entry under cProfile and optionally tracemalloc.
+
+        The profiler covers the event loop thread, so other work running on the
+        loop meanwhile is included; executor jobs are not profiled but their wait
+        shows under the awaiting coroutine.
+        """
+        coordinator = _get_coordinator(hass, call)
+        if profile_lock.locked():
+            raise HomeAssistantError("A sync is already being profiled")
+        async with profile_lock:
+            name: str = f"{DOMAIN}.{call.data[ATTR_ENTRY_ID]}.{int(time.time())}"
+            profile_path: str = hass.config.path(f"{name}.prof")
+            report_path: str = hass.config.path(f"{name}.allocations.txt")
+            trace: bool = call.data[ATTR_TRACEMALLOC] and not tracemalloc.is_tracing()
+            snapshot: Optional[tracemalloc.Snapshot] = None
+            error: str = ""
+            if trace:
+                tracemalloc.start()
+            profiler = cProfile.Profile()
+            start: float = time.monotonic()
+            profiler.enable()
+            try:
+                data = await coordinator.api.async_update_data(
+                    download=call.data[ATTR_DOWNLOAD]
+                )
+            except Exception as ex:  # pylint: disable=broad-except
+                error = EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args)
+                data = None
+            finally:
+                profiler.disable()
+                if call.data[ATTR_TRACEMALLOC]:
+                    snapshot = tracemalloc.take_snapshot()
+                if trace:
+                    tracemalloc.stop()
+            duration: float = time.monotonic() - start
+            await hass.async_add_executor_job(
+                _write_profile,
+                profiler,
+                profile_path,
+                snapshot,
+                report_path,
+                call.data[ATTR_TOP],
+            )
+        if data:
+            coordinator.async_set_updated_data(data)
+        paths: str = f"`{profile_path}`"
+        if snapshot is not None:
+            paths += f" and allocation report `{report_path}`"
+        _LOGGER.debug("Profiled %s sync to %s", coordinator.api.name, paths)
+        persistent_notification.async_create(
+            hass,
+            f"Sync of {coordinator.api.name} took {duration:.1f} seconds"
+            f"{' and failed with ' + error if error else ''}. Profile written to "
+            f"{paths}; open it with `python -m pstats` or snakeviz.",
+            title=f"{coordinator.api.name} sync profile",
+            notification_id=f"{DOMAIN}_{call.data[ATTR_ENTRY_ID]}_profile",
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_ROLLBACK, async_rollback, schema=ENTRY_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_APPLY_UPDATE, async_apply_update, schema=ENTRY_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_VERIFY, async_verify, schema=VERIFY_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE_SYNC, async_profile_sync, schema=PROFILE_SCHEMA
+    )
@@ -0,0 +1,164 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Sync Statistics
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import time
+from types import TracebackType
+from typing import Any, Dict, List, Optional, Type
+
+from .const import TRACE_MAX_SPANS
+
+
+class Span:
+    """Timed step of a sync, e.g., fetching or writing a file.
+
+    Used as a context manager; the span ends when the block exits.
+    """
+
+    def __init__(self, name: str, path: str = "") -> None:
+        """Initialize span.
+
+        Args:
+            name (str): Step, e.g., listing, fetch, decode, write, manifest,
+                translations or request
+            path (str): File, directory or url the step worked on
+
+        """
+        self.name: str = name
+        self.path: str = path
+        self.start: float = time.monotonic()
+        self.end: Optional[float] = None
+        self.bytes: int = 0
+        self.status: Optional[int] = None
+        # True if answered from the response cache, False if not, None if uncached
+        self.cache_hit: Optional[bool] = None
+
+    def __enter__(self) -> "Span":
+        """Start the span."""
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """End the span."""
+        self.end = time.monotonic()
+
+    def as_dict(self, origin: float) -> Dict[str, Any]:
+        """Return the span with times in milliseconds since origin."""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "start_ms": round((self.start - origin) * 1000, 1),
+            "end_ms": (
+                None if self.end is None else round((self.end - origin) * 1000, 1)
+            ),
+            "bytes": self.bytes,
+            "status": self.status,
+            "cache_hit": self.cache_hit,
+        }
+
+
+class SyncStats:
+    """Resources used by a single update of an entry and its span timeline."""
+
+    def __init__(self) -> None:
+        """Initialize statistics."""
+        self.started: float = time.monotonic()
+        self.started_at: float = time.time()
+        self.duration: float = 0.0
+        # Requests sent to GitHub, including revalidations answered with 304
+        self.requests: int = 0
+        # Responses answered from the cache, with a 304 or without a request
+        self.cache_hits: int = 0
+        # Responses answered from the cache without a request
+        self.skipped: int = 0
+        self.retries: int = 0
+        self.bytes_received: int = 0
+        self.files_written: int = 0
+        self.rate_limit_remaining: Optional[int] = None
+        self.spans: List[Span] = []
+        self.dropped_spans: int = 0
+
+    @property
+    def cache_hit_ratio(self) -> Optional[float]:
+        """Return the percentage of responses answered from the cache."""
+        lookups: int = self.requests + self.skipped
+        if not lookups:
+            return None
+        return round(100 * self.cache_hits / lookups, 1)
+
+    def record_request(self, size: int = 0) -> None:
+        """Record a request and the bytes of its body."""
+        self.requests += 1
+        self.bytes_received += size
+
+    def record_cache_hit(self, sent: bool = True) -> None:
+        """Record a response answered from the cache.
+
+        Args:
+            sent (bool): Whether a revalidation request was sent for it
+
+        """
+        self.cache_hits += 1
+        if not sent:
+            self.skipped += 1
+
+    def span(self, name: str, path: str = "") -> Span:
+        """Return a new span recorded in the timeline.
+
+        Spans beyond TRACE_MAX_SPANS are timed but not recorded.
+
+        Args:
+            name (str): Step, e.g., fetch
+            path (str): File, directory or url the step worked on
+
+        Returns:
+            Span: Span to use as a context manager
+        """
+        span = Span(name, path)
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+        return span
+
+    def finish(self, rate_limit_remaining: Optional[int] = None) -> None:
+        """Record the end of the update.
+
+        Args:
+            rate_limit_remaining (Optional[int]): GitHub requests left afterwards
+
+        """
+        self.duration = round(time.monotonic() - self.started, 3)
+        self.rate_limit_remaining = rate_limit_remaining
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the statistics and timeline, e.g., for diagnostics."""
+        return {
+            "started_at": time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)
+            ),
+            "duration": self.duration,
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "cache_hit_ratio": self.cache_hit_ratio,
+            "retries": self.retries,
+            "bytes_received": self.bytes_received,
+            "files_written": self.files_written,
+            "rate_limit_remaining": self.rate_limit_remaining,
+            "dropped_spans": self.dropped_spans,
+            "spans": [
+                span.as_dict(self.started)
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ],
+        }
@@ -0,0 +1,176 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+GitHub Webhook
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import hashlib
+import hmac
+import json
+from json.decoder import JSONDecodeError
+import logging
+import secrets
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+from homeassistant.components import persistent_notification, webhook
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.network import NoURLAvailableError
+import yarl
+
+from .const import API_PATH_PREFIX, CONF_PR_URL, CONF_WEBHOOK_SECRET, DOMAIN
+from .poller import parse_pull_url
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+SIGNATURE_HEADER = "X-Hub-Signature-256"
+EVENT_HEADER = "X-GitHub-Event"
+EVENT_PING = "ping"
+EVENT_PULL_REQUEST = "pull_request"
+EVENT_PUSH = "push"
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    """Return whether signature is the GitHub HMAC SHA256 signature of body.
+
+    Args:
+        secret (str): Webhook secret
+        body (bytes): Raw request body
+        signature (str): X-Hub-Signature-256 header, e.g., sha256=<hex digest>
+
+    Returns:
+        bool: Whether the signature is valid
+    """
+    if not secret or not signature.startswith("sha256="):
+        return False
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f"sha256={digest}", signature)
+
+
+def payload_matches(
+    event: str,
+    payload: Dict[str, Any],
+    pull_url: yarl.URL,
+    pull_json: Optional[Dict[str, Any]],
+) -> bool:
+    """Return whether a webhook payload concerns a pull request.
+
+    Args:
+        event (str): GitHub event name
+        payload (Dict[str, Any]): Webhook payload
+        pull_url (yarl.URL): URL of pull request
+        pull_json (Optional[Dict[str, Any]]): Last pull data, used to match pushes
+            to the head branch
+
+    Returns:
+        bool: Whether the pull request should be refreshed
+    """
+    parsed = parse_pull_url(pull_url)
+    if parsed is None:
+        return False
+    owner, name, number = parsed
+    try:
+        full_name: str = payload["repository"]["full_name"]
+        if event == EVENT_PULL_REQUEST:
+            return (
+                full_name.lower() == f"{owner}/{name}".lower()
+                and payload["number"] == number
+            )
+        if event == EVENT_PUSH and pull_json:
+            head = pull_json["head"]
+            head_name = yarl.URL(head["repo"]["url"]).path.split(
+                f"/{API_PATH_PREFIX}/", 1
+            )[-1]
+            return (
+                full_name.lower() == head_name.lower()
+                and payload["ref"] == f"refs/heads/{head['ref']}"
+            )
+    except (KeyError, TypeError):
+        _LOGGER.debug("Ignoring malformed %s payload", event)
+    return False
+
+
+async def async_setup_webhook(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Register the webhook of an entry, creating its id and secret if needed."""
+    if not entry.data.get(CONF_WEBHOOK_ID):
+        hass.config_entries.async_update_entry(
+            entry,
+            data={
+                **entry.data,
+                CONF_WEBHOOK_ID: webhook.async_generate_id(),
+                CONF_WEBHOOK_SECRET: secrets.token_hex(32),
+            },
+        )
+        try:
+            url = webhook.async_generate_url(hass, entry.data[CONF_WEBHOOK_ID])
+        except NoURLAvailableError:
+            url = webhook.async_generate_path(entry.data[CONF_WEBHOOK_ID])
+        persistent_notification.async_create(
+            hass,
+            "To update as soon as the Pull Request changes, add a webhook to the "
+            f"repository of {entry.data.get(CONF_PR_URL)} and its head fork with "
+            f"payload URL `{url}`, content type `application/json`, secret "
+            f"`{entry.data[CONF_WEBHOOK_SECRET]}` and the Pull requests and Pushes "
+            "events.",
+            title=f"{entry.title} webhook",
+            notification_id=f"{DOMAIN}_{entry.entry_id}_webhook",
+        )
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        entry.title,
+        entry.data[CONF_WEBHOOK_ID],
+        async_handle_webhook,
+        allowed_methods=["POST"],
+    )
+
+
+def async_unregister_webhook(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Unregister the webhook of an entry."""
+    if entry.data.get(CONF_WEBHOOK_ID):
+        webhook.async_unregister(hass, entry.data[CONF_WEBHOOK_ID])
+
+
+async def async_handle_webhook(
+    hass: HomeAssistant, webhook_id: str, request: web.Request
+) -> web.Response:
+    """Handle a GitHub webhook delivery."""
+    entry: Optional[ConfigEntry] = next(
+        (
+            entry
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.data.get(CONF_WEBHOOK_ID) == webhook_id
+        ),
+        None,
+    )
+    coordinator = (
+        hass.data.get(DOMAIN, {}).get(entry.entry_id) if entry is not None else None
+    )
+    if coordinator is None:
+        return web.Response(status=404)
+    body: bytes = await request.read()
+    if not verify_signature(
+        entry.data.get(CONF_WEBHOOK_SECRET, ""),
+        body,
+        request.headers.get(SIGNATURE_HEADER, ""),
+    ):
+        _LOGGER.warning("Rejected webhook delivery with invalid signature")
+        return web.Response(status=401)
+    try:
+        payload = json.loads(body)
+    except (JSONDecodeError, UnicodeDecodeError):
+        return web.Response(status=400)
+    event: str = request.headers.get(EVENT_HEADER, "")
+    coordinator.webhook_active = True
+    if event != EVENT_PING and payload_matches(
+        event, payload, coordinator.api.pull_url, coordinator.data
+    ):
+        _LOGGER.debug("Refreshing %s after %s event", coordinator.api.pull_url, event)
+        hass.async_create_task(coordinator.async_handle_webhook())
+    return web.Response(status=200)
@@ -0,0 +1,152 @@
+"""
+PRCustomComponent for Home Assistant.
+
+SPDX-License-Identifier: Apache-2.0
+
+Wheel cache for manifest requirements
+
+For more details about this integration, please refer to
+https://github.com/alandtse/pr_custom_component
+"""
+import json
+from json.decoder import JSONDecodeError
+import logging
+import os
+import subprocess  # nosec
+import sys
+import threading
+from typing import List, Optional
+
+from homeassistant.util.package import is_installed
+
+from .const import EXCEPTION_TEMPLATE, MANIFEST_FILE, PIP_FIND_LINKS
+from .exceptions import PRCustomComponentException
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class RequirementsException(PRCustomComponentException):
+    """Class of exceptions for requirements pip could not download."""
+
+
+def read_requirements(component_path: str) -> List[str]:
+    """Return the requirements in the manifest of a component. This is blocking.
+
+    Args:
+        component_path (str): Directory of the component
+
+    Returns:
+        List[str]: Pip requirement strings, empty if there is no valid manifest
+    """
+    try:
+        with open(os.path.join(component_path, MANIFEST_FILE), "rb") as localfile:
+            manifest = json.loads(localfile.read())
+    except (OSError, JSONDecodeError) as ex:
+        _LOGGER.debug(
+            "Unable to read requirements of %s: %s",
+            component_path,
+            EXCEPTION_TEMPLATE.format(type(ex).__name__, ex.args),
+        )
+        return []
+    requirements = manifest.get("requirements") if isinstance(manifest, dict) else []
+    if not isinstance(requirements, list):
+        return []
+    return [requirement for requirement in requirements if isinstance(requirement, str)]
+
+
+class WheelCache:
+    """Local directory of downloaded distributions used as pip find-links.
+
+    Requirements of a newly synced component are downloaded ahead of time so the
+    restart that loads it installs them from disk instead of resolving and
+    downloading them while Home Assistant starts. The directory is added to
+    PIP_FIND_LINKS, which the pip subprocess started by Home Assistant inherits.
+
+    All methods are blocking and must be run in an executor.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize wheel cache.
+
+        Args:
+            path (str): Directory for the cache, e.g., /config/.pr_custom_component/wheels
+
+        """
+        self._path: str = path
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        """Return the cache path."""
+        return self._path
+
+    @staticmethod
+    def missing(requirements: List[str]) -> List[str]:
+        """Return the requirements that are not installed."""
+        return [
+            requirement for requirement in requirements if not is_installed(requirement)
+        ]
+
+    def download(
+        self,
+        requirements: List[str],
+        constraints: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ) -> None:
+        """Download requirements and their dependencies into the cache.
+
+        Distributions already in the cache are not downloaded again. Only one pip
+        runs at a time.
+
+        Args:
+            requirements (List[str]): Pip requirement strings
+            constraints (Optional[str]): Constraints file pip must honor, e.g.,
+                the one Home Assistant installs with
+            timeout (Optional[int]): Pip socket timeout in seconds
+
+        Raises:
+            RequirementsException: pip failed
+
+        """
+        args: List[str] = [
+            sys.executable,
+            "-m",
+            "pip",
+            "download",
+            "--quiet",
+            "--dest",
+            self._path,
+            "--find-links",
+            self._path,
+        ]
+        if constraints is not None:
+            args += ["--constraint", constraints]
+        if timeout:
+            args += ["--timeout", str(timeout)]
+        args += requirements
+        with self._lock:
+            os.makedirs(self._path, exist_ok=True)
+            _LOGGER.debug("Running pip command: args=%s", args)
+            process = subprocess.run(  # nosec
+                args, stdin=subprocess.DEVNULL, capture_output=True, check=False
+            )
+        if process.returncode != 0:
+            raise RequirementsException(
+                process.stderr.decode("utf-8", errors="replace").strip()
+            )
+
+    def enable(self) -> bool:
+        """Add the cache to PIP_FIND_LINKS if it has any distributions.
+
+        Returns:
+            bool: Whether pip will look in the cache
+        """
+        try:
+            if not os.listdir(self._path):
+                return False
+        except OSError:
+            return False
+        links: List[str] = os.environ.get(PIP_FIND_LINKS, "").split()
+        if self._path not in links:
+            os.environ[PIP_FIND_LINKS] = " ".join(links + [self._path])
+        return True
@@ -0,0 +1,127 @@
+"""Benchmark async_update_data against a local fake GitHub server.
+
+Run from the repository root, e.g.,
+
+    python -m tests.benchmark --files 5 50 500 --latency 0.02 --output bench.json
+
+Each case installs a synthetic integration and then syncs it again unchanged in
+a fresh process so peak RSS is per case. Results are printed as JSON.
+"""
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import aiohttp
+
+from custom_components.pr_custom_component.api import PRCustomComponentApiClient
+from custom_components.pr_custom_component.const import (
+    DOWNLOAD_MODE_CONTENTS,
+    DOWNLOAD_MODE_TARBALL,
+    DOWNLOAD_MODE_TREES,
+    VERSION,
+)
+from custom_components.pr_custom_component.fs import AsyncFileSystem
+from custom_components.pr_custom_component.github import GitHubClient
+
+from .fake_github import PULL_URL, FakeGitHub, generate_component
+
+DEFAULT_FILES = [5, 50, 500]
+DEFAULT_MODES = [DOWNLOAD_MODE_CONTENTS, DOWNLOAD_MODE_TREES, DOWNLOAD_MODE_TARBALL]
+PHASES = ("install", "resync")
+
+
+async def async_run_case(mode: str, files: int, latency: float) -> Dict[str, Any]:
+    """Install and resync a synthetic integration and return the measurements."""
+    server = FakeGitHub(generate_component(files), latency)
+    base_url = await server.async_start()
+    file_system = AsyncFileSystem()
+    result: Dict[str, Any] = {
+        "mode": mode,
+        "files": files,
+        "bytes": sum(len(contents) for contents in server.files.values()),
+        "latency": latency,
+    }
+    try:
+        with tempfile.TemporaryDirectory() as config_path:
+            async with aiohttp.ClientSession() as session:
+                api = PRCustomComponentApiClient(
+                    session,
+                    PULL_URL,
+                    config_path,
+                    github=GitHubClient(session, api_url=base_url),
+                    file_system=file_system,
+                )
+                api.download_mode = mode
+                for phase in PHASES:
+                    server.reset_counts()
+                    start = time.perf_counter()
+                    await api.async_update_data(download=True)
+                    wall_time = time.perf_counter() - start
+                    stats = api.last_stats
+                    result[phase] = {
+                        "wall_time": round(wall_time, 4),
+                        "requests": server.request_count,
+                        "requests_by_endpoint": dict(server.requests),
+                        "bytes_sent": server.bytes_sent,
+                        "files_written": stats.files_written if stats else 0,
+                        "cache_hits": stats.cache_hits if stats else 0,
+                    }
+                await file_system.async_wait_cleanups()
+    finally:
+        await server.async_close()
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_kb"] = max_rss // 1024 if sys.platform == "darwin" else max_rss
+    return result
+
+
+def run_case(mode: str, files: int, latency: float) -> Dict[str, Any]:
+    """Run a case in its own event loop."""
+    return asyncio.run(async_run_case(mode, files, latency))
+
+
+def run(modes: List[str], files: List[int], latency: float) -> Dict[str, Any]:
+    """Run every case in a fresh process and return the report."""
+    context = multiprocessing.get_context("spawn")
+    cases: List[Dict[str, Any]] = []
+    for mode in modes:
+        for count in files:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                cases.append(executor.submit(run_case, mode, count, latency).result())
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "cases": cases,
+    }
+
+
+def main() -> None:
+    """Parse arguments, run the benchmark and write the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, nargs="+", default=DEFAULT_FILES)
+    parser.add_argument("--modes", nargs="+", default=DEFAULT_MODES)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to each response"
+    )
+    parser.add_argument("--output", help="file to write instead of stdout")
+    args = parser.parse_args()
+    report = json.dumps(run(args.modes, args.files, args.latency), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ TEST_PR_URL = "https://github.com/home-assistant/core/pull/46558"
 TEST_API_PR_URL = "https://api.github.com/repos/home-assistant/core/pulls/46558"
 TEST_API_DATA_URL = "https://api.github.com/repos/alandtse/home-assistant/contents/homeassistant/components/tesla?ref=tesla_oauth_callback"
 TEST_INIT_URL = "https://api.github.com/repos/alandtse/home-assistant/contents/homeassistant/components/tesla/__init__.py?ref=tesla_oauth_callback"
+TEST_TARBALL_URL = "https://api.github.com/repos/alandtse/home-assistant/tarball/10f2c74c49a471d0ba95e2d9f7e1e0a4315276a3"
+TEST_TREES_URL = "https://api.github.com/repos/alandtse/home-assistant/git/trees/"
+TEST_BLOBS_URL = "https://api.github.com/repos/alandtse/home-assistant/git/blobs/"
 TEST_TRANSLATIONS_URL = "https://api.github.com/repos/alandtse/home-assistant/contents/homeassistant/components/tesla/translations?ref=tesla_oauth_callback"
 MOCK_CONFIG = {CONF_PR_URL: TEST_PR_URL}
 MOCK_CONFIG_DATA = {
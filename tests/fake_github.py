@@ -0,0 +1,291 @@
+"""Local server emulating the GitHub endpoints used by PRCustomComponent."""
+import asyncio
+import base64
+from collections import Counter
+import hashlib
+import io
+import json
+import random
+import tarfile
+import time
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+import yarl
+
+from custom_components.pr_custom_component.blobstore import git_blob_sha
+
+OWNER = "fork"
+REPO = "core"
+BRANCH = "benchmark"
+HEAD_SHA = "0" * 40
+COMPONENT = "bench"
+COMPONENT_PATH = f"homeassistant/components/{COMPONENT}"
+PULL_NUMBER = 1
+PULL_URL = yarl.URL(f"https://github.com/home-assistant/core/pull/{PULL_NUMBER}")
+RAW_MEDIA_TYPE = "application/vnd.github.raw"
+ENDPOINTS = ("rate_limit", "pulls", "contents", "trees", "blobs", "tarball")
+
+
+def python_module(rng: random.Random, size: int) -> bytes:
+    """Return a valid python module of about size bytes."""
+    lines: List[str] = []
+    while len(lines) * 64 < size:
+        lines.append(f'VALUE_{len(lines)} = "{rng.randbytes(23).hex()}"\n')
+    return "".join(lines).encode()
+
+
+def generate_component(count: int, seed: int = 0) -> Dict[str, bytes]:
+    """Return a synthetic integration with count files keyed by relative path.
+
+    The required files come first; the rest are python modules that compile and
+    translations of 1 to 64 KB spread over a few sub directories.
+    """
+    rng = random.Random(seed)
+    files: Dict[str, bytes] = {
+        "manifest.json": json.dumps({"domain": COMPONENT, "name": "Bench"}).encode(),
+        "__init__.py": b'"""Bench."""\n',
+        "strings.json": json.dumps({"title": "Bench"}).encode(),
+    }
+    for index in range(max(count - len(files), 0)):
+        size = rng.randint(1, 64) * 1024
+        if index % 10 == 9:
+            path = f"translations/lang{index}.json"
+        else:
+            path = f"pkg{index % 5}/module_{index}.py"
+        files[path] = (
+            python_module(rng, size) if path.endswith(".py") else rng.randbytes(size)
+        )
+    return files
+
+
+class FakeGitHub:
+    """aiohttp server answering pulls, contents, trees, blobs, tarball and raw requests.
+
+    Responses carry rate limit headers and ETags; conditional requests matching
+    the ETag are answered with 304 without counting against the rate limit like
+    GitHub. Every request is delayed by latency seconds and counted per endpoint.
+    """
+
+    def __init__(
+        self,
+        files: Dict[str, bytes],
+        latency: float = 0.0,
+        rate_limit: int = 5000,
+    ) -> None:
+        """Initialize server.
+
+        Args:
+            files (Dict[str, bytes]): Component files keyed by relative path
+            latency (float): Seconds added to every response
+            rate_limit (int): Requests allowed before responding 403
+
+        """
+        self.files: Dict[str, bytes] = files
+        self.latency: float = latency
+        self.rate_limit: int = rate_limit
+        self.remaining: int = rate_limit
+        self.requests: Counter = Counter()
+        self.bytes_sent: int = 0
+        self.base_url: yarl.URL = yarl.URL()
+        self._runner: Optional[web.AppRunner] = None
+        self._trees: Dict[str, List[Dict[str, Any]]] = {}
+        self._tarball: bytes = b""
+
+    @property
+    def request_count(self) -> int:
+        """Return the number of requests received."""
+        return sum(self.requests.values())
+
+    def reset_counts(self) -> None:
+        """Reset request and byte counters."""
+        self.requests.clear()
+        self.bytes_sent = 0
+
+    async def async_start(self) -> yarl.URL:
+        """Start the server on a free localhost port and return its base url."""
+        app = web.Application(middlewares=[self._middleware])
+        repo = f"/repos/{OWNER}/{REPO}"
+        app.router.add_get("/rate_limit", self._rate_limit)
+        app.router.add_get("/repos/home-assistant/core/pulls/{number}", self._pull)
+        app.router.add_get(repo + "/contents/{path:.*}", self._contents)
+        app.router.add_get(repo + "/git/trees/{sha}", self._tree)
+        app.router.add_get(repo + "/git/blobs/{sha}", self._blob)
+        app.router.add_get(repo + "/tarball/{sha}", self._tarball_handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port: int = site._server.sockets[0].getsockname()[1]  # type: ignore
+        self.base_url = yarl.URL(f"http://127.0.0.1:{port}")
+        self._trees = self._build_trees()
+        self._tarball = self._build_tarball()
+        return self.base_url
+
+    async def async_close(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """Add latency, rate limiting, ETags and request counting."""
+        endpoint = next(
+            (name for name in ENDPOINTS if f"/{name}" in request.path), "unknown"
+        )
+        if request.headers.get("Accept") == RAW_MEDIA_TYPE:
+            endpoint += "_raw"
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        }
+        if endpoint != "rate_limit" and self.remaining <= 0:
+            headers["X-RateLimit-Remaining"] = "0"
+            return web.json_response(
+                {"message": "API rate limit exceeded"}, status=403, headers=headers
+            )
+        response = await handler(request)
+        if isinstance(response, web.Response) and response.body is not None:
+            etag = f'"{hashlib.sha1(bytes(response.body)).hexdigest()}"'  # nosec
+            if request.headers.get("If-None-Match") == etag:
+                response = web.Response(status=304)
+            else:
+                response.headers["ETag"] = etag
+                self.bytes_sent += len(response.body)
+        if response.status != 304 and endpoint != "rate_limit":
+            self.remaining -= 1
+        headers["X-RateLimit-Remaining"] = str(self.remaining)
+        response.headers.update(headers)
+        return response
+
+    async def _rate_limit(self, request: web.Request) -> web.Response:
+        """Return the rate limit."""
+        reset = int(time.time()) + 3600
+        return web.json_response(
+            {"resources": {"core": {"remaining": self.remaining, "reset": reset}}}
+        )
+
+    async def _pull(self, request: web.Request) -> web.Response:
+        """Return the pull request."""
+        repo_url = self.base_url / "repos" / OWNER / REPO
+        return web.json_response(
+            {
+                "number": PULL_NUMBER,
+                "state": "open",
+                "updated_at": "2021-03-14T03:54:43Z",
+                "labels": [{"name": f"integration: {COMPONENT}"}],
+                "head": {
+                    "ref": BRANCH,
+                    "sha": HEAD_SHA,
+                    "user": {"login": OWNER},
+                    "repo": {
+                        "url": str(repo_url),
+                        "contents_url": f"{repo_url}/contents/{{+path}}",
+                    },
+                },
+            }
+        )
+
+    def _contents_url(self, path: str) -> str:
+        """Return the Contents API url of a repository path."""
+        return str(
+            (self.base_url / "repos" / OWNER / REPO / "contents" / path).with_query(
+                {"ref": BRANCH}
+            )
+        )
+
+    async def _contents(self, request: web.Request) -> web.Response:
+        """Return a directory listing, file JSON or raw file."""
+        path: str = request.match_info["path"].strip("/")
+        if not path.startswith(COMPONENT_PATH):
+            raise web.HTTPNotFound()
+        relative = path[len(COMPONENT_PATH) :].strip("/")
+        if relative in self.files:
+            return self._file_response(request, self.files[relative])
+        prefix = f"{relative}/" if relative else ""
+        entries: Dict[str, Dict[str, Any]] = {}
+        for name, contents in self.files.items():
+            if not name.startswith(prefix):
+                continue
+            child, _sep, rest = name[len(prefix) :].partition("/")
+            full_path = f"{COMPONENT_PATH}/{prefix}{child}"
+            entries[child] = {
+                "path": full_path,
+                "type": "dir" if rest else "file",
+                "url": self._contents_url(full_path),
+                "sha": "" if rest else git_blob_sha(contents),
+                "size": 0 if rest else len(contents),
+            }
+        if not entries:
+            raise web.HTTPNotFound()
+        return web.json_response(list(entries.values()))
+
+    async def _tree(self, request: web.Request) -> web.Response:
+        """Return a Git tree."""
+        tree = self._trees.get(request.match_info["sha"])
+        if tree is None:
+            raise web.HTTPNotFound()
+        if request.query.get("recursive"):
+            tree = self._trees["recursive"]
+        return web.json_response({"truncated": False, "tree": tree})
+
+    async def _blob(self, request: web.Request) -> web.Response:
+        """Return a blob as JSON or raw."""
+        for contents in self.files.values():
+            if git_blob_sha(contents) == request.match_info["sha"]:
+                return self._file_response(request, contents)
+        raise web.HTTPNotFound()
+
+    async def _tarball_handler(self, request: web.Request) -> web.Response:
+        """Return the repository tarball."""
+        return web.Response(body=self._tarball, content_type="application/x-gzip")
+
+    @staticmethod
+    def _file_response(request: web.Request, contents: bytes) -> web.Response:
+        """Return a file as base64 JSON or raw bytes depending on Accept."""
+        if request.headers.get("Accept") == RAW_MEDIA_TYPE:
+            return web.Response(body=contents)
+        return web.json_response(
+            {
+                "encoding": "base64",
+                "size": len(contents),
+                "content": base64.b64encode(contents).decode(),
+            }
+        )
+
+    def _build_trees(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return the trees from the commit down to the component by sha."""
+        blobs_url = self.base_url / "repos" / OWNER / REPO / "git" / "blobs"
+        return {
+            HEAD_SHA: [{"path": "homeassistant", "type": "tree", "sha": "tree-ha"}],
+            "tree-ha": [{"path": "components", "type": "tree", "sha": "tree-comp"}],
+            "tree-comp": [{"path": COMPONENT, "type": "tree", "sha": "tree-bench"}],
+            "tree-bench": [],
+            "recursive": [
+                {
+                    "path": name,
+                    "type": "blob",
+                    "sha": git_blob_sha(contents),
+                    "size": len(contents),
+                    "url": str(blobs_url / git_blob_sha(contents)),
+                }
+                for name, contents in self.files.items()
+            ],
+        }
+
+    def _build_tarball(self) -> bytes:
+        """Return a gzipped tarball of the repository like GitHub creates."""
+        root = f"{OWNER}-{REPO}-{HEAD_SHA[:7]}"
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            other = tarfile.TarInfo(f"{root}/README.md")
+            other.size = 0
+            tar.addfile(other, io.BytesIO())
+            for name, contents in sorted(self.files.items()):
+                info = tarfile.TarInfo(f"{root}/{COMPONENT_PATH}/{name}")
+                info.size = len(contents)
+                tar.addfile(info, io.BytesIO(contents))
+        return buffer.getvalue()
@@ -1,16 +1,33 @@
 """Tests for PRCustomComponent api."""
 import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import tarfile
 
 import aiohttp
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import yarl
 from custom_components.pr_custom_component import PRCustomComponentApiClient
+from custom_components.pr_custom_component.blobstore import BlobStore, git_blob_sha
+from custom_components.pr_custom_component import github as github_module
+from custom_components.pr_custom_component.fs import AsyncFileSystem
+from custom_components.pr_custom_component.github import GitHubClient
+from custom_components.pr_custom_component.const import (
+    DOMAIN,
+    DOWNLOAD_MODE_TARBALL,
+    DOWNLOAD_MODE_TREES,
+)
 
 from .const import (
     MOCK_PR_RESPONSE,
     TEST_CONFIG_PATH,
     TEST_PR_URL,
     TEST_API_PR_URL,
+    TEST_BLOBS_URL,
+    TEST_TARBALL_URL,
+    TEST_TREES_URL,
     # TEST_API_DATA_URL,
     TEST_INIT_URL,
     TEST_TRANSLATIONS_URL,
@@ -78,3 +95,376 @@ async def test_api(hass, aioclient_mock, caplog):
         len(caplog.record_tuples) == 1
         and "Error parsing information from" in caplog.record_tuples[0][2]
     )
+
+
+async def test_api_conditional_cache(hass, aioclient_mock):
+    """Test cached responses are revalidated with ETag and reused on 304."""
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        TEST_CONFIG_PATH,
+    )
+
+    aioclient_mock.get(
+        TEST_API_PR_URL, json=MOCK_PR_RESPONSE, headers={"ETag": '"abc"'}
+    )
+    assert await api.async_get_pull_data() == MOCK_PR_RESPONSE
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(TEST_API_PR_URL, status=304)
+    assert await api.async_get_pull_data() == MOCK_PR_RESPONSE
+    assert aioclient_mock.call_count == 1
+    assert aioclient_mock.mock_calls[0][3]["If-None-Match"] == '"abc"'
+
+
+async def test_api_single_flight(hass, aioclient_mock):
+    """Test concurrent identical requests from two clients share one request."""
+    session = async_get_clientsession(hass)
+    github = GitHubClient(session)
+    first = PRCustomComponentApiClient(
+        session, yarl.URL(TEST_PR_URL), TEST_CONFIG_PATH, github=github
+    )
+    second = PRCustomComponentApiClient(
+        session, yarl.URL(TEST_PR_URL), TEST_CONFIG_PATH, github=github
+    )
+
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    results = await asyncio.gather(
+        first.async_get_pull_data(), second.async_get_pull_data()
+    )
+    assert results == [MOCK_PR_RESPONSE, MOCK_PR_RESPONSE]
+    assert aioclient_mock.call_count == 1
+
+    assert await first.async_get_pull_data() == MOCK_PR_RESPONSE
+    assert aioclient_mock.call_count == 2
+
+
+def make_tarball(
+    files: dict, prefix: str = "alandtse-home-assistant-10f2c74/"
+) -> bytes:
+    """Return a gzipped tarball laid out like a GitHub repository archive."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, contents in sorted(files.items()):
+            info = tarfile.TarInfo(prefix + name)
+            info.size = len(contents)
+            tar.addfile(info, io.BytesIO(contents))
+    return buffer.getvalue()
+
+
+async def test_api_tarball_download(hass, aioclient_mock, tmp_path):
+    """Test tarball mode extracts only the component in one request."""
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        str(tmp_path),
+    )
+    api.download_mode = DOWNLOAD_MODE_TARBALL
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    aioclient_mock.get(
+        TEST_TARBALL_URL,
+        content=make_tarball(
+            {
+                "homeassistant/components/tesla/__init__.py": b'"""Tesla."""\n',
+                "homeassistant/components/tesla/manifest.json": json.dumps(
+                    {"domain": "tesla", "name": "Tesla"}
+                ).encode(),
+                "homeassistant/components/tesla/strings.json": json.dumps(
+                    {"title": "Tesla"}
+                ).encode(),
+                "homeassistant/components/zwave/__init__.py": b"",
+                "setup.py": b"",
+            }
+        ),
+    )
+
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert aioclient_mock.call_count == 2
+    component = tmp_path / "custom_components" / "tesla"
+    assert (component / "__init__.py").read_bytes() == b'"""Tesla."""\n'
+    manifest = json.loads((component / "manifest.json").read_text())
+    assert manifest["name"] == "Custom Tesla PR#46558"
+    assert manifest["domain"] == "tesla"
+    translations = json.loads((component / "translations" / "en.json").read_text())
+    assert translations["title"] == "Custom Tesla PR#46558"
+    assert not (tmp_path / "custom_components" / "zwave").exists()
+
+
+def mock_component_tree(aioclient_mock, files: dict) -> None:
+    """Mock the Git Trees and Blobs API for a tesla component with files."""
+    head_sha = MOCK_PR_RESPONSE["head"]["sha"]
+    for sha, name, child in (
+        (head_sha, "homeassistant", "tree-ha"),
+        ("tree-ha", "components", "tree-components"),
+        ("tree-components", "tesla", "tree-tesla"),
+    ):
+        aioclient_mock.get(
+            f"{TEST_TREES_URL}{sha}",
+            json={"tree": [{"path": name, "type": "tree", "sha": child}]},
+        )
+    aioclient_mock.get(
+        f"{TEST_TREES_URL}tree-tesla?recursive=1",
+        json={
+            "truncated": False,
+            "tree": [
+                {
+                    "path": name,
+                    "type": "blob",
+                    "sha": git_blob_sha(contents),
+                    "url": f"{TEST_BLOBS_URL}{git_blob_sha(contents)}",
+                }
+                for name, contents in files.items()
+            ],
+        },
+    )
+    for name, contents in files.items():
+        if name == "manifest.json":
+            aioclient_mock.get(
+                f"{TEST_BLOBS_URL}{git_blob_sha(contents)}",
+                json={"content": base64.b64encode(contents).decode()},
+            )
+        else:
+            # Files other than the manifest are streamed with the raw media type
+            aioclient_mock.get(
+                f"{TEST_BLOBS_URL}{git_blob_sha(contents)}", content=contents
+            )
+
+
+async def test_api_trees_sync(hass, aioclient_mock, tmp_path):
+    """Test trees mode only downloads changed blobs and removes deleted files."""
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        str(tmp_path),
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    component = tmp_path / "custom_components" / "tesla"
+
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    manifest = b'{"domain": "tesla"}'
+    mock_component_tree(
+        aioclient_mock,
+        {
+            "manifest.json": manifest,
+            "__init__.py": b"one",
+            "sensor.py": b"two",
+            "translations/de.json": b"{}",
+        },
+    )
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert (component / "__init__.py").read_bytes() == b"one"
+    assert (component / "translations" / "de.json").read_bytes() == b"{}"
+
+    # An unchanged manifest.json still gets the version of the update
+    aioclient_mock.clear_requests()
+    pull_json = {**MOCK_PR_RESPONSE, "updated_at": "2021-03-01T12:00:00Z"}
+    mock_component_tree(
+        aioclient_mock,
+        {"manifest.json": manifest, "__init__.py": b"three", "sensor.py": b"two"},
+    )
+    assert await api.async_update_data(download=True, pull_json=pull_json) == pull_json
+    assert (component / "__init__.py").read_bytes() == b"three"
+    assert (component / "sensor.py").read_bytes() == b"two"
+    assert not (component / "translations").exists()
+    blob_calls = [call for call in aioclient_mock.mock_calls if "blobs" in str(call[1])]
+    assert len(blob_calls) == 1
+    installed = json.loads((component / "manifest.json").read_text())
+    assert installed["version"] == "2021.3.1-T120000Z"
+    assert installed["after_dependencies"] == [DOMAIN]
+
+
+async def test_api_blob_store(hass, aioclient_mock, tmp_path):
+    """Test blobs seen by one install are not downloaded again by another."""
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    files = {"__init__.py": b"one", "sensor.py": b"two"}
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, files)
+
+    for config_path in ("first", "second"):
+        api = PRCustomComponentApiClient(
+            async_get_clientsession(hass),
+            yarl.URL(TEST_PR_URL),
+            str(tmp_path / config_path),
+            blob_store=blob_store,
+        )
+        api.download_mode = DOWNLOAD_MODE_TREES
+        assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+
+    blob_calls = [call for call in aioclient_mock.mock_calls if "blobs" in str(call[1])]
+    assert len(blob_calls) == len(files)
+    installed = tmp_path / "second" / "custom_components" / "tesla" / "sensor.py"
+    assert installed.read_bytes() == b"two"
+
+
+def test_blob_store_threads(tmp_path):
+    """Test blobs are stored and evicted from several threads at once."""
+    blob_store = BlobStore(str(tmp_path / "blobs"), max_size=64 * 1024)
+    blobs = [str(number).encode() * 1024 for number in range(200)]
+
+    def add(contents):
+        assert blob_store.add(git_blob_sha(contents), contents)
+        blob_store.evict()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(add, blobs))
+
+    blob_store.evict()
+    access = json.loads((tmp_path / "blobs" / "access.json").read_text())
+    stored = [
+        contents for contents in blobs if blob_store.contains(git_blob_sha(contents))
+    ]
+    assert sum(len(contents) for contents in stored) <= 64 * 1024
+    assert all(git_blob_sha(contents) in access for contents in stored)
+
+
+async def test_api_staged_install(hass, aioclient_mock, tmp_path, monkeypatch):
+    """Test syncs are swapped in whole and the previous install can be restored."""
+    monkeypatch.setattr(github_module, "RETRY_BACKOFF", 0.01)
+    file_system = AsyncFileSystem()
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        str(tmp_path),
+        file_system=file_system,
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    component = tmp_path / "custom_components" / "tesla"
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, {"__init__.py": b"one", "sensor.py": b"two"})
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert not await api.async_rollback()
+
+    # A partly failed sync leaves the installed component untouched
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    aioclient_mock.get(f"{TEST_BLOBS_URL}{git_blob_sha(b'four')}", status=404)
+    mock_component_tree(aioclient_mock, {"__init__.py": b"three", "sensor.py": b"four"})
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert (component / "__init__.py").read_bytes() == b"one"
+    assert (component / "sensor.py").read_bytes() == b"two"
+    await file_system.async_wait_cleanups()
+    assert sorted(path.name for path in component.parent.iterdir()) == ["tesla"]
+
+    # So does a sync with a file that does not compile
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, {"__init__.py": b"three", "sensor.py": b"(:"})
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert (component / "sensor.py").read_bytes() == b"two"
+    await file_system.async_wait_cleanups()
+    assert sorted(path.name for path in component.parent.iterdir()) == ["tesla"]
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, {"__init__.py": b"three", "sensor.py": b"two"})
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert (component / "__init__.py").read_bytes() == b"three"
+    assert (component / "__pycache__").is_dir()
+
+    assert await api.async_rollback()
+    assert (component / "__init__.py").read_bytes() == b"one"
+    assert await api.async_rollback()
+    assert (component / "__init__.py").read_bytes() == b"three"
+
+    assert await api.async_delete()
+    await file_system.async_wait_cleanups()
+    assert not list(component.parent.iterdir())
+
+
+async def test_api_prestage(hass, aioclient_mock, tmp_path):
+    """Test an update staged in the background installs without the network."""
+    file_system = AsyncFileSystem()
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        str(tmp_path),
+        file_system=file_system,
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    component = tmp_path / "custom_components" / "tesla"
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, {"__init__.py": b"one", "sensor.py": b"two"})
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert not api.update_staged
+    assert not await api.async_install_staged()
+
+    aioclient_mock.clear_requests()
+    mock_component_tree(aioclient_mock, {"__init__.py": b"three", "sensor.py": b"two"})
+    assert await api.async_prestage()
+    assert api.update_staged
+    assert (component / "__init__.py").read_bytes() == b"one"
+
+    aioclient_mock.clear_requests()
+    assert await api.async_install_staged()
+    assert aioclient_mock.call_count == 0
+    assert not api.update_staged
+    assert (component / "__init__.py").read_bytes() == b"three"
+    assert (component / "sensor.py").read_bytes() == b"two"
+
+    # A download of the staged version installs it instead
+    mock_component_tree(aioclient_mock, {"__init__.py": b"five", "sensor.py": b"two"})
+    assert await api.async_prestage()
+    aioclient_mock.clear_requests()
+    assert (
+        await api.async_update_data(download=True, pull_json=MOCK_PR_RESPONSE)
+        == MOCK_PR_RESPONSE
+    )
+    assert aioclient_mock.call_count == 0
+    assert (component / "__init__.py").read_bytes() == b"five"
+    await file_system.async_wait_cleanups()
+    assert sorted(path.name for path in component.parent.iterdir()) == [
+        ".tesla.previous",
+        "tesla",
+    ]
+
+    # Rolling back discards a staged update
+    mock_component_tree(aioclient_mock, {"__init__.py": b"six", "sensor.py": b"two"})
+    assert await api.async_prestage()
+    assert await api.async_rollback()
+    assert not api.update_staged
+    assert (component / "__init__.py").read_bytes() == b"three"
+
+
+async def test_api_streams_raw_files(hass, aioclient_mock, tmp_path, monkeypatch):
+    """Test files are streamed with the raw media type and checked by sha."""
+    monkeypatch.setattr(github_module, "RETRY_BACKOFF", 0.01)
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        str(tmp_path),
+        blob_store=blob_store,
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    component = tmp_path / "custom_components" / "tesla"
+    large = bytes(range(256)) * 12 * 1024
+    files = {"manifest.json": b'{"domain": "tesla"}', "data/large.bin": large}
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, files)
+
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert (component / "data" / "large.bin").read_bytes() == large
+    assert json.loads((component / "manifest.json").read_text())["domain"] == "tesla"
+    assert blob_store.contains(git_blob_sha(large))
+    raw_calls = [
+        call
+        for call in aioclient_mock.mock_calls
+        if call[3].get("Accept") == "application/vnd.github.raw"
+    ]
+    assert [str(call[1]) for call in raw_calls] == [
+        f"{TEST_BLOBS_URL}{git_blob_sha(large)}"
+    ]
+    stats = api.last_stats
+    assert stats.requests == aioclient_mock.call_count
+    assert stats.files_written == len(files)
+    assert stats.bytes_received > len(large)
+    assert stats.retries == 0
+    assert stats.duration >= 0
+
+    # A body that does not match the tree sha is not installed
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    aioclient_mock.get(f"{TEST_BLOBS_URL}{git_blob_sha(b'new')}", content=b"old")
+    mock_component_tree(aioclient_mock, {**files, "data/large.bin": b"new"})
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    assert (component / "data" / "large.bin").read_bytes() == large
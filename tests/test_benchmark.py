@@ -0,0 +1,23 @@
+"""Smoke test for the PRCustomComponent benchmark harness."""
+from custom_components.pr_custom_component.const import (
+    DOWNLOAD_MODE_CONTENTS,
+    DOWNLOAD_MODE_TARBALL,
+    DOWNLOAD_MODE_TREES,
+)
+
+from .benchmark import async_run_case
+
+
+async def test_benchmark_case(socket_enabled):
+    """Test each download mode installs and resyncs from the fake server."""
+    for mode in (DOWNLOAD_MODE_CONTENTS, DOWNLOAD_MODE_TREES, DOWNLOAD_MODE_TARBALL):
+        result = await async_run_case(mode, 12, 0)
+        assert result["install"]["files_written"] == 12
+        assert result["install"]["requests"] > 1
+        assert result["peak_rss_kb"] > 0
+    # A tarball resync extracts every file again
+    assert result["resync"]["files_written"] == 12
+    # Unchanged trees are answered from the response cache and nothing is fetched
+    trees = await async_run_case(DOWNLOAD_MODE_TREES, 12, 0)
+    assert trees["resync"]["files_written"] == 0
+    assert trees["resync"]["cache_hits"] == trees["resync"]["requests"]
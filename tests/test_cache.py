@@ -0,0 +1,67 @@
+"""Tests for PRCustomComponent response cache."""
+import time
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from custom_components.pr_custom_component.cache import ResponseCache
+from custom_components.pr_custom_component.github import GitHubClient, RequestBudget
+
+from .const import MOCK_PR_RESPONSE, TEST_API_PR_URL
+
+ETAG = {"ETag": '"abc"'}
+
+
+def test_cache_eviction():
+    """Test entries are evicted least recently used first and after the TTL."""
+    cache = ResponseCache(max_entries=2, max_bytes=20, ttl=60)
+    assert not cache.store("a", {}, "no validators")
+    assert cache.store("a", ETAG, "a")
+    assert cache.store("b", ETAG, "b")
+    assert cache.get("a") is not None
+    assert cache.store("c", ETAG, "c")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    assert not cache.store("large", ETAG, "x" * 20)
+    assert cache.store("d", ETAG, "d" * 14)
+    assert cache.get("a") is None
+    assert cache.size <= 20
+
+    cache.get("d").timestamp = time.time() - 61
+    assert cache.get("d") is None
+
+
+def test_cache_restore():
+    """Test saved entries are restored and only fresh ones skip a request."""
+    cache = ResponseCache()
+    cache.store("fresh", ETAG, {"number": 1})
+    cache.store("old", ETAG, {"number": 2})
+    cache.get("old").timestamp = time.time() - 3600
+    saved = cache.as_dict()
+
+    restored = ResponseCache()
+    restored.load(saved)
+    assert restored.conditional_headers("old") == {"If-None-Match": '"abc"'}
+    assert restored.get_restored("old") is None
+    assert restored.get_restored("fresh").body == {"number": 1}
+    # Only the first request after restoring is skipped
+    assert restored.get_restored("fresh") is None
+
+
+async def test_restored_response_skips_request(hass, aioclient_mock):
+    """Test a response saved just before a restart is used without a request."""
+    cache = ResponseCache()
+    cache.store(TEST_API_PR_URL, ETAG, MOCK_PR_RESPONSE)
+    restored = ResponseCache()
+    restored.load(cache.as_dict())
+    github = GitHubClient(async_get_clientsession(hass), restored)
+    aioclient_mock.get(TEST_API_PR_URL, status=304)
+
+    budget = RequestBudget()
+    assert await github.async_get(TEST_API_PR_URL, budget=budget) == MOCK_PR_RESPONSE
+    assert aioclient_mock.call_count == 0
+    assert await github.async_get(TEST_API_PR_URL, budget=budget) == MOCK_PR_RESPONSE
+    assert aioclient_mock.call_count == 1
+    assert budget.stats.requests == 1
+    assert budget.stats.cache_hits == 2
+    assert budget.stats.cache_hit_ratio == 100
@@ -0,0 +1,82 @@
+"""Tests for PRCustomComponent diagnostics."""
+import json
+
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import yarl
+
+from custom_components.pr_custom_component import (
+    PRCustomComponentApiClient,
+    PRCustomComponentDataUpdateCoordinator,
+    get_github_client,
+)
+from custom_components.pr_custom_component.const import (
+    CONF_WEBHOOK_SECRET,
+    DOMAIN,
+    DOWNLOAD_MODE_TREES,
+    HACS_DOMAIN,
+)
+from custom_components.pr_custom_component.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+from .const import MOCK_CONFIG_DATA, MOCK_PR_RESPONSE, TEST_API_PR_URL, TEST_PR_URL
+from .test_api import mock_component_tree
+
+TEST_TOKEN = "ghp_0123456789abcdef"
+
+
+async def test_diagnostics_timeline(hass, aioclient_mock, tmp_path):
+    """Test diagnostics include the sync timeline with the token redacted."""
+    MockConfigEntry(domain=HACS_DOMAIN, data={"token": TEST_TOKEN}).add_to_hass(hass)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            **MOCK_CONFIG_DATA,
+            "token": TEST_TOKEN,
+            CONF_WEBHOOK_ID: "webhook_id",
+            CONF_WEBHOOK_SECRET: "webhook_secret",
+        },
+        entry_id="test",
+    )
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        str(tmp_path),
+        github=get_github_client(hass),
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    api.set_token(TEST_TOKEN)
+    hass.data[DOMAIN] = {
+        entry.entry_id: PRCustomComponentDataUpdateCoordinator(hass, client=api)
+    }
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(
+        aioclient_mock,
+        {
+            "manifest.json": b'{"domain": "tesla"}',
+            "strings.json": b'{"title": "Tesla"}',
+        },
+    )
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    with api.last_stats.span("fetch", f"https://example.com/?token={TEST_TOKEN}"):
+        pass
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert TEST_TOKEN not in json.dumps(diagnostics)
+    assert diagnostics["entry"]["data"]["token"] == "**REDACTED**"
+    assert diagnostics["entry"]["data"][CONF_WEBHOOK_ID] == "**REDACTED**"
+    assert diagnostics["entry"]["data"][CONF_WEBHOOK_SECRET] == "**REDACTED**"
+    assert diagnostics["component"]["name"] == "tesla"
+    (sync,) = diagnostics["syncs"]
+    assert sync["files_written"] == 2
+    names = {span["name"] for span in sync["spans"]}
+    assert {"listing", "fetch", "decode", "write", "manifest", "translations"} <= (
+        names
+    )
+    requests = [span for span in sync["spans"] if span["name"] == "request"]
+    assert requests and all(span["status"] == 200 for span in requests)
+    assert all(span["cache_hit"] is False for span in requests)
+    assert all(span["end_ms"] >= span["start_ms"] for span in sync["spans"])
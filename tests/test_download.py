@@ -0,0 +1,103 @@
+"""Tests for PRCustomComponent download pipeline."""
+import asyncio
+
+from custom_components.pr_custom_component import github as github_module
+from custom_components.pr_custom_component.download import (
+    DownloadJob,
+    DownloadPipeline,
+)
+
+
+async def test_pipeline_priority_and_concurrency():
+    """Test priority files are fetched first and concurrency is bounded."""
+    fetched = []
+    written = {}
+    active = 0
+    peak = 0
+
+    async def lister(url):
+        if url == "root":
+            jobs = [DownloadJob(f"file{i}.py", f"url{i}", size=10) for i in range(6)]
+            jobs.append(DownloadJob("manifest.json", "manifest", size=10))
+            jobs.append(DownloadJob("__init__.py", "init", size=10))
+            return jobs, ["sub"]
+        return [DownloadJob("sub/file.py", "sub-url", size=10)], []
+
+    async def fetcher(job):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        fetched.append(job.path)
+        await asyncio.sleep(0)
+        active -= 1
+        return job.path.encode()
+
+    async def writer(job, contents):
+        written[job.path] = contents
+        return True
+
+    pipeline = DownloadPipeline(
+        lister,
+        fetcher,
+        lambda job, payload: payload,
+        writer,
+        concurrency=2,
+        max_bytes=20,
+    )
+    assert await pipeline.async_run(listings=["root"])
+    assert set(fetched[:2]) == {"manifest.json", "__init__.py"}
+    assert peak <= 2
+    assert len(written) == 9
+    assert written["sub/file.py"] == b"sub/file.py"
+
+
+async def test_pipeline_fails_fast():
+    """Test a failed priority file aborts the remaining work."""
+    fetched = []
+
+    async def fetcher(job):
+        fetched.append(job.path)
+        return None if job.path == "manifest.json" else b""
+
+    async def writer(job, contents):
+        return True
+
+    pipeline = DownloadPipeline(
+        None,
+        fetcher,
+        lambda job, payload: payload,
+        writer,
+        concurrency=1,
+    )
+    jobs = [DownloadJob(f"file{i}.py", "url") for i in range(5)]
+    jobs.append(DownloadJob("manifest.json", "url"))
+    assert not await pipeline.async_run(jobs=jobs)
+    assert fetched == ["manifest.json"]
+
+
+async def test_pipeline_retries_failed_jobs(monkeypatch):
+    """Test only failed jobs are fetched again."""
+    monkeypatch.setattr(github_module, "RETRY_BACKOFF", 0.01)
+    fetched = []
+
+    async def fetcher(job):
+        fetched.append(job.path)
+        if job.path == "flaky.py" and fetched.count("flaky.py") < 3:
+            return None
+        return job.path.encode()
+
+    async def writer(job, contents):
+        return True
+
+    pipeline = DownloadPipeline(
+        None,
+        fetcher,
+        lambda job, payload: payload,
+        writer,
+        retries=2,
+    )
+    jobs = [DownloadJob("manifest.json", "url"), DownloadJob("flaky.py", "url")]
+    assert await pipeline.async_run(jobs=jobs)
+    assert fetched.count("manifest.json") == 1
+    assert fetched.count("flaky.py") == 3
+    assert not pipeline.failed
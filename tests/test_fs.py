@@ -0,0 +1,33 @@
+"""Tests for PRCustomComponent async filesystem."""
+import os
+
+from custom_components.pr_custom_component.const import TRASH_PATH
+from custom_components.pr_custom_component.fs import AsyncFileSystem
+
+
+async def test_fs_delete_uses_trash(hass, tmp_path):
+    """Test deletes are renamed away at once and emptied in the background."""
+    file_system = AsyncFileSystem()
+    component = tmp_path / "tesla"
+    await file_system.async_write(str(component / "translations" / "en.json"), b"{}")
+    assert await file_system.async_isdir(str(component))
+    assert await file_system.async_read(str(component / "missing.py")) is None
+
+    assert await file_system.async_delete(str(component))
+    assert not component.exists()
+    await file_system.async_wait_cleanups()
+    assert not (tmp_path / TRASH_PATH).exists()
+    assert not await file_system.async_delete(str(component))
+
+
+async def test_fs_write_replaces_hardlinks(hass, tmp_path):
+    """Test writes never change other links to the same file."""
+    file_system = AsyncFileSystem()
+    original = tmp_path / "original.py"
+    original.write_bytes(b"one")
+    link = tmp_path / "link.py"
+    os.link(original, link)
+
+    await file_system.async_write(str(link), b"two")
+    assert original.read_bytes() == b"one"
+    assert await file_system.async_read(str(link)) == b"two"
@@ -0,0 +1,121 @@
+"""Tests for PRCustomComponent GitHub client."""
+import asyncio
+import time
+
+import aiohttp
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import pytest
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMockResponse,
+)
+
+from custom_components.pr_custom_component import github as github_module
+from custom_components.pr_custom_component.exceptions import RateLimitException
+from custom_components.pr_custom_component.github import GitHubClient, RequestBudget
+
+from .const import MOCK_PR_RESPONSE, TEST_API_PR_URL
+
+TEST_RATE_LIMIT_URL = "https://api.github.com/rate_limit"
+
+
+async def test_rate_limit_budget(hass, aioclient_mock):
+    """Test rate limit headers are tracked and bound the sync budget."""
+    github = GitHubClient(async_get_clientsession(hass))
+    reset = int(time.time()) + 3600
+    aioclient_mock.get(
+        TEST_API_PR_URL,
+        json=MOCK_PR_RESPONSE,
+        headers={"X-RateLimit-Remaining": "7", "X-RateLimit-Reset": str(reset)},
+    )
+    assert await github.async_get(TEST_API_PR_URL) == MOCK_PR_RESPONSE
+    assert github.remaining == 7
+    assert github.reset == reset
+
+    budget = github.create_budget()
+    assert budget.remaining == 2
+    await github.async_acquire(budget)
+    await github.async_acquire(budget)
+    with pytest.raises(RateLimitException) as exc_info:
+        await github.async_acquire(budget)
+    assert exc_info.value.reset == reset
+    assert budget.spent == 2
+
+
+async def test_rate_limit_probe(hass, aioclient_mock):
+    """Test an exhausted limit with an unknown reset is probed for free."""
+    github = GitHubClient(async_get_clientsession(hass))
+    reset = int(time.time()) + 3600
+    aioclient_mock.get(
+        TEST_RATE_LIMIT_URL,
+        json={"resources": {"core": {"limit": 60, "remaining": 0, "reset": reset}}},
+    )
+    github.update_rate_limit({"X-RateLimit-Remaining": "0"})
+    with pytest.raises(RateLimitException) as exc_info:
+        await github.async_get(TEST_API_PR_URL)
+    assert exc_info.value.reset == reset
+    assert aioclient_mock.call_count == 1
+
+
+async def test_rate_limit_retry_after(hass, aioclient_mock):
+    """Test a short Retry-After is waited out instead of failing."""
+    github = GitHubClient(async_get_clientsession(hass))
+    responses = [
+        AiohttpClientMockResponse(
+            "get",
+            TEST_API_PR_URL,
+            status=429,
+            json={"message": "You have exceeded a secondary rate limit."},
+            headers={"Retry-After": "0.1"},
+        ),
+        AiohttpClientMockResponse("get", TEST_API_PR_URL, json=MOCK_PR_RESPONSE),
+    ]
+
+    async def side_effect(method, url, data):
+        return responses.pop(0)
+
+    aioclient_mock.get(TEST_API_PR_URL, side_effect=side_effect)
+    assert await github.async_get(TEST_API_PR_URL) == MOCK_PR_RESPONSE
+    assert aioclient_mock.call_count == 2
+
+
+async def test_retry_transient_errors(hass, aioclient_mock, monkeypatch):
+    """Test 5xx responses and timeouts are retried within the sync budget."""
+    monkeypatch.setattr(github_module, "RETRY_BACKOFF", 0.01)
+    github = GitHubClient(async_get_clientsession(hass))
+    responses = [
+        AiohttpClientMockResponse("get", TEST_API_PR_URL, status=502),
+        AiohttpClientMockResponse("get", TEST_API_PR_URL, exc=asyncio.TimeoutError),
+        AiohttpClientMockResponse("get", TEST_API_PR_URL, json=MOCK_PR_RESPONSE),
+    ]
+
+    async def side_effect(method, url, data):
+        return responses.pop(0)
+
+    aioclient_mock.get(TEST_API_PR_URL, side_effect=side_effect)
+    budget = RequestBudget(retries=5)
+    assert await github.async_get(TEST_API_PR_URL, budget=budget) == MOCK_PR_RESPONSE
+    assert aioclient_mock.call_count == 3
+    assert budget.retries == 3
+    assert budget.stats.retries == 2
+    assert budget.stats.requests == 2
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(TEST_API_PR_URL, status=503)
+    with pytest.raises(aiohttp.ClientResponseError):
+        await github.async_get(TEST_API_PR_URL, budget=RequestBudget(retries=1))
+    assert aioclient_mock.call_count == 2
+
+
+async def test_stream_records_bytes(hass, aioclient_mock):
+    """Test streamed bodies are recorded in the budget's stats."""
+    github = GitHubClient(async_get_clientsession(hass))
+    body = b"x" * 10000
+    aioclient_mock.get(TEST_API_PR_URL, content=body)
+
+    async def sink(response):
+        return len(await response.content.read())
+
+    budget = RequestBudget()
+    assert await github.async_stream(TEST_API_PR_URL, sink, budget=budget) == len(body)
+    assert budget.stats.requests == 1
+    assert budget.stats.bytes_received == len(body)
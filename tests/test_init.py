@@ -1,9 +1,14 @@
 """Test PRCustomComponent setup process."""
+from datetime import timedelta
+
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
+import yarl
 
 from custom_components.pr_custom_component import (
+    PRCustomComponentApiClient,
     PRCustomComponentDataUpdateCoordinator,
     async_reload_entry,
     async_setup_entry,
@@ -11,7 +16,7 @@ from custom_components.pr_custom_component import (
 )
 from custom_components.pr_custom_component.const import DOMAIN
 
-from .const import MOCK_CONFIG, MOCK_CONFIG_DATA
+from .const import MOCK_CONFIG, MOCK_CONFIG_DATA, TEST_CONFIG_PATH, TEST_PR_URL
 
 
 # We can pass fixtures as defined in conftest.py to tell pytest to use the fixture
@@ -58,3 +63,24 @@ async def test_setup_entry_exception(hass, error_on_get_data):
     # an error.
     with pytest.raises(ConfigEntryNotReady):
         assert await async_setup_entry(hass, config_entry)
+
+
+async def test_adaptive_poll_interval(hass):
+    """Test polling speeds up on changes, backs off when idle and stops when closed."""
+    client = PRCustomComponentApiClient(
+        async_get_clientsession(hass), yarl.URL(TEST_PR_URL), TEST_CONFIG_PATH
+    )
+    coordinator = PRCustomComponentDataUpdateCoordinator(
+        hass,
+        client=client,
+        min_interval=timedelta(minutes=10),
+        max_interval=timedelta(minutes=30),
+    )
+    intervals = []
+    for updated_at in ("a", "a", "a", "a", "b"):
+        coordinator.update_interval = coordinator._next_interval(
+            {"state": "open", "updated_at": updated_at}
+        )
+        intervals.append(coordinator.update_interval.total_seconds() / 60)
+    assert intervals == [10, 20, 30, 30, 10]
+    assert coordinator._next_interval({"state": "closed", "merged": True}) is None
@@ -0,0 +1,169 @@
+"""Tests for PRCustomComponent install index."""
+import os
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import yarl
+
+from custom_components.pr_custom_component import (
+    PRCustomComponentApiClient,
+    PRCustomComponentDataUpdateCoordinator,
+    async_load_install_index,
+    get_install_index,
+)
+from custom_components.pr_custom_component.blobstore import git_blob_sha
+from custom_components.pr_custom_component.const import (
+    DOMAIN,
+    DOWNLOAD_MODE_TREES,
+    INSTALL_INDEX_STORAGE_KEY,
+    INSTALL_INDEX_STORAGE_VERSION,
+    INTEGRITY_FILE,
+)
+from custom_components.pr_custom_component.installindex import (
+    InstallIndex,
+    scan_tree,
+    tree_matches,
+    trim_pull,
+)
+
+from .const import MOCK_PR_RESPONSE, TEST_API_PR_URL, TEST_PR_URL
+from .test_api import mock_component_tree
+
+
+def test_scan_tree(tmp_path):
+    """Test files are matched by size and mtime."""
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "sensor.cpython-311.pyc").write_bytes(b"pyc")
+    (tmp_path / "translations").mkdir()
+    (tmp_path / "translations" / "en.json").write_bytes(b"{}")
+    (tmp_path / "sensor.py").write_bytes(b"two")
+    (tmp_path / INTEGRITY_FILE).write_text("{}")
+
+    scanned = scan_tree(str(tmp_path))
+
+    assert sorted(scanned) == ["sensor.py", "translations/en.json"]
+    assert scanned["sensor.py"][0] == 3
+    files = {name: ["sha", *stat] for name, stat in scanned.items()}
+    assert tree_matches(str(tmp_path), files)
+    os.utime(tmp_path / "sensor.py", ns=(0, 0))
+    assert not tree_matches(str(tmp_path), files)
+    assert not tree_matches(str(tmp_path / "missing"), files)
+
+
+def test_install_index_load():
+    """Test records survive as_dict and load."""
+    index = InstallIndex()
+    changes = []
+    index.on_change = lambda: changes.append(True)
+    index.set("entry", {"commit": "abc"})
+    index.remove("other")
+    assert changes == [True]
+
+    restored = InstallIndex()
+    restored.load({"entries": {**index.as_dict()["entries"], "bad": []}})
+    assert len(restored) == 1
+    assert restored.get("entry") == {"commit": "abc"}
+    pull = trim_pull(MOCK_PR_RESPONSE)
+    assert pull["head"]["repo"]["contents_url"].endswith("/contents/{+path}")
+    assert pull["labels"] == [
+        {"name": label["name"]} for label in MOCK_PR_RESPONSE["labels"]
+    ]
+
+
+async def test_restart_without_requests(hass, aioclient_mock, hass_storage, tmp_path):
+    """Test an unchanged install is restored at startup without any request."""
+    files = {"manifest.json": b'{"domain": "tesla"}', "sensor.py": b"two"}
+
+    def create_coordinator():
+        api = PRCustomComponentApiClient(
+            async_get_clientsession(hass), yarl.URL(TEST_PR_URL), str(tmp_path)
+        )
+        api.download_mode = DOWNLOAD_MODE_TREES
+        # Seeded from the config entry on setup
+        api.updated_at = MOCK_PR_RESPONSE["updated_at"]
+        return PRCustomComponentDataUpdateCoordinator(hass, api, entry_id="test")
+
+    await async_load_install_index(hass)
+    coordinator = create_coordinator()
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, files)
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.restored
+    record = get_install_index(hass).get("test")
+    assert record["commit"] == MOCK_PR_RESPONSE["head"]["sha"]
+    assert record["files"]["sensor.py"][:2] == [git_blob_sha(b"two"), 3]
+
+    # Restart with the saved index
+    hass_storage[INSTALL_INDEX_STORAGE_KEY] = {
+        "version": INSTALL_INDEX_STORAGE_VERSION,
+        "key": INSTALL_INDEX_STORAGE_KEY,
+        "data": get_install_index(hass).as_dict(),
+    }
+    hass.data.pop(DOMAIN)
+    await async_load_install_index(hass)
+    aioclient_mock.clear_requests()
+    coordinator = create_coordinator()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.restored
+    assert aioclient_mock.call_count == 0
+    assert coordinator.api.name == "tesla"
+    assert coordinator.data["updated_at"] == MOCK_PR_RESPONSE["updated_at"]
+    assert not coordinator.api.update_available
+
+    # A changed file falls back to asking GitHub
+    (tmp_path / "custom_components" / "tesla" / "sensor.py").write_bytes(b"tw0")
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    coordinator = create_coordinator()
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.restored
+    assert aioclient_mock.call_count == 1
+
+
+async def test_restore_after_rollback(hass, aioclient_mock, hass_storage, tmp_path):
+    """Test a rolled back install is restored with its own pull data."""
+    newer = {**MOCK_PR_RESPONSE, "updated_at": "2021-03-20T04:46:20Z"}
+
+    def create_coordinator():
+        api = PRCustomComponentApiClient(
+            async_get_clientsession(hass), yarl.URL(TEST_PR_URL), str(tmp_path)
+        )
+        api.download_mode = DOWNLOAD_MODE_TREES
+        api.updated_at = MOCK_PR_RESPONSE["updated_at"]
+        return PRCustomComponentDataUpdateCoordinator(hass, api, entry_id="test")
+
+    await async_load_install_index(hass)
+    coordinator = create_coordinator()
+    api = coordinator.api
+    mock_component_tree(aioclient_mock, {"sensor.py": b"one"})
+    await api.async_update_data(download=True, pull_json=MOCK_PR_RESPONSE)
+    aioclient_mock.clear_requests()
+    mock_component_tree(aioclient_mock, {"sensor.py": b"two"})
+    await api.async_update_data(download=True, pull_json=newer)
+    assert not api.update_available
+
+    assert await api.async_rollback()
+    assert api.updated_at == MOCK_PR_RESPONSE["updated_at"]
+    assert api.update_available
+    await coordinator.async_save_install_index()
+    record = get_install_index(hass).get("test")
+    assert record["pull"]["updated_at"] == MOCK_PR_RESPONSE["updated_at"]
+
+    # Restart with the saved index
+    hass_storage[INSTALL_INDEX_STORAGE_KEY] = {
+        "version": INSTALL_INDEX_STORAGE_VERSION,
+        "key": INSTALL_INDEX_STORAGE_KEY,
+        "data": get_install_index(hass).as_dict(),
+    }
+    hass.data.pop(DOMAIN)
+    await async_load_install_index(hass)
+    aioclient_mock.clear_requests()
+    coordinator = create_coordinator()
+    await coordinator.async_refresh()
+    assert coordinator.restored
+    assert aioclient_mock.call_count == 0
+    assert coordinator.data["updated_at"] == MOCK_PR_RESPONSE["updated_at"]
+    # The next poll still flags the update that was rolled back
+    assert await coordinator.api.async_update_data(pull_json=newer) == newer
+    assert coordinator.api.update_available
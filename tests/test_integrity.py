@@ -0,0 +1,121 @@
+"""Tests for PRCustomComponent integrity verification."""
+import json
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import yarl
+
+from custom_components.pr_custom_component import PRCustomComponentApiClient
+from custom_components.pr_custom_component import blobstore as blobstore_module
+from custom_components.pr_custom_component.blobstore import BlobStore, git_blob_sha
+from custom_components.pr_custom_component.const import (
+    DOWNLOAD_MODE_TREES,
+    INTEGRITY_FILE,
+    VERIFY_MISSING,
+    VERIFY_MODIFIED,
+    VERIFY_REPAIRED,
+)
+from custom_components.pr_custom_component.integrity import find_damaged, hash_tree
+
+from .const import MOCK_PR_RESPONSE, TEST_API_PR_URL, TEST_PR_URL
+from .test_api import mock_component_tree
+
+TEST_CONTENTS_URL = (
+    "https://api.github.com/repos/alandtse/home-assistant/contents/"
+    "homeassistant/components/tesla/"
+)
+
+
+def test_hash_tree(tmp_path, monkeypatch):
+    """Test files are hashed as git blobs, large ones through mmap."""
+    monkeypatch.setattr(blobstore_module, "MMAP_MIN_SIZE", 4)
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "sensor.cpython-311.pyc").write_bytes(b"pyc")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "large.py").write_bytes(b"large contents")
+    (tmp_path / "small.py").write_bytes(b"s")
+    (tmp_path / "empty.py").write_bytes(b"")
+    (tmp_path / INTEGRITY_FILE).write_text("{}")
+
+    files = hash_tree(str(tmp_path))
+
+    assert files == {
+        "empty.py": git_blob_sha(b""),
+        "small.py": git_blob_sha(b"s"),
+        "sub/large.py": git_blob_sha(b"large contents"),
+    }
+    assert find_damaged(str(tmp_path), files) == {}
+    (tmp_path / "sub" / "large.py").write_bytes(b"large content")
+    (tmp_path / "small.py").unlink()
+    assert find_damaged(str(tmp_path), files) == {
+        "small.py": VERIFY_MISSING,
+        "sub/large.py": VERIFY_MODIFIED,
+    }
+
+
+async def test_api_verify_repair(hass, aioclient_mock, tmp_path):
+    """Test damaged files are restored from intact blobs or downloaded."""
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass),
+        yarl.URL(TEST_PR_URL),
+        str(tmp_path),
+        blob_store=blob_store,
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    component = tmp_path / "custom_components" / "tesla"
+    files = {
+        "manifest.json": b'{"domain": "tesla"}',
+        "__init__.py": b"one",
+        "sensor.py": b"two",
+        "strings.json": b'{"title": "Tesla"}',
+    }
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, files)
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    integrity = json.loads((component / INTEGRITY_FILE).read_text())
+    assert integrity["commit"] == MOCK_PR_RESPONSE["head"]["sha"]
+    assert set(integrity["files"]) == {*files, "translations/en.json"}
+    assert await api.async_verify() == {}
+    # A newer version is polled but not installed
+    pull_json = {**MOCK_PR_RESPONSE, "updated_at": "2021-03-20T04:46:20Z"}
+    assert await api.async_update_data(pull_json=pull_json) == pull_json
+    assert api.update_available
+
+    # Writing in place also damages the blob store hardlink of sensor.py
+    with open(component / "sensor.py", "wb") as localfile:
+        localfile.write(b"tw0")
+    (component / "__init__.py").unlink()
+    (component / "manifest.json").write_text("{")
+    (component / "translations" / "en.json").unlink()
+    aioclient_mock.clear_requests()
+    assert await api.async_verify(repair=False) == {
+        "__init__.py": VERIFY_MISSING,
+        "manifest.json": VERIFY_MODIFIED,
+        "sensor.py": VERIFY_MODIFIED,
+        "translations/en.json": VERIFY_MISSING,
+    }
+    assert (component / "sensor.py").read_bytes() == b"tw0"
+
+    ref = f"?ref={MOCK_PR_RESPONSE['head']['sha']}"
+    aioclient_mock.get(f"{TEST_CONTENTS_URL}sensor.py{ref}", content=b"two")
+    aioclient_mock.get(
+        f"{TEST_CONTENTS_URL}manifest.json{ref}",
+        json={"content": "eyJkb21haW4iOiAidGVzbGEifQ=="},
+    )
+    assert await api.async_verify() == {
+        "__init__.py": VERIFY_REPAIRED,
+        "manifest.json": VERIFY_REPAIRED,
+        "sensor.py": VERIFY_REPAIRED,
+        "translations/en.json": VERIFY_REPAIRED,
+    }
+    # Only files without an intact blob are downloaded
+    assert sorted(str(call[1]) for call in aioclient_mock.mock_calls) == [
+        f"{TEST_CONTENTS_URL}manifest.json{ref}",
+        f"{TEST_CONTENTS_URL}sensor.py{ref}",
+    ]
+    assert (component / "__init__.py").read_bytes() == b"one"
+    assert (component / "sensor.py").read_bytes() == b"two"
+    # The manifest keeps the installed version
+    manifest = json.loads((component / "manifest.json").read_text())
+    assert manifest["version"] == integrity["manifest"]["version"]
+    assert await api.async_verify() == {}
@@ -0,0 +1,98 @@
+"""Tests for PRCustomComponent patch overlay."""
+import pytest
+
+from custom_components.pr_custom_component.exceptions import PatchError
+from custom_components.pr_custom_component.patch import patch_component
+
+TEST_PREFIX = "homeassistant/components/tesla/"
+TEST_PATCH = """From 0123456789abcdef Mon Sep 17 00:00:00 2001
+From: Alan Tse <alandtse@gmail.com>
+Subject: [PATCH 1/2] feat: add switch
+
+---
+ homeassistant/components/tesla/__init__.py | 2 +-
+ homeassistant/components/tesla/switch.py   | 1 +
+ 2 files changed, 2 insertions(+), 1 deletion(-)
+
+diff --git a/homeassistant/components/tesla/__init__.py b/homeassistant/components/tesla/__init__.py
+index 1111111..2222222 100644
+--- a/homeassistant/components/tesla/__init__.py
++++ b/homeassistant/components/tesla/__init__.py
+@@ -3,3 +3,3 @@ import logging
+
+-PLATFORMS = ["sensor"]
++PLATFORMS = ["sensor", "switch"]
+
+diff --git a/homeassistant/components/tesla/switch.py b/homeassistant/components/tesla/switch.py
+new file mode 100644
+index 0000000..3333333
+--- /dev/null
++++ b/homeassistant/components/tesla/switch.py
+@@ -0,0 +1 @@
++\"\"\"Tesla switch.\"\"\"
+\\ No newline at end of file
+diff --git a/tests/components/tesla/test_switch.py b/tests/components/tesla/test_switch.py
+new file mode 100644
+--- /dev/null
++++ b/tests/components/tesla/test_switch.py
+@@ -0,0 +1 @@
++\"\"\"Test switch.\"\"\"
+--
+2.30.0
+
+
+From fedcba9876543210 Mon Sep 17 00:00:00 2001
+From: Alan Tse <alandtse@gmail.com>
+Subject: [PATCH 2/2] refactor: drop legacy
+
+---
+diff --git a/homeassistant/components/tesla/legacy.py b/homeassistant/components/tesla/legacy.py
+deleted file mode 100644
+index 4444444..0000000
+--- a/homeassistant/components/tesla/legacy.py
++++ /dev/null
+@@ -1 +0,0 @@
+-LEGACY = True
+--
+2.30.0
+"""
+TEST_INIT = '''"""Tesla."""
+import logging
+
+PLATFORMS = ["sensor"]
+
+'''
+
+
+def make_component(tmp_path, init: str = TEST_INIT):
+    """Create a built-in component to patch."""
+    source = tmp_path / "tesla"
+    (source / "__pycache__").mkdir(parents=True)
+    (source / "__pycache__" / "__init__.cpython-38.pyc").write_bytes(b"\0")
+    (source / "__init__.py").write_text(init)
+    (source / "legacy.py").write_text("LEGACY = True\n")
+    (source / "manifest.json").write_text('{"domain": "tesla"}')
+    return str(source)
+
+
+def test_patch_component(tmp_path):
+    """Test a patch series is applied to the component only."""
+    source = make_component(tmp_path, '"""Tesla."""\n\n\n' + TEST_INIT[13:])
+    files, deleted = patch_component(TEST_PATCH, TEST_PREFIX, source)
+
+    assert set(files) == {"__init__.py", "manifest.json", "switch.py"}
+    assert deleted == {"legacy.py"}
+    # Hunks apply at an offset from their recorded position
+    assert b'PLATFORMS = ["sensor", "switch"]\n' in files["__init__.py"]
+    assert files["__init__.py"].startswith(b'"""Tesla."""\n\n\nimport')
+    assert files["switch.py"] == b'"""Tesla switch."""'
+    assert files["manifest.json"] == b'{"domain": "tesla"}'
+
+
+def test_patch_component_conflict(tmp_path):
+    """Test a patch that does not apply raises PatchError."""
+    source = make_component(tmp_path, TEST_INIT.replace("sensor", "binary_sensor"))
+    with pytest.raises(PatchError):
+        patch_component(TEST_PATCH, TEST_PREFIX, source)
+    with pytest.raises(PatchError):
+        patch_component(TEST_PATCH, TEST_PREFIX, str(tmp_path / "missing"))
@@ -0,0 +1,61 @@
+"""Tests for PRCustomComponent batched pull request poller."""
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import yarl
+
+from custom_components.pr_custom_component import poller as poller_module
+from custom_components.pr_custom_component.github import GitHubClient
+from custom_components.pr_custom_component.poller import PullRequestPoller
+
+from .const import MOCK_PR_RESPONSE, TEST_PR_URL
+
+TEST_GRAPHQL_URL = "https://api.github.com/graphql"
+TEST_OTHER_PR_URL = "https://github.com/home-assistant/core/pull/46559"
+
+
+def mock_pull_request(number: int) -> dict:
+    """Return a GraphQL pull request matching MOCK_PR_RESPONSE."""
+    return {
+        "number": number,
+        "updatedAt": MOCK_PR_RESPONSE["updated_at"],
+        "state": "OPEN",
+        "headRefName": MOCK_PR_RESPONSE["head"]["ref"],
+        "headRefOid": MOCK_PR_RESPONSE["head"]["sha"],
+        "headRepository": {"nameWithOwner": "alandtse/home-assistant"},
+        "headRepositoryOwner": {"login": "alandtse"},
+        "labels": {"nodes": [{"name": "integration: tesla"}]},
+    }
+
+
+async def test_poller_batches_pull_requests(hass, aioclient_mock, monkeypatch):
+    """Test registered pull requests are polled with one query."""
+    monkeypatch.setattr(poller_module, "BATCH_DELAY", 0)
+    poller = PullRequestPoller(GitHubClient(async_get_clientsession(hass)))
+    poller.register(yarl.URL(TEST_PR_URL))
+    poller.register(yarl.URL(TEST_OTHER_PR_URL))
+    aioclient_mock.post(
+        TEST_GRAPHQL_URL,
+        json={
+            "data": {
+                "pr0": {"pullRequest": mock_pull_request(46558)},
+                "pr1": {"pullRequest": mock_pull_request(46559)},
+            }
+        },
+    )
+
+    assert await poller.async_get_pull(yarl.URL(TEST_PR_URL)) is None
+    pull_json = await poller.async_get_pull(yarl.URL(TEST_PR_URL), "token")
+    other_json = await poller.async_get_pull(yarl.URL(TEST_OTHER_PR_URL), "token")
+    assert aioclient_mock.call_count == 1
+    _method, _url, data, headers = aioclient_mock.mock_calls[0]
+    assert headers["Authorization"] == "token token"
+    assert data["variables"]["number1"] == 46559
+    assert other_json["number"] == 46559
+
+    for key in ("number", "updated_at", "state"):
+        assert pull_json[key] == MOCK_PR_RESPONSE[key]
+    assert {"name": "integration: tesla"} in pull_json["labels"]
+    for key in ("ref", "sha"):
+        assert pull_json["head"][key] == MOCK_PR_RESPONSE["head"][key]
+    assert pull_json["head"]["user"]["login"] == "alandtse"
+    for key in ("url", "contents_url"):
+        assert pull_json["head"]["repo"][key] == MOCK_PR_RESPONSE["head"]["repo"][key]
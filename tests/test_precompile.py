@@ -0,0 +1,47 @@
+"""Tests for PRCustomComponent bytecode precompilation."""
+import importlib.util
+import marshal
+
+from custom_components.pr_custom_component import precompile as precompile_module
+from custom_components.pr_custom_component.precompile import find_sources, precompile
+
+
+def load_code(path):
+    """Return the code object cached for the python file at path."""
+    with open(importlib.util.cache_from_source(str(path)), "rb") as cached:
+        return marshal.loads(cached.read()[16:])
+
+
+def test_precompile_pool(tmp_path, monkeypatch):
+    """Test a tree is compiled by worker processes for its install path."""
+    monkeypatch.setattr(precompile_module, "PRECOMPILE_POOL_MIN_FILES", 1)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "__init__.py").write_text("VALUE = 1\n")
+    (tmp_path / "sensor.py").write_text("def sensor():\n    return 2\n")
+    (tmp_path / "sub" / "module.py").write_text("import os\n")
+    (tmp_path / "strings.json").write_text("{}")
+
+    assert precompile(str(tmp_path), "/config/custom_components/tesla", 2) == {}
+
+    assert [path[len(str(tmp_path)) :] for path in find_sources(str(tmp_path))] == [
+        "/__init__.py",
+        "/sensor.py",
+        "/sub/module.py",
+    ]
+    code = load_code(tmp_path / "sub" / "module.py")
+    assert code.co_filename == "/config/custom_components/tesla/sub/module.py"
+    assert load_code(tmp_path / "sensor.py").co_consts
+
+
+def test_precompile_syntax_error(tmp_path):
+    """Test files that do not compile are reported."""
+    (tmp_path / "__init__.py").write_text("VALUE = 1\n")
+    (tmp_path / "broken.py").write_text("def broken(:\n")
+
+    errors = precompile(str(tmp_path))
+
+    assert list(errors) == ["broken.py"]
+    assert "SyntaxError" in errors["broken.py"]
+    assert load_code(tmp_path / "__init__.py").co_filename == str(
+        tmp_path / "__init__.py"
+    )
@@ -0,0 +1,46 @@
+"""Tests for PRCustomComponent services."""
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import yarl
+
+from custom_components.pr_custom_component import (
+    PRCustomComponentApiClient,
+    PRCustomComponentDataUpdateCoordinator,
+)
+from custom_components.pr_custom_component.const import (
+    DOMAIN,
+    DOWNLOAD_MODE_TREES,
+    SERVICE_PROFILE_SYNC,
+)
+from custom_components.pr_custom_component.services import async_setup_services
+
+from .const import MOCK_PR_RESPONSE, TEST_API_PR_URL, TEST_PR_URL
+from .test_api import mock_component_tree
+
+
+async def test_profile_sync(hass, aioclient_mock, tmp_path):
+    """Test profile_sync writes a profile and allocation report."""
+    hass.config.config_dir = str(tmp_path)
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass), yarl.URL(TEST_PR_URL), str(tmp_path)
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    hass.data[DOMAIN] = {"test": PRCustomComponentDataUpdateCoordinator(hass, api)}
+    async_setup_services(hass)
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    mock_component_tree(aioclient_mock, {"manifest.json": b'{"domain": "tesla"}'})
+
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_PROFILE_SYNC,
+        {"entry_id": "test", "tracemalloc": True, "top": 5},
+        blocking=True,
+    )
+
+    assert (tmp_path / "custom_components" / "tesla" / "manifest.json").is_file()
+    (profile,) = tmp_path.glob(f"{DOMAIN}.test.*.prof")
+    assert profile.stat().st_size
+    (report,) = tmp_path.glob(f"{DOMAIN}.test.*.allocations.txt")
+    lines = report.read_text().splitlines()
+    assert lines[0].startswith("Top 5 of")
+    assert len(lines) == 6
+    assert hass.data[DOMAIN]["test"].data == MOCK_PR_RESPONSE
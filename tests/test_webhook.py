@@ -0,0 +1,99 @@
+"""Tests for PRCustomComponent webhook."""
+import hashlib
+import hmac
+import json
+from unittest.mock import AsyncMock, Mock
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+import yarl
+
+from custom_components.pr_custom_component import (
+    PRCustomComponentApiClient,
+    PRCustomComponentDataUpdateCoordinator,
+)
+from custom_components.pr_custom_component.const import DOMAIN
+from custom_components.pr_custom_component.webhook import (
+    async_handle_webhook,
+    async_setup_webhook,
+    verify_signature,
+)
+
+from .const import MOCK_CONFIG_DATA, MOCK_PR_RESPONSE, TEST_CONFIG_PATH, TEST_PR_URL
+
+TEST_SECRET = "secret"
+TEST_WEBHOOK_ID = "test_webhook"
+
+
+def sign(body: bytes) -> str:
+    """Return the GitHub signature of body."""
+    return "sha256=" + hmac.new(TEST_SECRET.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_verify_signature():
+    """Test HMAC signatures are verified."""
+    assert verify_signature(TEST_SECRET, b"{}", sign(b"{}"))
+    assert not verify_signature(TEST_SECRET, b"{}", sign(b"[]"))
+    assert not verify_signature("", b"{}", sign(b"{}"))
+
+
+async def test_webhook_refresh(hass):
+    """Test signed deliveries for the Pull Request trigger a refresh."""
+    assert await async_setup_component(hass, "webhook", {})
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            **MOCK_CONFIG_DATA,
+            "webhook_id": TEST_WEBHOOK_ID,
+            "webhook_secret": TEST_SECRET,
+        },
+        entry_id="test",
+    )
+    entry.add_to_hass(hass)
+    coordinator = PRCustomComponentDataUpdateCoordinator(
+        hass,
+        PRCustomComponentApiClient(
+            async_get_clientsession(hass), yarl.URL(TEST_PR_URL), TEST_CONFIG_PATH
+        ),
+    )
+    coordinator.data = MOCK_PR_RESPONSE
+    coordinator.async_handle_webhook = AsyncMock()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    await async_setup_webhook(hass, entry)
+
+    async def deliver(event: str, payload: dict, signature: str = "") -> int:
+        body = json.dumps(payload).encode()
+        request = Mock(
+            headers={
+                "X-GitHub-Event": event,
+                "X-Hub-Signature-256": signature or sign(body),
+            },
+            read=AsyncMock(return_value=body),
+        )
+        response = await async_handle_webhook(hass, TEST_WEBHOOK_ID, request)
+        await hass.async_block_till_done()
+        return response.status
+
+    pull_payload = {
+        "action": "synchronize",
+        "number": 46558,
+        "repository": {"full_name": "home-assistant/core"},
+    }
+    assert await deliver("pull_request", pull_payload, "sha256=bad") == 401
+    assert not coordinator.webhook_active
+    assert await deliver("ping", {"zen": "Keep it simple."}) == 200
+    assert coordinator.webhook_active
+    coordinator.async_handle_webhook.assert_not_called()
+
+    assert await deliver("pull_request", {**pull_payload, "number": 1}) == 200
+    coordinator.async_handle_webhook.assert_not_called()
+    assert await deliver("pull_request", pull_payload) == 200
+    assert coordinator.async_handle_webhook.call_count == 1
+
+    push_payload = {
+        "ref": f"refs/heads/{MOCK_PR_RESPONSE['head']['ref']}",
+        "repository": {"full_name": "alandtse/home-assistant"},
+    }
+    assert await deliver("push", push_payload) == 200
+    assert coordinator.async_handle_webhook.call_count == 2
@@ -0,0 +1,97 @@
+"""Tests for PRCustomComponent requirements prefetch."""
+import json
+import os
+import subprocess  # nosec
+
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import yarl
+
+from custom_components.pr_custom_component import (
+    PRCustomComponentApiClient,
+    PRCustomComponentDataUpdateCoordinator,
+    get_wheel_cache,
+)
+from custom_components.pr_custom_component import wheels as wheels_module
+from custom_components.pr_custom_component.const import (
+    DOMAIN,
+    DOWNLOAD_MODE_TREES,
+    PIP_FIND_LINKS,
+    REQUIREMENTS_FAILED,
+    REQUIREMENTS_INSTALLED,
+    REQUIREMENTS_READY,
+)
+from custom_components.pr_custom_component.wheels import read_requirements
+
+from .const import MOCK_PR_RESPONSE, TEST_API_PR_URL, TEST_PR_URL
+from .test_api import mock_component_tree
+
+MISSING_REQUIREMENT = "pr-custom-component-missing==1.0"
+
+
+def test_read_requirements(tmp_path):
+    """Test requirements are read from the manifest."""
+    assert read_requirements(str(tmp_path)) == []
+    (tmp_path / "manifest.json").write_text('{"requirements": ["a==1", 2]}')
+    assert read_requirements(str(tmp_path)) == ["a==1"]
+    (tmp_path / "manifest.json").write_text("[]")
+    assert read_requirements(str(tmp_path)) == []
+
+
+async def test_prefetch_requirements(hass, aioclient_mock, tmp_path, monkeypatch):
+    """Test missing requirements of a synced component are downloaded."""
+    monkeypatch.delenv(PIP_FIND_LINKS, raising=False)
+    hass.config.config_dir = str(tmp_path)
+    api = PRCustomComponentApiClient(
+        async_get_clientsession(hass), yarl.URL(TEST_PR_URL), str(tmp_path)
+    )
+    api.download_mode = DOWNLOAD_MODE_TREES
+    coordinator = PRCustomComponentDataUpdateCoordinator(hass, api)
+    aioclient_mock.get(TEST_API_PR_URL, json=MOCK_PR_RESPONSE)
+    manifest = {"domain": "tesla", "requirements": ["pytest", MISSING_REQUIREMENT]}
+    mock_component_tree(
+        aioclient_mock, {"manifest.json": json.dumps(manifest).encode()}
+    )
+    assert await api.async_update_data(download=True) == MOCK_PR_RESPONSE
+    installed = json.loads(
+        (tmp_path / "custom_components" / "tesla" / "manifest.json").read_text()
+    )
+    assert installed["after_dependencies"] == [DOMAIN]
+
+    calls = []
+
+    def run(args, **kwargs):
+        calls.append(args)
+        dest = args[args.index("--dest") + 1]
+        with open(os.path.join(dest, "missing-1.0-py3-none-any.whl"), "wb"):
+            pass
+        return subprocess.CompletedProcess(args, 0, b"", b"")
+
+    monkeypatch.setattr(wheels_module.subprocess, "run", run)
+    await coordinator.async_prefetch_requirements()
+    assert coordinator.requirements_state == REQUIREMENTS_READY
+    assert coordinator.requirements_missing == [MISSING_REQUIREMENT]
+    (args,) = calls
+    assert args[-1] == MISSING_REQUIREMENT
+    assert "--constraint" in args
+    assert os.environ[PIP_FIND_LINKS] == get_wheel_cache(hass).path
+
+    # Unchanged requirements are not downloaded again
+    await coordinator.async_prefetch_requirements()
+    assert len(calls) == 1
+
+    def fail(args, **kwargs):
+        return subprocess.CompletedProcess(args, 1, b"", b"No matching distribution")
+
+    monkeypatch.setattr(wheels_module.subprocess, "run", fail)
+    coordinator.requirements = []
+    await coordinator.async_prefetch_requirements()
+    assert coordinator.requirements_state == REQUIREMENTS_FAILED
+    assert coordinator.requirements_error == "No matching distribution"
+
+    manifest["requirements"] = ["pytest"]
+    (tmp_path / "custom_components" / "tesla" / "manifest.json").write_text(
+        json.dumps(manifest)
+    )
+    await coordinator.async_prefetch_requirements()
+    assert coordinator.requirements_state == REQUIREMENTS_INSTALLED
+    assert coordinator.requirements_error == ""